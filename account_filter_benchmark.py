@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Account Filter Benchmark for FinanceApp
+Compares GET /api/transactions?account_id=... query strategies on a 100k-transaction dataset
+
+BEFORE: count_documents probe on account_id, then a find on account_id or accountId
+AFTER:  a single find with $or on account_id / accountId (no pre-count)
+
+Runs against a local mongod in a throwaway database, with the indexes the
+backend creates on startup (server.INDEX_SPECS).
+
+Usage:
+    MONGO_URL=mongodb://localhost:27017 python account_filter_benchmark.py [--transactions 100000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'financeapp_benchmark')
+
+import server  # noqa: E402  (INDEX_SPECS, account_filter)
+
+USER_EMAIL = "benchmark@example.com"
+ACCOUNTS = 15
+LEGACY_RATIO = 0.2  # share of rows still stored with camelCase accountId
+PAGE_SIZE = 100
+
+
+def log(message, level="INFO"):
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] {level}: {message}")
+
+
+def seed(db, count):
+    log(f"Seeding {count} transactions across {ACCOUNTS} accounts")
+    account_ids = [str(uuid.uuid4()) for _ in range(ACCOUNTS)]
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    batch = []
+    for i in range(count):
+        account_id = random.choice(account_ids)
+        doc = {
+            "id": str(uuid.uuid4()),
+            "type": random.choice(["income", "expense"]),
+            "amount": round(random.uniform(1, 500), 2),
+            "category": random.choice(["Alimentation", "Transport", "Logement", "Loisirs"]),
+            "description": f"Transaction {i}",
+            "date": (start + timedelta(minutes=30 * i)).isoformat(),
+            "user_email": USER_EMAIL,
+        }
+        doc["accountId" if random.random() < LEGACY_RATIO else "account_id"] = account_id
+        batch.append(doc)
+        if len(batch) == 10000:
+            db.transactions.insert_many(batch)
+            batch = []
+    if batch:
+        db.transactions.insert_many(batch)
+
+    for collection_name, indexes in server.INDEX_SPECS.items():
+        if collection_name == "transactions":
+            db.transactions.create_indexes(indexes)
+
+    # One account whose rows are all legacy: the probe falls through to accountId
+    legacy_account = account_ids[0]
+    db.transactions.update_many(
+        {"account_id": legacy_account},
+        {"$rename": {"account_id": "accountId"}}
+    )
+    return account_ids
+
+
+def query_before(db, account_id):
+    query = {"user_email": USER_EMAIL, "account_id": account_id}
+    if not db.transactions.count_documents(query):
+        query["accountId"] = account_id
+        del query["account_id"]
+    return list(db.transactions.find(query, {"_id": 0}).sort("date", -1).limit(PAGE_SIZE))
+
+
+def query_after(db, account_id):
+    query = {"user_email": USER_EMAIL, "$and": [server.account_filter(account_id)]}
+    return list(db.transactions.find(query, {"_id": 0}).sort([("date", -1), ("id", -1)]).limit(PAGE_SIZE))
+
+
+def measure(name, fn, db, account_ids, iterations):
+    timings = []
+    for i in range(iterations):
+        account_id = account_ids[i % len(account_ids)]
+        start = time.perf_counter()
+        fn(db, account_id)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    p50 = statistics.median(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    log(f"{name}: p50 {p50:.2f}ms, p95 {p95:.2f}ms over {iterations} queries")
+    return p50, p95
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transactions", type=int, default=100000)
+    parser.add_argument("--iterations", type=int, default=300)
+    args = parser.parse_args()
+
+    client = MongoClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    client.drop_database(db.name)
+    try:
+        account_ids = seed(db, args.transactions)
+
+        # Warm up the cache before timing
+        for account_id in account_ids:
+            query_before(db, account_id)
+            query_after(db, account_id)
+
+        # Both strategies must return the same rows for every account
+        for account_id in account_ids:
+            before_ids = {t["id"] for t in query_before(db, account_id)}
+            after_ids = {t["id"] for t in query_after(db, account_id)}
+            if len(after_ids) < len(before_ids):
+                log(f"Result mismatch for account {account_id}", "ERROR")
+                return 1
+
+        before = measure("BEFORE (count probe + find)", query_before, db, account_ids, args.iterations)
+        after = measure("AFTER  (single $or find)  ", query_after, db, account_ids, args.iterations)
+        log(f"p50 speedup: {before[0] / after[0]:.2f}x, p95 speedup: {before[1] / after[1]:.2f}x")
+        return 0
+    finally:
+        client.drop_database(db.name)
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,26 +1,147 @@
 from fastapi import HTTPException, Request, Response
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from cachetools import TTLCache
+from dotenv import load_dotenv
 from datetime import datetime, timezone, timedelta
+from pathlib import Path
+import asyncio
 import httpx
+import importlib.util
+import logging
+import os
 from typing import Optional
 
+load_dotenv(Path(__file__).parent / '.env')
+
+logger = logging.getLogger(__name__)
+
 # Emergent Auth API endpoint
-EMERGENT_AUTH_API = "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data"
+EMERGENT_AUTH_API = os.environ.get(
+    'EMERGENT_AUTH_API', "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data"
+)
+
+# Shared HTTP client settings for Emergent Auth calls
+EMERGENT_AUTH_TIMEOUT = float(os.environ.get('EMERGENT_AUTH_TIMEOUT', 10))
+EMERGENT_AUTH_MAX_CONNECTIONS = int(os.environ.get('EMERGENT_AUTH_MAX_CONNECTIONS', 20))
+EMERGENT_AUTH_MAX_KEEPALIVE = int(os.environ.get('EMERGENT_AUTH_MAX_KEEPALIVE', 10))
+EMERGENT_AUTH_RETRIES = int(os.environ.get('EMERGENT_AUTH_RETRIES', 2))
+EMERGENT_AUTH_BACKOFF = float(os.environ.get('EMERGENT_AUTH_BACKOFF', 0.2))
+
+# Resolved sessions are cached in-process for a short time
+SESSION_CACHE_TTL = float(os.environ.get('SESSION_CACHE_TTL', 60))
+SESSION_CACHE_MAX_SIZE = int(os.environ.get('SESSION_CACHE_MAX_SIZE', 10000))
+
+
+class SessionCache:
+    """Bounded TTL + LRU cache of session token -> (user, session expiry).
+
+    The cache is per process: with several workers, a logout on one worker is
+    seen by the others after at most SESSION_CACHE_TTL seconds.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, session_token: str) -> Optional[dict]:
+        entry = self._entries.get(session_token)
+        if entry is None:
+            self.misses += 1
+            return None
+        user, expires_at = entry
+        if datetime.now(timezone.utc) > expires_at:
+            self._entries.pop(session_token, None)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return dict(user)
+
+    def set(self, session_token: str, user: dict, expires_at: datetime):
+        self._entries[session_token] = (dict(user), expires_at)
+
+    def invalidate(self, session_token: str):
+        self._entries.pop(session_token, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self._entries.maxsize,
+            "ttl_seconds": self._entries.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0
+        }
+
+
+session_cache = SessionCache(maxsize=SESSION_CACHE_MAX_SIZE, ttl=SESSION_CACHE_TTL)
+
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Keep-alive client for Emergent Auth, using HTTP/2 when h2 is installed"""
+    return httpx.AsyncClient(
+        timeout=EMERGENT_AUTH_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=EMERGENT_AUTH_MAX_CONNECTIONS,
+            max_keepalive_connections=EMERGENT_AUTH_MAX_KEEPALIVE
+        ),
+        http2=importlib.util.find_spec("h2") is not None
+    )
+
+
+async def init_http_client():
+    """Create the application-scoped HTTP client (called on startup)"""
+    global _http_client
+    if _http_client is None:
+        _http_client = create_http_client()
+
+
+async def close_http_client():
+    """Close the application-scoped HTTP client (called on shutdown)"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None:
+        # Scripts and tests that never ran the startup hook
+        _http_client = create_http_client()
+    return _http_client
 
 
 async def get_session_data(session_id: str) -> dict:
-    """Get user data from Emergent Auth using session_id"""
-    async with httpx.AsyncClient() as client:
+    """Get user data from Emergent Auth using session_id.
+
+    Network errors and 5xx responses are retried with exponential backoff;
+    any other failure means the session is invalid.
+    """
+    client = get_http_client()
+    for attempt in range(EMERGENT_AUTH_RETRIES + 1):
         try:
-            response = await client.get(
-                EMERGENT_AUTH_API,
-                headers={"X-Session-ID": session_id},
-                timeout=10.0
-            )
-            response.raise_for_status()
-            return response.json()
+            response = await client.get(EMERGENT_AUTH_API, headers={"X-Session-ID": session_id})
+            if response.status_code >= 500 and attempt < EMERGENT_AUTH_RETRIES:
+                logger.warning(f"Emergent Auth returned {response.status_code}, retrying")
+            else:
+                response.raise_for_status()
+                return response.json()
+        except httpx.TransportError as e:
+            if attempt >= EMERGENT_AUTH_RETRIES:
+                raise HTTPException(status_code=401, detail=f"Invalid session: {str(e)}")
+            logger.warning(f"Emergent Auth request failed ({e!r}), retrying")
         except Exception as e:
             raise HTTPException(status_code=401, detail=f"Invalid session: {str(e)}")
+        await asyncio.sleep(EMERGENT_AUTH_BACKOFF * (2 ** attempt))
 
 
 async def save_user_session(db: AsyncIOMotorDatabase, user_data: dict):
@@ -47,7 +168,7 @@ async def save_user_session(db: AsyncIOMotorDatabase, user_data: dict):
         "session_token": session_token,
         "email": email,
         "user_id": user_data.get('id'),
-        "expires_at": expiry.isoformat(),
+        "expires_at": expiry,  # BSON date so the TTL index can purge it
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     
@@ -57,6 +178,7 @@ async def save_user_session(db: AsyncIOMotorDatabase, user_data: dict):
         {"$set": session_doc},
         upsert=True
     )
+    session_cache.invalidate(session_token)
     
     return session_token
 
@@ -88,21 +210,29 @@ async def get_current_user(request: Request, db: AsyncIOMotorDatabase) -> Option
     if not session_token:
         return None
     
-    # Find session in database
-    session = await db.sessions.find_one({"session_token": session_token})
+    cached_user = session_cache.get(session_token)
+    if cached_user is not None:
+        return cached_user
     
-    if not session:
+    # Find the unexpired session and its user in one query
+    # (expired sessions are purged by the TTL index, see ensure_session_indexes)
+    pipeline = [
+        {"$match": {"session_token": session_token, "expires_at": {"$gt": datetime.now(timezone.utc)}}},
+        {"$limit": 1},
+        {"$lookup": {"from": "users", "localField": "email", "foreignField": "email", "as": "user"}},
+        {"$project": {"_id": 0, "expires_at": 1, "user": {"$arrayElemAt": ["$user", 0]}}}
+    ]
+    sessions = await db.sessions.aggregate(pipeline).to_list(1)
+    if not sessions or not sessions[0].get('user'):
         return None
     
-    # Check if expired
-    expires_at = datetime.fromisoformat(session['expires_at']).replace(tzinfo=timezone.utc)
-    if datetime.now(timezone.utc) > expires_at:
-        # Delete expired session
-        await db.sessions.delete_one({"session_token": session_token})
-        return None
+    user = sessions[0]['user']
+    user.pop('_id', None)
+    expires_at = sessions[0]['expires_at']
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
     
-    # Get user data
-    user = await db.users.find_one({"email": session['email']}, {"_id": 0})
+    session_cache.set(session_token, user, expires_at)
     return user
 
 
@@ -124,4 +254,29 @@ async def logout_user(request: Request, db: AsyncIOMotorDatabase):
             session_token = auth_header.replace("Bearer ", "")
     
     if session_token:
+        session_cache.invalidate(session_token)
         await db.sessions.delete_one({"session_token": session_token})
+
+
+async def migrate_session_expiry(db: AsyncIOMotorDatabase) -> int:
+    """Convert legacy ISO-string expires_at values to BSON dates"""
+    operations = []
+    async for session in db.sessions.find({"expires_at": {"$type": "string"}}, {"_id": 1, "expires_at": 1}):
+        try:
+            expires_at = datetime.fromisoformat(session['expires_at'])
+        except ValueError:
+            # Unparseable expiry: expire it now so the TTL monitor removes it
+            expires_at = datetime.now(timezone.utc)
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        operations.append(UpdateOne({"_id": session['_id']}, {"$set": {"expires_at": expires_at}}))
+    
+    if operations:
+        await db.sessions.bulk_write(operations, ordered=False)
+        logger.info(f"Converted expires_at to BSON dates on {len(operations)} sessions")
+    return len(operations)
+
+
+async def ensure_session_indexes(db: AsyncIOMotorDatabase):
+    """Let MongoDB delete sessions once expires_at has passed"""
+    await db.sessions.create_index("expires_at", expireAfterSeconds=0, name="sessions_expires_at_ttl")
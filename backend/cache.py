@@ -0,0 +1,114 @@
+from abc import ABC, abstractmethod
+from cachetools import LRUCache
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(ABC):
+    """Key/value storage behind a VersionedResultCache.
+
+    The default LRUCacheBackend is per process; subclass this (e.g. around
+    Redis) to share cached results between workers.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes):
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    async def clear(self):
+        ...
+
+    def stats(self) -> dict:
+        return {}
+
+
+class LRUCacheBackend(CacheBackend):
+    """Bounded in-process LRU"""
+
+    def __init__(self, maxsize: int):
+        self._entries = LRUCache(maxsize=maxsize)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._entries.get(key)
+
+    async def set(self, key: str, value: bytes):
+        self._entries[key] = value
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    async def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "max_size": self._entries.maxsize}
+
+
+class VersionedResultCache:
+    """One serialized result per user, valid for a single tag.
+
+    The tag is derived from the user's data version (see bump_data_version in
+    server.py), so writes invalidate entries without touching the cache: the
+    next lookup simply carries a different tag.
+    """
+
+    def __init__(self, name: str, backend: CacheBackend):
+        self.name = name
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, backend: CacheBackend):
+        """Swap the storage backend, e.g. for a shared cache"""
+        self.backend = backend
+        self.hits = self.misses = 0
+
+    def _key(self, user_email: str) -> str:
+        return f"{self.name}:{user_email}"
+
+    async def get(self, user_email: str, tag: str) -> Optional[bytes]:
+        try:
+            entry = await self.backend.get(self._key(user_email))
+        except Exception as e:
+            # A broken shared backend must not take the endpoint down
+            logger.warning(f"{self.name} cache read failed: {e}")
+            entry = None
+        if entry is not None:
+            stored_tag, _, body = entry.partition(b"\n")
+            if stored_tag == tag.encode():
+                self.hits += 1
+                return body
+        self.misses += 1
+        return None
+
+    async def set(self, user_email: str, tag: str, body: bytes):
+        try:
+            await self.backend.set(self._key(user_email), tag.encode() + b"\n" + body)
+        except Exception as e:
+            logger.warning(f"{self.name} cache write failed: {e}")
+
+    async def invalidate(self, user_email: str):
+        try:
+            await self.backend.delete(self._key(user_email))
+        except Exception as e:
+            logger.warning(f"{self.name} cache invalidation failed: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            **self.backend.stats(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0
+        }
@@ -0,0 +1,117 @@
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+import asyncio
+import logging
+import time
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# EUR-based fallback table: 1 EUR = rate units of each currency
+STATIC_RATES = {
+    "EUR": 1.0,
+    "USD": 1.10,
+    "CHF": 0.95,
+    "GBP": 0.86,
+    "BTC": 0.000024,
+    "ETH": 0.00044,
+}
+
+
+class RateProvider(ABC):
+    """Source of a currency rate table relative to EUR.
+
+    Subclasses implement fetch_rates(); rate() and table() derive cross rates
+    from it.
+    """
+
+    @abstractmethod
+    async def fetch_rates(self) -> Dict[str, float]:
+        """The current table: 1 EUR = rate units of each known currency"""
+
+    async def table(self, base: str = "EUR") -> Dict[str, float]:
+        """1 `base` = rate units of each known currency"""
+        rates = await self.fetch_rates()
+        if base not in rates:
+            raise KeyError(base)
+        return {currency: rate / rates[base] for currency, rate in rates.items()}
+
+    async def rate(self, from_currency: str, to_currency: str) -> float:
+        """Units of `to_currency` per unit of `from_currency`; KeyError if either is unknown"""
+        if from_currency == to_currency:
+            return 1.0
+        rates = await self.fetch_rates()
+        return rates[to_currency] / rates[from_currency]
+
+    def stats(self) -> dict:
+        return {}
+
+
+class StaticRateProvider(RateProvider):
+    """A fixed rate table"""
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None):
+        self._rates = dict(rates or STATIC_RATES)
+
+    async def fetch_rates(self) -> Dict[str, float]:
+        return self._rates
+
+    def stats(self) -> dict:
+        return {"provider": "static", "currencies": len(self._rates)}
+
+
+class HTTPRateProvider(RateProvider):
+    """EUR rates from a Frankfurter-compatible API ({"rates": {...}}), cached for `ttl` seconds.
+
+    Currencies the API does not quote (e.g. crypto) come from the fallback
+    table, which also serves everything until the first successful fetch.
+    When a refresh fails the last table is kept and retried after
+    `retry_after` seconds.
+    """
+
+    def __init__(self, url: str, get_client: Callable[[], httpx.AsyncClient], ttl: float = 3600,
+                 timeout: float = 5.0, retry_after: float = 60, fallback: Optional[Dict[str, float]] = None):
+        self.url = url
+        self.ttl = ttl
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._get_client = get_client
+        self._rates = dict(fallback or STATIC_RATES)
+        self._expires = 0.0
+        self._fetched_at: Optional[datetime] = None
+        self._lock = asyncio.Lock()
+        self.fetches = 0
+        self.failures = 0
+
+    async def fetch_rates(self) -> Dict[str, float]:
+        if time.monotonic() < self._expires:
+            return self._rates
+        async with self._lock:
+            # Concurrent callers wait for the refresh already in flight
+            if time.monotonic() < self._expires:
+                return self._rates
+            try:
+                self.fetches += 1
+                response = await self._get_client().get(self.url, params={"from": "EUR"}, timeout=self.timeout)
+                response.raise_for_status()
+                rates = {code: float(rate) for code, rate in response.json()["rates"].items()}
+                self._rates = {**self._rates, **rates, "EUR": 1.0}
+                self._fetched_at = datetime.now(timezone.utc)
+                self._expires = time.monotonic() + self.ttl
+            except (httpx.HTTPError, KeyError, TypeError, ValueError) as e:
+                self.failures += 1
+                logger.warning(f"Could not refresh exchange rates from {self.url}: {e}")
+                self._expires = time.monotonic() + self.retry_after
+        return self._rates
+
+    def stats(self) -> dict:
+        return {
+            "provider": "http",
+            "url": self.url,
+            "currencies": len(self._rates),
+            "fetched_at": self._fetched_at.isoformat() if self._fetched_at else None,
+            "fetches": self.fetches,
+            "failures": self.failures,
+        }
@@ -0,0 +1,143 @@
+from typing import AsyncIterator, Optional, Tuple
+import codecs
+import json
+import zlib
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+
+async def gunzip(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Decompress a gzip (or zlib) byte stream chunk by chunk"""
+    decompressor = zlib.decompressobj(wbits=47)  # auto-detect gzip/zlib header
+    async for chunk in chunks:
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    data = decompressor.flush()
+    if data:
+        yield data
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes], metadata: Optional[dict] = None) -> AsyncIterator[Tuple[str, dict]]:
+    """(collection, document) pairs from an NDJSON export.
+
+    Each line is {"collection": ..., "document": {...}}; the trailing
+    {"checkpoint": ...} line and blank lines are skipped, the former being
+    copied into `metadata` when given.
+    """
+    buffer = b""
+    line_number = 0
+
+    def parse(line: bytes):
+        record = json.loads(line)
+        if not isinstance(record, dict):
+            raise ValueError(f"line {line_number}: expected an object")
+        if "checkpoint" in record:
+            if metadata is not None:
+                metadata.update(record)
+            return None
+        if not isinstance(record.get("collection"), str) or "document" not in record:
+            raise ValueError(f"line {line_number}: expected {{\"collection\", \"document\"}}")
+        return record["collection"], record["document"]
+
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                record = parse(line)
+                if record:
+                    yield record
+    if buffer.strip():
+        line_number += 1
+        record = parse(buffer)
+        if record:
+            yield record
+
+
+class _JSONReader:
+    """Pulls JSON tokens and values off a byte stream, keeping only the unread tail in memory"""
+
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self._chunks = chunks.__aiter__()
+        self._utf8 = codecs.getincrementaldecoder("utf-8-sig")()
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    async def _fill(self) -> bool:
+        if self.eof:
+            return False
+        self.text = self.text[self.pos:]
+        self.pos = 0
+        try:
+            self.text += self._utf8.decode(await self._chunks.__anext__())
+        except StopAsyncIteration:
+            self.text += self._utf8.decode(b"", final=True)
+            self.eof = True
+        return True
+
+    async def peek(self) -> str:
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not await self._fill():
+                raise ValueError("unexpected end of JSON")
+
+    async def expect(self, allowed: str) -> str:
+        char = await self.peek()
+        if char not in allowed:
+            raise ValueError(f"expected one of {allowed!r}, found {char!r}")
+        self.pos += 1
+        return char
+
+    async def value(self):
+        await self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+                # A number at the end of the buffer may continue in the next chunk
+                if end < len(self.text) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise ValueError(str(e))
+            await self._fill()
+
+
+async def iter_json_collections(chunks: AsyncIterator[bytes],
+                                metadata: Optional[dict] = None) -> AsyncIterator[Tuple[str, dict]]:
+    """(collection, document) pairs from a {"collection": [documents], ...} export.
+
+    Documents are decoded one at a time; top-level keys whose value is not a
+    list (e.g. "checkpoint") are skipped, and copied into `metadata` when given.
+    """
+    reader = _JSONReader(chunks)
+    await reader.expect("{")
+    if await reader.peek() == "}":
+        return
+    while True:
+        key = await reader.value()
+        if not isinstance(key, str):
+            raise ValueError("expected a collection name")
+        await reader.expect(":")
+        if await reader.peek() == "[":
+            await reader.expect("[")
+            if await reader.peek() == "]":
+                await reader.expect("]")
+            else:
+                while True:
+                    yield key, await reader.value()
+                    if await reader.expect(",]") == "]":
+                        break
+        else:
+            value = await reader.value()
+            if metadata is not None:
+                metadata[key] = value
+        if await reader.expect(",}") == "}":
+            break
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Maintenance commands for the FinanceApp backend.
+
+Usage:
+    python manage.py rebuild-balances [--user EMAIL] [--check]
+    python manage.py rebuild-rollups [--user EMAIL]
+    python manage.py claim-unowned --user EMAIL
+    python manage.py ensure-indexes
+    python manage.py index-report
+    python manage.py migrate-schema [--collection NAME] [--batch-size N]
+    DATE_STORAGE=native python manage.py migrate-dates [--collection NAME] [--batch-size N]
+"""
+import argparse
+import asyncio
+
+import server
+
+
+async def rebuild_balances(args):
+    """Replay transaction history into account_balances and report drift"""
+    if args.user:
+        users = [args.user]
+    else:
+        users = await server.db.accounts.distinct("user_email")
+
+    drifted_total = 0
+    for user_email in users:
+        report = await server.rebuild_account_balances(user_email, repair=not args.check)
+        drifted_total += len(report['drifted'])
+        for drift in report['drifted']:
+            print(f"[{user_email}] account {drift['account_id']}: stored={drift['stored']} expected={drift['expected']}")
+        if report['orphaned']:
+            print(f"[{user_email}] orphaned balance rows: {', '.join(report['orphaned'])}")
+
+    action = "found" if args.check else "repaired"
+    print(f"{len(users)} users checked, {drifted_total} drifted accounts {action}")
+    return 1 if args.check and drifted_total else 0
+
+
+async def rebuild_rollups(args):
+    """Recompute monthly_rollups from transaction history"""
+    if args.user:
+        users = [args.user]
+    else:
+        users = await server.db.transactions.distinct("user_email")
+
+    rows = 0
+    for user_email in users:
+        rows += await server.rebuild_monthly_rollups(user_email)
+    print(f"{len(users)} users rebuilt, {rows} rollup rows")
+    return 0
+
+
+async def claim_unowned(args):
+    """Give products, shopping lists and bank connections stored without an owner to a user"""
+    claimed = await server.claim_unowned_documents(args.user)
+    for name, count in claimed.items():
+        print(f"[{name}] {count} documents assigned to {args.user}")
+    return 0
+
+
+async def ensure_indexes(args):
+    """Create the indexes declared in server.INDEX_SPECS"""
+    failed = await server.ensure_indexes()
+    for name in failed:
+        print(f"failed: {name}")
+    return 1 if failed else 0
+
+
+async def index_report(args):
+    """List missing indexes and indexes unused since mongod started"""
+    report = await server.index_report()
+    for name in report['missing']:
+        print(f"missing: {name}")
+    for name in report['unused']:
+        print(f"unused: {name}")
+    print(f"{len(report['missing'])} missing, {len(report['unused'])} unused")
+    return 1 if report['missing'] else 0
+
+
+async def migrate_schema(args):
+    """Rewrite stored documents to snake_case and stamp schema_version"""
+    collections = [args.collection] if args.collection else list(server.SCHEMA_COLLECTIONS)
+
+    def progress(collection_name, migrated):
+        print(f"[{collection_name}] {migrated} documents migrated")
+
+    for collection_name in collections:
+        state = await server.migrate_schema(collection_name, batch_size=args.batch_size, progress=progress)
+        print(f"[{collection_name}] done ({state.get('migrated', 0)} documents)")
+    print("Restart the API so it stops applying camelCase fallbacks")
+    return 0
+
+
+async def migrate_dates(args):
+    """Convert stored ISO-string dates to BSON datetimes"""
+    if server.DATE_STORAGE != 'native':
+        print("Set DATE_STORAGE=native (here and on the API) before converting dates")
+        return 1
+    collections = [args.collection] if args.collection else list(server.DATE_FIELDS)
+
+    def progress(collection_name, migrated):
+        print(f"[{collection_name}] {migrated} documents converted")
+
+    for collection_name in collections:
+        state = await server.migrate_dates(collection_name, batch_size=args.batch_size, progress=progress)
+        print(f"[{collection_name}] done ({state.get('migrated', 0)} documents)")
+    print("Restart the API so date filters and reads skip the string fallbacks")
+    return 0
+
+
+COMMANDS = {
+    "rebuild-balances": rebuild_balances,
+    "rebuild-rollups": rebuild_rollups,
+    "claim-unowned": claim_unowned,
+    "ensure-indexes": ensure_indexes,
+    "index-report": index_report,
+    "migrate-schema": migrate_schema,
+    "migrate-dates": migrate_dates,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FinanceApp maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = subparsers.add_parser("rebuild-balances", help="Verify and repair materialized account balances")
+    rebuild.add_argument("--user", help="Only rebuild balances for this user email")
+    rebuild.add_argument("--check", action="store_true", help="Report drift without repairing it")
+
+    rollups = subparsers.add_parser("rebuild-rollups", help="Recompute the dashboard's monthly rollups")
+    rollups.add_argument("--user", help="Only rebuild rollups for this user email")
+
+    claim = subparsers.add_parser("claim-unowned", help="Assign products, shopping lists and bank connections without an owner")
+    claim.add_argument("--user", required=True, help="Email of the user receiving the documents")
+
+    subparsers.add_parser("ensure-indexes", help="Create missing indexes")
+    subparsers.add_parser("index-report", help="Report missing and unused indexes")
+
+    migrate = subparsers.add_parser("migrate-schema", help="Normalize stored documents to snake_case (resumable)")
+    migrate.add_argument("--collection", choices=sorted(server.SCHEMA_COLLECTIONS), help="Only migrate this collection")
+    migrate.add_argument("--batch-size", type=int, default=server.MIGRATION_BATCH_SIZE)
+
+    dates = subparsers.add_parser("migrate-dates", help="Convert ISO-string dates to BSON datetimes (resumable)")
+    dates.add_argument("--collection", choices=sorted(server.DATE_FIELDS), help="Only convert this collection")
+    dates.add_argument("--batch-size", type=int, default=server.MIGRATION_BATCH_SIZE)
+
+    args = parser.parse_args()
+    try:
+        return asyncio.run(COMMANDS[args.command](args))
+    finally:
+        server.client.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
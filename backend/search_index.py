@@ -0,0 +1,168 @@
+from cachetools import LRUCache
+from typing import Dict, Iterable, List, Optional, Tuple
+import bisect
+import re
+import time
+import unicodedata
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text) -> List[str]:
+    """Lowercased, accent-folded words of a text ("Café Crème" -> ["cafe", "creme"])"""
+    if not isinstance(text, str):
+        return []
+    folded = unicodedata.normalize('NFKD', text.lower())
+    folded = ''.join(c for c in folded if not unicodedata.combining(c))
+    return TOKEN_RE.findall(folded)
+
+
+def extends(previous: List[str], words: List[str]) -> bool:
+    """Whether `words` can only match a subset of what `previous` matched
+    (more words, or a longer last word: "mig" -> "migros", "migros" -> "migros zu")"""
+    if not previous or len(words) < len(previous):
+        return False
+    last = len(previous) - 1
+    return words[:last] == previous[:last] and words[last].startswith(previous[last])
+
+
+class PrefixIndex:
+    """Sorted (token, key) table over one user's searchable entities.
+
+    Every word of a query must prefix a token of the entity; the entities
+    matching one word are a contiguous slice of the table, found with two
+    bisections. Keys are (type, id).
+    """
+
+    def __init__(self, version: int):
+        self.version = version
+        self.checked_at = time.monotonic()
+        self._table: List[Tuple[str, tuple]] = []
+        self._docs: Dict[tuple, dict] = {}
+        self._tokens: Dict[tuple, Tuple[str, ...]] = {}
+        self._last: Optional[Tuple[List[str], List[tuple]]] = None
+
+    def __len__(self):
+        return len(self._docs)
+
+    def build(self, entities: Iterable[Tuple[str, dict, Iterable[str]]]):
+        """Bulk load (type, display doc, searchable fields) triples"""
+        for type_name, doc, fields in entities:
+            key = (type_name, doc['id'])
+            tokens = tuple(sorted({token for field in fields for token in tokenize(doc.get(field))}))
+            self._docs[key] = doc
+            self._tokens[key] = tokens
+            self._table.extend((token, key) for token in tokens)
+        self._table.sort()
+        self._last = None
+
+    def add(self, type_name: str, doc: dict, fields: Iterable[str]):
+        self.remove(type_name, doc['id'])
+        key = (type_name, doc['id'])
+        tokens = tuple(sorted({token for field in fields for token in tokenize(doc.get(field))}))
+        for token in tokens:
+            bisect.insort(self._table, (token, key))
+        self._docs[key] = doc
+        self._tokens[key] = tokens
+        self._last = None
+
+    def remove(self, type_name: str, entity_id: str):
+        key = (type_name, entity_id)
+        tokens = self._tokens.pop(key, None)
+        if tokens is None:
+            return
+        del self._docs[key]
+        for token in tokens:
+            i = bisect.bisect_left(self._table, (token, key))
+            if i < len(self._table) and self._table[i] == (token, key):
+                del self._table[i]
+        self._last = None
+
+    def doc(self, key: tuple) -> dict:
+        return self._docs[key]
+
+    def _prefixed(self, word: str) -> set:
+        lo = bisect.bisect_left(self._table, (word,))
+        hi = bisect.bisect_left(self._table, (word + "\uffff",))
+        return {key for _, key in self._table[lo:hi]}
+
+    def _matches(self, key: tuple, words: List[str]) -> bool:
+        tokens = self._tokens[key]
+        return all(any(token.startswith(word) for token in tokens) for word in words)
+
+    def score(self, key: tuple, words: List[str]) -> float:
+        """Exact word matches count double; shorter texts rank first among equals"""
+        tokens = self._tokens[key]
+        exact = sum(1 for word in words if word in tokens)
+        return len(words) + exact + 1 / (1 + len(tokens))
+
+    def search(self, q: str, prev_q: Optional[str] = None) -> List[tuple]:
+        """Keys of the entities matching every word of `q`, best first.
+
+        When `prev_q` was the previous query on this index and `q` extends it,
+        the previous results are filtered instead of searching the table again.
+        """
+        words = tokenize(q)
+        if not words:
+            return []
+        previous = tokenize(prev_q) if prev_q else None
+        if self._last and previous == self._last[0] and extends(previous, words):
+            candidates = [key for key in self._last[1] if self._matches(key, words)]
+        else:
+            matches = sorted((self._prefixed(word) for word in words), key=len)
+            candidates = set.intersection(*matches)
+        ranked = sorted(candidates, key=lambda key: (-self.score(key, words), key))
+        self._last = (words, ranked)
+        return ranked
+
+
+class PrefixIndexRegistry:
+    """Per-user PrefixIndex instances, least recently searched evicted first.
+
+    Indexes live in one process; each remembers the data version it reflects
+    so the API can detect writes made by other workers.
+    """
+
+    def __init__(self, max_users: int, types: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]]):
+        """`types` maps each entity type to (display fields, searchable fields)"""
+        self._indexes = LRUCache(maxsize=max_users)
+        self.types = types
+
+    def display(self, type_name: str, doc: dict) -> dict:
+        return {field: doc[field] for field in self.types[type_name][0] if field in doc}
+
+    def get(self, user_email: str) -> Optional[PrefixIndex]:
+        return self._indexes.get(user_email)
+
+    def set(self, user_email: str, index: PrefixIndex):
+        self._indexes[user_email] = index
+
+    def invalidate(self, user_email: str):
+        self._indexes.pop(user_email, None)
+
+    def add(self, user_email: str, type_name: str, docs: Iterable[dict]):
+        """Index new or updated entities (no-op until the user's index is built)"""
+        index = self._indexes.get(user_email)
+        if index is not None:
+            for doc in docs:
+                if doc.get('id'):
+                    index.add(type_name, self.display(type_name, doc), self.types[type_name][1])
+
+    def remove(self, user_email: str, type_name: str, entity_ids: Iterable[str]):
+        index = self._indexes.get(user_email)
+        if index is not None:
+            for entity_id in entity_ids:
+                index.remove(type_name, entity_id)
+
+    def advance(self, user_email: str, version: int):
+        """Record a version bump whose change was already applied to the index in this process"""
+        index = self._indexes.get(user_email)
+        if index is not None and index.version == version - 1:
+            index.version = version
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self._indexes),
+            "max_users": self._indexes.maxsize,
+            "entities": sum(len(index) for index in self._indexes.values())
+        }
@@ -1,18 +1,45 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Query, Request, Response, Depends
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Request, Response, Depends, File, Form, UploadFile
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne, ReplaceOne, IndexModel, ReturnDocument, ASCENDING, DESCENDING, TEXT
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 import os
+import re
+import asyncio
+import time
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, ConfigDict, ValidationError
+from typing import List, Optional, Dict, Any, Union, Awaitable
+import base64
+import codecs
+import csv
+import io
+import tempfile
+import hashlib
+import json
 import uuid
-from datetime import datetime, timezone
+import zlib
+from datetime import date, datetime, timedelta, timezone
+from fastapi.encoders import jsonable_encoder
 from enum import Enum
-from auth import get_session_data, save_user_session, set_session_cookie, get_current_user, require_auth, logout_user
+from auth import (
+    get_session_data, save_user_session, set_session_cookie, get_current_user, require_auth, logout_user,
+    session_cache, migrate_session_expiry, ensure_session_indexes, init_http_client, close_http_client,
+    get_http_client
+)
+from cache import VersionedResultCache, LRUCacheBackend
+from search_index import PrefixIndex, PrefixIndexRegistry, tokenize
+from json_stream import gunzip, iter_json_collections, iter_ndjson
+from fx_rates import RateProvider, StaticRateProvider, HTTPRateProvider
+
+try:
+    import zstandard  # optional: enables ?compress=zstd on exports
+except ImportError:
+    zstandard = None
 
 
 ROOT_DIR = Path(__file__).parent
@@ -20,7 +47,7 @@ load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, tz_aware=True)
 db = client[os.environ['DB_NAME']]
 
 # Create the main app
@@ -50,6 +77,16 @@ def convert_camel_to_snake(data: dict, field_mappings: dict) -> dict:
             data[snake] = data[camel]
     return data
 
+def convert_legacy_fields(data: dict, collection: str, field_mappings: dict) -> dict:
+    """convert_camel_to_snake, skipped once the schema migration has normalized the collection"""
+    if collection in normalized_collections:
+        return data
+    return convert_camel_to_snake(data, field_mappings)
+
+def camel_unset(field_mappings: dict, fields) -> dict:
+    """$unset spec removing the legacy camelCase twins of the given snake_case fields"""
+    return {camel: "" for camel, snake in field_mappings.items() if snake in fields}
+
 def convert_dates_from_string(data: dict, date_fields: list) -> dict:
     """Convert ISO string dates to datetime objects"""
     for field in date_fields:
@@ -60,6 +97,126 @@ def convert_dates_from_string(data: dict, date_fields: list) -> dict:
                 pass
     return data
 
+def convert_stored_dates(data: dict, collection: str, date_fields: list) -> dict:
+    """convert_dates_from_string, skipped once migrate-dates has converted the collection"""
+    if collection in native_date_collections:
+        return data
+    return convert_dates_from_string(data, date_fields)
+
+def storage_date(value):
+    """A date/datetime in the form it is written to MongoDB under DATE_STORAGE"""
+    if isinstance(value, datetime):
+        return value if DATE_STORAGE == 'native' else value.isoformat()
+    if isinstance(value, date):
+        # BSON has no date-only type
+        value = datetime.combine(value, datetime.min.time(), tzinfo=timezone.utc)
+        return value if DATE_STORAGE == 'native' else value.isoformat()
+    return value
+
+def storage_dates(value):
+    """storage_date applied throughout a model dump, nested dicts and lists included"""
+    if isinstance(value, dict):
+        return {key: storage_dates(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [storage_dates(item) for item in value]
+    return storage_date(value)
+
+def parse_stored_date(value) -> Optional[datetime]:
+    """Timezone-aware datetime from a stored date, whichever form it was written in"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime) and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+def account_filter(account_id: str) -> dict:
+    """Match a transaction's account whether it was stored as account_id or legacy accountId"""
+    if "transactions" in normalized_collections:
+        return {"account_id": account_id}
+    return {"$or": [{"account_id": account_id}, {"accountId": account_id}]}
+
+def stored_date_filter(field: str, as_string: dict, as_datetime: dict, collection: str) -> dict:
+    """Filter on a stored date given the same bounds as ISO strings and as datetimes.
+
+    BSON comparisons never cross types, so while a collection is only partly
+    converted to native dates both forms are matched.
+    """
+    if collection in native_date_collections:
+        return {field: as_datetime}
+    if DATE_STORAGE == 'native':
+        return {"$or": [{field: as_string}, {field: as_datetime}]}
+    return {field: as_string}
+
+def date_range_filter(field: str, date_from: Optional[date], date_to: Optional[date],
+                      collection: str = "transactions") -> Optional[dict]:
+    """Mongo filter on a stored date for an inclusive [date_from, date_to] day range.
+
+    ISO strings sort chronologically, so a bare YYYY-MM-DD bound compares
+    correctly against any time-of-day suffix.
+    """
+    if not date_from and not date_to:
+        return None
+    as_string, as_datetime = {}, {}
+    if date_from:
+        as_string["$gte"] = date_from.isoformat()
+        as_datetime["$gte"] = datetime.combine(date_from, datetime.min.time(), tzinfo=timezone.utc)
+    if date_to:
+        next_day = date_to + timedelta(days=1)
+        as_string["$lt"] = next_day.isoformat()
+        as_datetime["$lt"] = datetime.combine(next_day, datetime.min.time(), tzinfo=timezone.utc)
+    return stored_date_filter(field, as_string, as_datetime, collection)
+
+def date_since_filter(field: str, since: datetime, collection: str = "transactions") -> dict:
+    """Mongo filter on a stored date strictly after `since`"""
+    return stored_date_filter(field, {"$gt": since.isoformat()}, {"$gt": since}, collection)
+
+def projection_for_fields(fields: str, model: type, field_map: dict) -> tuple:
+    """Parse a comma-separated `fields=` parameter into (requested fields, Mongo projection).
+
+    Legacy camelCase names are projected too so they can still be converted.
+    """
+    requested = [f.strip() for f in fields.split(',') if f.strip()]
+    unknown = [f for f in requested if f not in model.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    projection = {"_id": 0}
+    for field in requested:
+        projection[field] = 1
+    for camel, snake in field_map.items():
+        if snake in requested:
+            projection[camel] = 1
+    return requested, projection
+
+def encode_cursor(date_value: Any, doc_id: str) -> str:
+    """Opaque keyset cursor for a (date, id) position"""
+    payload = {"d": date_value, "i": doc_id}
+    if isinstance(date_value, datetime):
+        payload = {"d": date_value.isoformat(), "i": doc_id, "t": "dt"}
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> tuple:
+    """Inverse of encode_cursor; raises 400 on a malformed cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        date_value = payload["d"]
+        if payload.get("t") == "dt":
+            date_value = datetime.fromisoformat(date_value)
+        return date_value, payload["i"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+# Collections rewritten to snake_case by the schema migration (loaded on startup,
+# see load_migration_state); their documents need no camelCase fallbacks.
+normalized_collections: set = set()
+
+# Date storage mode: "iso" keeps the historical ISO-8601 strings, "native" writes
+# BSON datetimes. Switch to native first, then run `python manage.py migrate-dates`;
+# collections it has fully converted are listed in native_date_collections.
+DATE_STORAGE = os.environ.get('DATE_STORAGE', 'iso').lower()
+native_date_collections: set = set()
+
 # Common field mappings for different models
 TRANSACTION_FIELD_MAP = {
     'accountId': 'account_id',
@@ -237,6 +394,30 @@ class TransactionCreate(BaseModel):
     tags: List[str] = Field(default_factory=list)
 
 
+class TransactionPage(BaseModel):
+    items: List[Transaction]
+    next_cursor: Optional[str] = None  # Pass as `after` to get older transactions
+    prev_cursor: Optional[str] = None  # Pass as `before` to get newer transactions
+
+
+class TransactionBatchCreateItem(TransactionCreate):
+    # Same role as the Idempotency-Key header of POST /transactions
+    idempotency_key: Optional[str] = Field(default=None, min_length=1, max_length=255)
+
+
+class TransactionBatchUpdateItem(TransactionCreate):
+    id: str
+
+
+class TransactionBatch(BaseModel):
+    # Items are validated one by one so a bad item does not fail the batch
+    items: List[Dict[str, Any]]
+
+
+class TransactionBatchDelete(BaseModel):
+    ids: List[str]
+
+
 # ============================================================================
 # MODELS - INVESTMENTS
 # ============================================================================
@@ -590,6 +771,739 @@ class BankConnectionCreate(BaseModel):
     access_token: Optional[str] = None
 
 
+# ============================================================================
+# CONCURRENT QUERIES
+# ============================================================================
+# Upper bound on the queries a single request runs at once, so one handler
+# can't monopolize the Motor connection pool
+QUERY_CONCURRENCY = int(os.environ.get('QUERY_CONCURRENCY', 8))
+DEBUG_TIMINGS = os.environ.get('DEBUG_TIMINGS', '').lower() in ('1', 'true', 'yes')
+
+async def gather_queries(queries: Dict[str, Awaitable], timings: Optional[Dict[str, float]] = None,
+                         limit: int = QUERY_CONCURRENCY) -> Dict[str, Any]:
+    """Await independent queries concurrently, at most `limit` at a time.
+
+    Returns results keyed like `queries`; per-query wall times in ms are
+    recorded into `timings` when given.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(name: str, query: Awaitable):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                return await query
+            finally:
+                if timings is not None:
+                    timings[name] = (time.perf_counter() - start) * 1000
+
+    results = await asyncio.gather(*(run(name, query) for name, query in queries.items()))
+    return dict(zip(queries, results))
+
+def timings_requested(request: Request) -> bool:
+    """Per-query timings are reported when DEBUG_TIMINGS is set or the client sends X-Debug-Timings"""
+    return DEBUG_TIMINGS or bool(request.headers.get("x-debug-timings"))
+
+def server_timing_header(timings: Dict[str, float]) -> str:
+    """Server-Timing header value, e.g. `transactions;dur=12.3, goals;dur=1.1`"""
+    return ", ".join(f"{name};dur={duration:.1f}" for name, duration in timings.items())
+
+
+# ============================================================================
+# MONGO TRANSACTIONS
+# ============================================================================
+# Multi-document transactions need a replica set or mongos. On a standalone
+# mongod the same writes run without one; None until the first attempt.
+mongo_transactions_supported: Optional[bool] = None
+
+async def run_in_transaction(callback):
+    """Run `await callback(session)` in a transaction, or `callback(None)` where transactions are unsupported"""
+    global mongo_transactions_supported
+    if mongo_transactions_supported is not False:
+        try:
+            async with await client.start_session() as session:
+                result = await session.with_transaction(callback)
+            mongo_transactions_supported = True
+            return result
+        except OperationFailure as e:
+            # IllegalOperation: "Transaction numbers are only allowed on a replica set member or mongos"
+            if e.code != 20:
+                raise
+            logger.warning("MongoDB deployment does not support transactions; writing without one")
+            mongo_transactions_supported = False
+    return await callback(None)
+
+
+# ============================================================================
+# DATA VERSIONS
+# ============================================================================
+# A per-user counter bumped on every write to accounts, transactions,
+# investments, goals, debts, receivables, categories or products. Cached
+# results are tagged with it, so any write invalidates them across all workers.
+#
+# Each bump also appends one change_log entry naming the documents it
+# changed or deleted, which /sync replays for clients. A missing entry
+# (crash between the two writes, or expired by CHANGE_LOG_TTL_DAYS) only
+# makes clients fall back to a full resync.
+CHANGE_LOG_TTL_DAYS = int(os.environ.get('CHANGE_LOG_TTL_DAYS', 30))
+CHANGE_LOG_MAX_IDS = 10000  # larger writes are logged as a reset
+
+async def bump_data_version(user_email: str, changed: Optional[Dict[str, List[str]]] = None,
+                            deleted: Optional[Dict[str, List[str]]] = None, reset: bool = False) -> int:
+    """Increment and return the user's data version, logging the write for /sync.
+
+    `changed` and `deleted` map collection names to document ids; `reset`
+    marks a bulk rewrite (import, delete-all) that clients resync in full.
+    """
+    doc = await db.data_versions.find_one_and_update(
+        {"user_email": user_email},
+        {"$inc": {"version": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    search_indexes.advance(user_email, doc['version'])
+    
+    changed = {name: list(ids) for name, ids in (changed or {}).items() if ids}
+    deleted = {name: list(ids) for name, ids in (deleted or {}).items() if ids}
+    if sum(len(ids) for ids in (*changed.values(), *deleted.values())) > CHANGE_LOG_MAX_IDS:
+        reset = True
+    entry = {
+        "user_email": user_email,
+        "version": doc['version'],
+        "at": datetime.now(timezone.utc),  # always a BSON date: the TTL index needs one
+    }
+    entry.update({"reset": True} if reset else {"changed": changed, "deleted": deleted})
+    await db.change_log.insert_one(entry)
+    return doc['version']
+
+async def get_data_version(user_email: str) -> int:
+    doc = await db.data_versions.find_one({"user_email": user_email}, {"_id": 0, "version": 1})
+    return doc['version'] if doc else 0
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header covers the given ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in candidates or etag in [tag[2:] if tag.startswith('W/') else tag for tag in candidates]
+
+# Dashboard summaries, one per user, valid for a data version and a UTC day
+# (the 30-day window and the trend months move with the date)
+DASHBOARD_CACHE_MAX_SIZE = int(os.environ.get('DASHBOARD_CACHE_MAX_SIZE', 1000))
+dashboard_cache = VersionedResultCache("dashboard", LRUCacheBackend(maxsize=DASHBOARD_CACHE_MAX_SIZE))
+
+
+# ============================================================================
+# EXCHANGE RATES
+# ============================================================================
+# Rates for cross-currency transfers and /currency/rates. FX_RATE_PROVIDER
+# selects the source: "static" (built-in table) or "http" (a Frankfurter-
+# compatible API at FX_RATES_URL, cached for FX_RATES_TTL seconds).
+FX_RATE_PROVIDER = os.environ.get('FX_RATE_PROVIDER', 'static').lower()
+FX_RATES_URL = os.environ.get('FX_RATES_URL', 'https://api.frankfurter.app/latest')
+FX_RATES_TTL = float(os.environ.get('FX_RATES_TTL', 3600))
+
+def create_rate_provider() -> RateProvider:
+    if FX_RATE_PROVIDER == 'http':
+        return HTTPRateProvider(FX_RATES_URL, get_http_client, ttl=FX_RATES_TTL)
+    if FX_RATE_PROVIDER != 'static':
+        raise RuntimeError(f"FX_RATE_PROVIDER must be 'static' or 'http', not {FX_RATE_PROVIDER!r}")
+    return StaticRateProvider()
+
+rate_provider = create_rate_provider()
+
+
+# ============================================================================
+# ACCOUNT BALANCE ENGINE
+# ============================================================================
+BALANCE_TOTAL_FIELDS = ('income', 'expense', 'transfer_in', 'transfer_out')
+
+def empty_balance_totals() -> dict:
+    return {field: 0.0 for field in BALANCE_TOTAL_FIELDS}
+
+def balance_from_totals(initial_balance: float, totals: dict) -> float:
+    """initial_balance + income - expense + transfers in - transfers out"""
+    return (
+        (initial_balance or 0)
+        + totals.get('income', 0) - totals.get('expense', 0)
+        + totals.get('transfer_in', 0) - totals.get('transfer_out', 0)
+    )
+
+async def compute_account_totals(user_email: str, account_ids: Optional[List[str]] = None) -> Dict[str, dict]:
+    """Sum income/expense/transfer amounts per account in a single aggregation.
+
+    Transfers are recorded as one row per side (see transfer_between_accounts), so
+    each row only moves the balance of its own account. Rows carry a
+    ``transfer_direction``; older rows without it are recognised by the
+    "(from ...)" suffix the transfer endpoint used to write on incoming rows.
+    """
+    normalized = "transactions" in normalized_collections
+    match = {"user_email": user_email}
+    if account_ids is not None:
+        if normalized:
+            match["account_id"] = {"$in": account_ids}
+        else:
+            match["$or"] = [
+                {"account_id": {"$in": account_ids}},
+                {"accountId": {"$in": account_ids}}
+            ]
+
+    incoming_transfer = {"$or": [
+        {"$eq": ["$transfer_direction", "in"]},
+        {"$and": [
+            {"$eq": [{"$ifNull": ["$transfer_direction", None]}, None]},
+            {"$regexMatch": {"input": {"$ifNull": ["$description", ""]}, "regex": r"\(from .*\)$"}}
+        ]}
+    ]}
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "account_id": "$account_id" if normalized else {"$ifNull": ["$account_id", "$accountId"]},
+                "kind": {"$switch": {
+                    "branches": [
+                        {"case": {"$eq": ["$type", "income"]}, "then": "income"},
+                        {"case": {"$eq": ["$type", "expense"]}, "then": "expense"},
+                        {"case": {"$and": [{"$eq": ["$type", "transfer"]}, incoming_transfer]}, "then": "transfer_in"},
+                        {"case": {"$eq": ["$type", "transfer"]}, "then": "transfer_out"}
+                    ],
+                    "default": None
+                }}
+            },
+            "total": {"$sum": {"$ifNull": ["$amount", 0]}}
+        }}
+    ]
+
+    totals: Dict[str, dict] = {}
+    async for row in db.transactions.aggregate(pipeline):
+        account_id = row['_id'].get('account_id')
+        kind = row['_id'].get('kind')
+        if account_id is None or kind is None:
+            continue
+        totals.setdefault(account_id, empty_balance_totals())[kind] += row['total']
+    return totals
+
+def transaction_balance_kind(txn: dict) -> Optional[str]:
+    """Which balance total a transaction feeds (mirrors compute_account_totals)"""
+    txn_type = txn.get('type')
+    if txn_type in ('income', 'expense'):
+        return txn_type
+    if txn_type == 'transfer':
+        direction = txn.get('transfer_direction')
+        if direction is None:
+            direction = 'in' if re.search(r"\(from .*\)$", txn.get('description') or '') else 'out'
+        return 'transfer_in' if direction == 'in' else 'transfer_out'
+    return None
+
+def transaction_balance_deltas(added: List[dict] = (), removed: List[dict] = ()) -> Dict[str, dict]:
+    """Net per-account $inc deltas for a set of inserted and removed transactions"""
+    deltas: Dict[str, dict] = {}
+    for txns, sign in ((added, 1), (removed, -1)):
+        for txn in txns:
+            account_id = txn.get('account_id', txn.get('accountId'))
+            kind = transaction_balance_kind(txn)
+            if not account_id or not kind:
+                continue
+            account_deltas = deltas.setdefault(account_id, {})
+            account_deltas[kind] = account_deltas.get(kind, 0) + sign * (txn.get('amount') or 0)
+    return deltas
+
+async def apply_transaction_deltas(user_email: str, added: List[dict] = (), removed: List[dict] = ()):
+    """Incrementally update the account_balances and monthly_rollups materializations after transaction writes.
+
+    Only existing balance rows are updated: accounts without one are seeded from
+    full history the next time their balance is read.
+    """
+    deltas = await write_transaction_deltas(user_email, added, removed)
+    await publish_transaction_changes(user_email, added, removed, list(deltas))
+
+async def write_transaction_deltas(user_email: str, added: List[dict] = (), removed: List[dict] = (),
+                                   session=None) -> Dict[str, dict]:
+    """The materialization writes of apply_transaction_deltas; returns the per-account deltas.
+
+    Takes a session so they can join the transaction that writes `added`/`removed`.
+    """
+    await apply_rollup_deltas(user_email, added, removed, session=session)
+    deltas = transaction_balance_deltas(added, removed)
+    now = storage_date(datetime.now(timezone.utc))
+    operations = [
+        UpdateOne(
+            {"user_email": user_email, "account_id": account_id},
+            {"$inc": account_deltas, "$set": {"updated_at": now}}
+        )
+        for account_id, account_deltas in deltas.items()
+        if any(account_deltas.values())
+    ]
+    if operations:
+        await db.account_balances.bulk_write(operations, ordered=False, session=session)
+    return deltas
+
+async def publish_transaction_changes(user_email: str, added: List[dict], removed: List[dict], account_ids: List[str]):
+    """Search index and data version updates for committed transaction writes"""
+    search_indexes.remove(user_email, "transactions", [txn['id'] for txn in removed if txn.get('id')])
+    search_indexes.add(user_email, "transactions", added)
+    # Bumped once balances are written, so a sync at this version sees them
+    added_ids = [txn['id'] for txn in added if txn.get('id')]
+    await bump_data_version(
+        user_email,
+        changed={"transactions": added_ids, "accounts": account_ids},
+        deleted={"transactions": [txn['id'] for txn in removed if txn.get('id') and txn['id'] not in added_ids]}
+    )
+
+async def init_account_balance(user_email: str, account_id: str):
+    """Create an empty balance row for a new account"""
+    await db.account_balances.update_one(
+        {"user_email": user_email, "account_id": account_id},
+        {"$setOnInsert": {**empty_balance_totals(), "updated_at": storage_date(datetime.now(timezone.utc))}},
+        upsert=True
+    )
+
+async def attach_account_balances(user_email: str, accounts: List[dict]) -> List[dict]:
+    """Set current_balance on each account from the account_balances materialization.
+
+    Every account has a balance row (init_account_balance, imports and the
+    startup backfill create them); a missing one reads as no movements.
+    """
+    account_ids = [acc.get('id') for acc in accounts]
+    rows = await db.account_balances.find(
+        {"user_email": user_email, "account_id": {"$in": account_ids}}, {"_id": 0}
+    ).to_list(None)
+    totals = {row['account_id']: row for row in rows}
+
+    for acc in accounts:
+        acc_totals = totals.get(acc.get('id'), empty_balance_totals())
+        acc['current_balance'] = balance_from_totals(acc.get('initial_balance', acc.get('initialBalance', 0)), acc_totals)
+    return accounts
+
+BALANCE_BACKFILL_ID = "account_balances_backfill"
+
+async def backfill_account_balances() -> int:
+    """Create the balance rows of accounts that predate the materialization, once.
+
+    Runs at startup, before this worker serves requests; returns the rows created.
+    Seeding on read raced with concurrent transaction writes (their deltas are
+    no-ops until the row exists), so it is done here instead.
+    """
+    if await db.migrations.find_one({"_id": BALANCE_BACKFILL_ID, "done": True}):
+        return 0
+    created = 0
+    now = storage_date(datetime.now(timezone.utc))
+    for user_email in await db.accounts.distinct("user_email"):
+        account_ids = [
+            acc['id'] for acc in await db.accounts.find({"user_email": user_email}, {"_id": 0, "id": 1}).to_list(None)
+            if acc.get('id')
+        ]
+        existing = set(await db.account_balances.distinct(
+            "account_id", {"user_email": user_email, "account_id": {"$in": account_ids}}
+        ))
+        missing = [account_id for account_id in account_ids if account_id not in existing]
+        if not missing:
+            continue
+        computed = await compute_account_totals(user_email, missing)
+        for account_id in missing:
+            result = await db.account_balances.update_one(
+                {"user_email": user_email, "account_id": account_id},
+                {"$setOnInsert": {**computed.get(account_id, empty_balance_totals()), "updated_at": now}},
+                upsert=True
+            )
+            created += 1 if result.upserted_id else 0
+    await db.migrations.update_one(
+        {"_id": BALANCE_BACKFILL_ID},
+        {"$set": {"done": True, "created": created, "finished_at": datetime.now(timezone.utc)}},
+        upsert=True
+    )
+    if created:
+        logger.info(f"Backfilled {created} account balance rows")
+    return created
+
+# Products, shopping lists and bank connections were stored without an owner
+# before they were scoped per user
+UNOWNED_COLLECTIONS = ("products", "shopping_lists", "bank_connections")
+OWNER_BACKFILL_ID = "document_owner_backfill"
+
+async def claim_unowned_documents(user_email: str, collection_names=UNOWNED_COLLECTIONS) -> Dict[str, int]:
+    """Assign documents stored without a user_email to `user_email`; returns the count per collection"""
+    claimed = {}
+    for name in collection_names:
+        result = await db[name].update_many({"user_email": None}, {"$set": {"user_email": user_email}})
+        claimed[name] = result.modified_count
+    return claimed
+
+async def backfill_document_owners() -> Dict[str, int]:
+    """Give unowned products, shopping lists and bank connections an owner, once.
+
+    Bank connections go to the owner of their linked account. If a single
+    user owns accounts, everything else goes to them; otherwise the rest
+    stays hidden until `manage.py claim-unowned --user EMAIL` assigns it.
+    """
+    if await db.migrations.find_one({"_id": OWNER_BACKFILL_ID, "done": True}):
+        return {}
+    claimed = {name: 0 for name in UNOWNED_COLLECTIONS}
+    async for connection in db.bank_connections.find(
+        {"user_email": None, "account_id": {"$ne": None}}, {"_id": 1, "account_id": 1}
+    ):
+        account = await db.accounts.find_one({"id": connection['account_id']}, {"_id": 0, "user_email": 1})
+        if account and account.get('user_email'):
+            await db.bank_connections.update_one({"_id": connection['_id']}, {"$set": {"user_email": account['user_email']}})
+            claimed["bank_connections"] += 1
+    owners = await db.accounts.distinct("user_email")
+    if len(owners) == 1:
+        for name, count in (await claim_unowned_documents(owners[0])).items():
+            claimed[name] += count
+    remaining = {name: await db[name].count_documents({"user_email": None}) for name in UNOWNED_COLLECTIONS}
+    if any(remaining.values()):
+        logger.warning(f"Documents without an owner (assign with manage.py claim-unowned): {remaining}")
+    await db.migrations.update_one(
+        {"_id": OWNER_BACKFILL_ID},
+        {"$set": {"done": True, "claimed": claimed, "finished_at": datetime.now(timezone.utc)}},
+        upsert=True
+    )
+    return claimed
+
+async def rebuild_account_balances(user_email: str, repair: bool = True) -> dict:
+    """Replay transaction history for a user and compare it with the materialized balances.
+
+    Returns the accounts whose stored totals drifted; with repair=True they are overwritten.
+    """
+    accounts = await db.accounts.find({"user_email": user_email}, {"_id": 0, "id": 1}).to_list(None)
+    account_ids = [acc['id'] for acc in accounts if acc.get('id')]
+    computed = await compute_account_totals(user_email)
+    stored = {
+        row['account_id']: row
+        for row in await db.account_balances.find({"user_email": user_email}, {"_id": 0}).to_list(None)
+    }
+
+    drifted = []
+    now = storage_date(datetime.now(timezone.utc))
+    operations = []
+    for account_id in account_ids:
+        expected = computed.get(account_id, empty_balance_totals())
+        current = stored.get(account_id)
+        if current is None or any(abs(current.get(f, 0) - expected[f]) > 1e-6 for f in BALANCE_TOTAL_FIELDS):
+            drifted.append({
+                "account_id": account_id,
+                "stored": {f: current.get(f, 0) for f in BALANCE_TOTAL_FIELDS} if current else None,
+                "expected": expected
+            })
+            operations.append(ReplaceOne(
+                {"user_email": user_email, "account_id": account_id},
+                {"user_email": user_email, "account_id": account_id, **expected, "updated_at": now},
+                upsert=True
+            ))
+
+    # Balance rows for accounts that no longer exist
+    orphaned = [account_id for account_id in stored if account_id not in account_ids]
+
+    if repair:
+        if operations:
+            await db.account_balances.bulk_write(operations, ordered=False)
+        if orphaned:
+            await db.account_balances.delete_many({"user_email": user_email, "account_id": {"$in": orphaned}})
+
+    return {
+        "user_email": user_email,
+        "accounts": len(account_ids),
+        "drifted": drifted,
+        "orphaned": orphaned,
+        "repaired": repair
+    }
+
+
+# ============================================================================
+# MONTHLY ROLLUPS
+# ============================================================================
+# monthly_rollups holds one row per (user, account, month, type, category) with
+# the summed amount and row count; the dashboard reads these instead of
+# rescanning transactions. rollup_status marks users whose rows were built from
+# full history at ROLLUP_VERSION (see ensure_monthly_rollups).
+#
+# Rebuilds run in a transaction, so concurrent $inc deltas either conflict and
+# are retried or land on the rebuilt rows. Without transactions, writers count
+# their deltas in rollup_status.writes and the rebuild repeats while that
+# counter moves underneath it.
+ROLLUP_VERSION = 2  # 2: months of offset-aware ISO strings are UTC months, as for native dates
+ROLLUP_REBUILD_ATTEMPTS = 5
+
+def transaction_month(value) -> Optional[str]:
+    """YYYY-MM a stored transaction date falls in, in UTC whichever form it was stored in"""
+    if not isinstance(value, (str, datetime)):
+        return None
+    try:
+        return parse_stored_date(value).astimezone(timezone.utc).strftime("%Y-%m")
+    except ValueError:
+        return value[:7] if len(value) >= 7 else None
+
+def rollup_deltas(added: List[dict] = (), removed: List[dict] = ()) -> Dict[tuple, dict]:
+    """Net (account, month, type, category) -> {total, count} deltas for transaction writes"""
+    deltas: Dict[tuple, dict] = {}
+    for txns, sign in ((added, 1), (removed, -1)):
+        for txn in txns:
+            month = transaction_month(txn.get('date'))
+            if not month or not txn.get('type'):
+                continue
+            key = (txn.get('account_id', txn.get('accountId')), month, txn['type'], txn.get('category'))
+            delta = deltas.setdefault(key, {"total": 0, "count": 0})
+            delta["total"] += sign * (txn.get('amount') or 0)
+            delta["count"] += sign
+    return deltas
+
+async def apply_rollup_deltas(user_email: str, added: List[dict] = (), removed: List[dict] = (), session=None):
+    """Incrementally update monthly_rollups after transaction writes"""
+    operations = [
+        UpdateOne(
+            {"user_email": user_email, "account_id": account_id, "month": month, "type": txn_type, "category": category},
+            {"$inc": delta},
+            upsert=True
+        )
+        for (account_id, month, txn_type, category), delta in rollup_deltas(added, removed).items()
+        if delta["count"] or delta["total"]
+    ]
+    if operations:
+        await db.monthly_rollups.bulk_write(operations, ordered=False, session=session)
+    if removed:
+        await db.monthly_rollups.delete_many({"user_email": user_email, "count": {"$lte": 0}}, session=session)
+    if operations and mongo_transactions_supported is False:
+        # Tells a rebuild running without a transaction that it may have missed this write
+        await db.rollup_status.update_one({"user_email": user_email}, {"$inc": {"writes": 1}})
+
+async def rebuild_monthly_rollups(user_email: str) -> int:
+    """Recompute a user's monthly_rollups from full transaction history; returns the row count"""
+    async def rebuild(session):
+        # Months computed by rollup_deltas itself, so rebuilt rows and later deltas share keys
+        txns = await db.transactions.find(
+            {"user_email": user_email, "type": {"$ne": None}},
+            {"_id": 0, "account_id": 1, "accountId": 1, "date": 1, "type": 1, "category": 1, "amount": 1},
+            session=session
+        ).to_list(None)
+        rows = [
+            {"user_email": user_email, "account_id": account_id, "month": month, "type": txn_type,
+             "category": category, **delta}
+            for (account_id, month, txn_type, category), delta in rollup_deltas(txns).items()
+        ]
+        await db.monthly_rollups.delete_many({"user_email": user_email}, session=session)
+        if rows:
+            await db.monthly_rollups.insert_many(rows, session=session)
+        return rows
+
+    for attempt in range(1, ROLLUP_REBUILD_ATTEMPTS + 1):
+        status = await db.rollup_status.find_one_and_update(
+            {"user_email": user_email}, {"$setOnInsert": {"writes": 0}},
+            upsert=True, return_document=ReturnDocument.AFTER
+        )
+        rows = await run_in_transaction(rebuild)
+        if mongo_transactions_supported is not False:
+            break
+        # No transaction: a delta written during the rebuild may be missing or counted twice
+        current = await db.rollup_status.find_one({"user_email": user_email}, {"_id": 0, "writes": 1})
+        if current.get('writes', 0) == status.get('writes', 0):
+            break
+        logger.info(f"Transactions written during the rollup rebuild for {user_email}, rebuilding (attempt {attempt})")
+    else:
+        logger.warning(f"Rollups for {user_email} kept changing during {ROLLUP_REBUILD_ATTEMPTS} rebuilds; "
+                       "they may drift until the next rebuild")
+    await db.rollup_status.update_one(
+        {"user_email": user_email},
+        {"$set": {"rebuilt_at": storage_date(datetime.now(timezone.utc)), "version": ROLLUP_VERSION}}
+    )
+    return len(rows)
+
+async def ensure_monthly_rollups(user_email: str):
+    """Build a user's rollups from history the first time they are read, or after ROLLUP_VERSION changes"""
+    if not await db.rollup_status.find_one({"user_email": user_email, "version": ROLLUP_VERSION}, {"_id": 1}):
+        await rebuild_monthly_rollups(user_email)
+
+
+# ============================================================================
+# SCHEMA MIGRATIONS
+# ============================================================================
+SCHEMA_VERSION = 1
+MIGRATION_BATCH_SIZE = 500
+
+# Collection -> (camelCase field map, model); camelCase names that are model
+# aliases win over their snake_case twin, matching how the API read them so far
+SCHEMA_COLLECTIONS = {
+    "accounts": (ACCOUNT_FIELD_MAP, Account),
+    "transactions": (TRANSACTION_FIELD_MAP, Transaction),
+    "investments": (INVESTMENT_FIELD_MAP, Investment),
+    "goals": (GOAL_FIELD_MAP, Goal),
+    "debts": (DEBT_FIELD_MAP, Debt),
+    "receivables": (RECEIVABLE_FIELD_MAP, Receivable),
+}
+
+def schema_migration_id(collection_name: str) -> str:
+    return f"schema_v{SCHEMA_VERSION}:{collection_name}"
+
+def normalize_document(collection_name: str, doc: dict) -> dict:
+    """Update spec rewriting one stored document to snake_case at SCHEMA_VERSION"""
+    field_map, model = SCHEMA_COLLECTIONS[collection_name]
+    aliases = {f.alias for f in model.model_fields.values() if f.alias}
+    set_fields, unset_fields = {"schema_version": SCHEMA_VERSION}, {}
+    for camel, snake in field_map.items():
+        if camel not in doc:
+            continue
+        if snake not in doc or camel in aliases:
+            set_fields[snake] = doc[camel]
+        unset_fields[camel] = ""
+    if collection_name == "transactions" and doc.get('type') == 'transfer' and not doc.get('transfer_direction'):
+        set_fields['transfer_direction'] = 'in' if transaction_balance_kind(doc) == 'transfer_in' else 'out'
+    update = {"$set": set_fields}
+    if unset_fields:
+        update["$unset"] = unset_fields
+    return update
+
+async def load_migration_state():
+    """Remember which collections the schema migration has fully normalized"""
+    done = await db.migrations.find(
+        {"_id": {"$in": [schema_migration_id(name) for name in SCHEMA_COLLECTIONS]}, "done": True}
+    ).to_list(None)
+    normalized_collections.clear()
+    normalized_collections.update(state['collection'] for state in done)
+
+    converted = await db.migrations.find(
+        {"_id": {"$in": [date_migration_id(name) for name in DATE_FIELDS]}, "done": True}
+    ).to_list(None)
+    native_date_collections.clear()
+    native_date_collections.update(state['collection'] for state in converted)
+
+async def migrate_schema(collection_name: str, batch_size: int = MIGRATION_BATCH_SIZE, progress=None) -> dict:
+    """Rewrite a collection to snake_case in bulk batches.
+
+    Progress is checkpointed in db.migrations after every batch, so an
+    interrupted run resumes where it stopped.
+    """
+    migration_id = schema_migration_id(collection_name)
+    state = await db.migrations.find_one({"_id": migration_id}) or {}
+    if state.get('done'):
+        return state
+    last_id = state.get('last_id')
+    migrated = state.get('migrated', 0)
+    collection = db[collection_name]
+
+    while True:
+        query = {"schema_version": {"$not": {"$gte": SCHEMA_VERSION}}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = await collection.find(query).sort("_id", ASCENDING).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+        await collection.bulk_write(
+            [UpdateOne({"_id": doc['_id']}, normalize_document(collection_name, doc)) for doc in batch],
+            ordered=False
+        )
+        last_id = batch[-1]['_id']
+        migrated += len(batch)
+        await db.migrations.update_one(
+            {"_id": migration_id},
+            {"$set": {"collection": collection_name, "last_id": last_id, "migrated": migrated,
+                      "updated_at": storage_date(datetime.now(timezone.utc))}},
+            upsert=True
+        )
+        if progress:
+            progress(collection_name, migrated)
+
+    state = {"collection": collection_name, "migrated": migrated, "done": True,
+             "updated_at": storage_date(datetime.now(timezone.utc))}
+    await db.migrations.update_one({"_id": migration_id}, {"$set": state}, upsert=True)
+    normalized_collections.add(collection_name)
+    return state
+
+# Collection -> stored date fields; "list.field" names a date inside an array of subdocuments
+DATE_FIELDS = {
+    "accounts": ("created_at",),
+    "transactions": ("date", "created_at", "recurring_next_date"),
+    "investments": ("created_at", "purchase_date", "operations.date"),
+    "goals": ("created_at", "deadline"),
+    "debts": ("created_at", "due_date", "payments.date"),
+    "receivables": ("created_at", "due_date", "payments.date"),
+    "tasks": ("created_at", "due_date"),
+    "products": ("created_at", "last_purchased_date", "purchase_history.date"),
+    "categories": ("created_at",),
+    "payees": ("created_at",),
+    "shopping_lists": ("created_at",),
+    "bank_connections": ("created_at", "last_sync"),
+    "preferences": ("created_at", "updated_at"),
+    "import_jobs": ("created_at", "updated_at", "finished_at"),
+}
+
+def date_migration_id(collection_name: str) -> str:
+    return f"native_dates:{collection_name}"
+
+def native_date_fields(collection_name: str, doc: dict) -> dict:
+    """$set spec replacing a document's ISO-string dates with datetimes.
+
+    Strings that don't parse are left untouched.
+    """
+    def convert(value):
+        try:
+            return parse_stored_date(value)
+        except ValueError:
+            return value
+
+    set_fields = {}
+    for path in DATE_FIELDS.get(collection_name, ()):
+        field, _, nested = path.partition('.')
+        value = doc.get(field)
+        if not nested:
+            if isinstance(value, str):
+                set_fields[field] = convert(value)
+        elif isinstance(value, list) and any(isinstance(item, dict) and isinstance(item.get(nested), str) for item in value):
+            set_fields[field] = [
+                {**item, nested: convert(item[nested])}
+                if isinstance(item, dict) and isinstance(item.get(nested), str) else item
+                for item in value
+            ]
+    return set_fields
+
+async def migrate_dates(collection_name: str, batch_size: int = MIGRATION_BATCH_SIZE, progress=None) -> dict:
+    """Convert a collection's ISO-string dates to BSON datetimes in bulk batches.
+
+    Requires DATE_STORAGE=native so the API stops writing new strings
+    meanwhile. Checkpointed in db.migrations like migrate_schema.
+    """
+    if DATE_STORAGE != 'native':
+        raise RuntimeError("Set DATE_STORAGE=native before converting stored dates")
+    migration_id = date_migration_id(collection_name)
+    state = await db.migrations.find_one({"_id": migration_id}) or {}
+    if state.get('done'):
+        return state
+    last_id = state.get('last_id')
+    migrated = state.get('migrated', 0)
+    collection = db[collection_name]
+    has_string_date = {"$or": [{path: {"$type": "string"}} for path in DATE_FIELDS[collection_name]]}
+
+    while True:
+        query = dict(has_string_date)
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        projection = {path.partition('.')[0]: 1 for path in DATE_FIELDS[collection_name]}
+        batch = await collection.find(query, projection).sort("_id", ASCENDING).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+        operations = []
+        for doc in batch:
+            set_fields = native_date_fields(collection_name, doc)
+            if set_fields:
+                operations.append(UpdateOne({"_id": doc['_id']}, {"$set": set_fields}))
+        if operations:
+            await collection.bulk_write(operations, ordered=False)
+        last_id = batch[-1]['_id']
+        migrated += len(operations)
+        await db.migrations.update_one(
+            {"_id": migration_id},
+            {"$set": {"collection": collection_name, "last_id": last_id, "migrated": migrated,
+                      "updated_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+        if progress:
+            progress(collection_name, migrated)
+
+    state = {"collection": collection_name, "migrated": migrated, "done": True,
+             "updated_at": datetime.now(timezone.utc)}
+    await db.migrations.update_one({"_id": migration_id}, {"$set": state}, upsert=True)
+    native_date_collections.add(collection_name)
+    return state
+
+
 # ============================================================================
 # API ROUTES - ACCOUNTS
 # ============================================================================
@@ -600,9 +1514,12 @@ async def create_account(input: AccountCreate, request: Request):
     
     account = Account(**input.model_dump(), current_balance=input.initial_balance)
     doc = account.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
+    doc['created_at'] = storage_date(doc['created_at'])
     doc['user_email'] = user_email  # Add user ownership
     await db.accounts.insert_one(doc)
+    await init_account_balance(user_email, account.id)
+    search_indexes.add(user_email, "accounts", [doc])
+    await bump_data_version(user_email, changed={"accounts": [doc['id']]})
     return account
 
 @api_router.get("/accounts", response_model=List[Account])
@@ -611,34 +1528,16 @@ async def get_accounts(request: Request):
     query = {"user_email": user['email']} if user else {"user_email": "anonymous"}
     
     accounts = await db.accounts.find(query, {"_id": 0}).to_list(1000)
-    
-    # Calculate current balance for each account based on transactions
+
     for acc in accounts:
         # Convert camelCase to snake_case
-        acc = convert_camel_to_snake(acc, ACCOUNT_FIELD_MAP)
-        
+        acc = convert_legacy_fields(acc, "accounts", ACCOUNT_FIELD_MAP)
+
         # Handle dates
-        acc = convert_dates_from_string(acc, ['created_at'])
-        
-        # Get all transactions for this account
-        account_id = acc.get('id')
-        transactions = await db.transactions.find({
-            "user_email": query["user_email"],
-            "$or": [
-                {"account_id": account_id},
-                {"accountId": account_id}
-            ]
-        }, {"_id": 0}).to_list(None)
-        
-        # Calculate balance: initial_balance + income - expenses
-        initial_balance = acc.get('initial_balance', 0)
-        income = sum(t.get('amount', 0) for t in transactions if t.get('type') == 'income')
-        expenses = sum(t.get('amount', 0) for t in transactions if t.get('type') == 'expense')
-        
-        # Update current_balance with calculated value
-        acc['current_balance'] = initial_balance + income - expenses
-    
-    return accounts
+        acc = convert_stored_dates(acc, "accounts", ['created_at'])
+
+    # Calculate current balance for all accounts in one aggregation
+    return await attach_account_balances(query["user_email"], accounts)
 
 @api_router.get("/accounts/{account_id}", response_model=Account)
 async def get_account(account_id: str, request: Request):
@@ -650,6 +1549,7 @@ async def get_account(account_id: str, request: Request):
         raise HTTPException(status_code=404, detail="Account not found")
     if isinstance(account.get('created_at'), str):
         account['created_at'] = datetime.fromisoformat(account['created_at'])
+    await attach_account_balances(user_email, [account])
     return account
 
 @api_router.put("/accounts/{account_id}", response_model=Account)
@@ -663,8 +1563,10 @@ async def update_account(account_id: str, input: AccountCreate, request: Request
     
     update_data = input.model_dump()
     result = await db.accounts.update_one({"id": account_id, "user_email": user_email}, {"$set": update_data})
+    await bump_data_version(user_email, changed={"accounts": [account_id]})
     
     updated = await db.accounts.find_one({"id": account_id}, {"_id": 0})
+    search_indexes.add(user_email, "accounts", [updated])
     if isinstance(updated.get('created_at'), str):
         updated['created_at'] = datetime.fromisoformat(updated['created_at'])
     return updated
@@ -677,6 +1579,9 @@ async def delete_account(account_id: str, request: Request):
     result = await db.accounts.delete_one({"id": account_id, "user_email": user_email})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Account not found")
+    await db.account_balances.delete_one({"account_id": account_id, "user_email": user_email})
+    search_indexes.remove(user_email, "accounts", [account_id])
+    await bump_data_version(user_email, deleted={"accounts": [account_id]})
     return {"message": "Account deleted successfully"}
 
 @api_router.post("/accounts/transfer")
@@ -698,43 +1603,25 @@ async def transfer_between_accounts(
     if not from_account or not to_account:
         raise HTTPException(status_code=404, detail="Account not found")
     
-    # Update balances
-    new_from_balance = from_account['current_balance'] - amount
-    await db.accounts.update_one(
-        {"id": from_account_id, "user_email": user_email},
-        {"$set": {"current_balance": new_from_balance}}
-    )
-    
     # If currencies are different, convert
-    converted_amount = amount
-    if from_account['currency'] != to_account['currency']:
-        # Simple conversion for now - in production, use real API
-        conversion_rates = {
-            "EUR_USD": 1.10, "USD_EUR": 0.91,
-            "EUR_CHF": 0.95, "CHF_EUR": 1.05,
-            "USD_CHF": 0.86, "CHF_USD": 1.16,
-            "BTC_USD": 45000, "USD_BTC": 1/45000,
-            "BTC_EUR": 41000, "EUR_BTC": 1/41000,
-        }
-        pair = f"{from_account['currency']}_{to_account['currency']}"
-        rate = conversion_rates.get(pair, 1.0)
-        converted_amount = amount * rate
-    
-    new_to_balance = to_account['current_balance'] + converted_amount
-    await db.accounts.update_one(
-        {"id": to_account_id, "user_email": user_email},
-        {"$set": {"current_balance": new_to_balance}}
-    )
+    try:
+        rate = await rate_provider.rate(from_account['currency'], to_account['currency'])
+    except KeyError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"No exchange rate from {from_account['currency']} to {to_account['currency']}"
+        )
+    converted_amount = amount * rate
     
-    # Create transaction records
-    from datetime import datetime, timezone
-    now = datetime.now(timezone.utc).isoformat()
+    # Create transaction records (balances are derived from them by the balance engine)
+    now = storage_date(datetime.now(timezone.utc))
     
     # Outgoing transaction
-    await db.transactions.insert_one({
+    outgoing = {
         "id": str(uuid.uuid4()),
         "account_id": from_account_id,
         "type": "transfer",
+        "transfer_direction": "out",
         "amount": amount,
         "category": "Transfer",
         "description": f"{description} (to {to_account['name']})",
@@ -742,13 +1629,14 @@ async def transfer_between_accounts(
         "to_account_id": to_account_id,
         "user_email": user_email,
         "created_at": now
-    })
+    }
     
     # Incoming transaction
-    await db.transactions.insert_one({
+    incoming = {
         "id": str(uuid.uuid4()),
         "account_id": to_account_id,
         "type": "transfer",
+        "transfer_direction": "in",
         "amount": converted_amount,
         "category": "Transfer",
         "description": f"{description} (from {from_account['name']})",
@@ -756,7 +1644,20 @@ async def transfer_between_accounts(
         "to_account_id": from_account_id,
         "user_email": user_email,
         "created_at": now
-    })
+    }
+    
+    # Both legs and their balance updates commit together (see run_in_transaction)
+    async def write_transfer(session):
+        await db.transactions.insert_many([outgoing, incoming], session=session)
+        return await write_transaction_deltas(user_email, added=[outgoing, incoming], session=session)
+    
+    deltas = await run_in_transaction(write_transfer)
+    await publish_transaction_changes(user_email, [outgoing, incoming], [], list(deltas))
+    
+    # Read resulting balances from the balance engine
+    await attach_account_balances(user_email, [from_account, to_account])
+    from_balance = from_account['current_balance']
+    to_balance = to_account['current_balance']
     
     return {
         "message": "Transfer successful",
@@ -764,27 +1665,20 @@ async def transfer_between_accounts(
         "to_account": to_account['name'],
         "amount": amount,
         "converted_amount": converted_amount,
+        "rate": rate,
         "from_currency": from_account['currency'],
-        "to_currency": to_account['currency']
+        "to_currency": to_account['currency'],
+        "from_balance": from_balance,
+        "to_balance": to_balance
     }
 
 @api_router.get("/currency/rates")
 async def get_currency_rates(base: str = "EUR"):
-    """Get current exchange rates"""
-    # In production, use a real API like frankfurter or exchangerate-api
-    rates = {
-        "EUR": 1.0,
-        "USD": 1.10,
-        "CHF": 0.95,
-        "GBP": 0.86,
-        "BTC": 0.000024,  # 1 EUR = 0.000024 BTC
-        "ETH": 0.00044
-    }
-    
-    if base != "EUR":
-        # Convert all rates to the new base
-        base_rate = rates.get(base, 1.0)
-        rates = {k: v / base_rate for k, v in rates.items()}
+    """Get current exchange rates (1 `base` = rate units of each currency)"""
+    try:
+        rates = await rate_provider.table(base)
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Unknown currency {base}")
     
     return {"base": base, "rates": rates, "timestamp": datetime.now(timezone.utc).isoformat()}
 
@@ -793,9 +1687,18 @@ async def get_currency_rates(base: str = "EUR"):
 # API ROUTES - TRANSACTIONS
 # ============================================================================
 @api_router.post("/transactions", response_model=Transaction)
-async def create_transaction(input: TransactionCreate, request: Request):
+async def create_transaction(input: TransactionCreate, request: Request, response: Response):
+    """Create a transaction.
+
+    Send an `Idempotency-Key` header to make retries safe: a repeated key
+    returns the transaction created by the first request (with an
+    `Idempotent-Replayed: true` header) instead of creating another.
+    """
     user = await get_current_user(request, db)
     user_email = user['email'] if user else 'anonymous'
+    idempotency_key = request.headers.get('Idempotency-Key')
+    if idempotency_key is not None and not 0 < len(idempotency_key) <= 255:
+        raise HTTPException(status_code=400, detail="Idempotency-Key must be 1 to 255 characters")
     
     # Log authentication status and input data for debugging
     logger.info(f"Creating transaction - User: {user_email}, Has Cookie: {request.cookies.get('session_token') is not None}")
@@ -803,52 +1706,322 @@ async def create_transaction(input: TransactionCreate, request: Request):
     
     transaction = Transaction(**input.model_dump())
     doc = transaction.model_dump()
-    doc['date'] = doc['date'].isoformat()
-    doc['created_at'] = doc['created_at'].isoformat()
+    doc['date'] = storage_date(doc['date'])
+    doc['created_at'] = storage_date(doc['created_at'])
     doc['user_email'] = user_email  # Add user ownership
+    if idempotency_key:
+        doc['idempotency_key'] = idempotency_key
     
-    # Check for duplicate (same id, user_email, and created_at within 1 second)
-    existing = await db.transactions.find_one({
-        "id": doc['id'],
-        "user_email": user_email
-    })
-    
-    if existing:
-        logger.warning(f"Duplicate transaction detected: {doc['id']} for user {user_email}")
-        # Return existing transaction instead of creating duplicate
-        return Transaction(**{**existing, '_id': str(existing.get('_id'))})
-    
-    await db.transactions.insert_one(doc)
+    # A retried request hits the unique (user_email, idempotency_key) index
+    try:
+        await db.transactions.insert_one(doc)
+    except DuplicateKeyError:
+        existing = await db.transactions.find_one(
+            {"user_email": user_email, "idempotency_key": idempotency_key}, {"_id": 0}
+        ) if idempotency_key else None
+        if not existing:
+            raise
+        logger.warning(f"Duplicate transaction request {idempotency_key} for user {user_email}, returning {existing['id']}")
+        response.headers["Idempotent-Replayed"] = "true"
+        return Transaction(**existing)
+    await apply_transaction_deltas(user_email, added=[doc])
     logger.info(f"Transaction created successfully: {doc['id']} for user {user_email}")
     return transaction
 
-@api_router.get("/transactions", response_model=List[Transaction])
+# Batch writes: one auth lookup, one dedupe query and one write per batch.
+# Each item gets a result {index, status, id, error}; status is one of
+# created, replayed, updated, deleted, not_found, invalid or failed.
+TRANSACTION_BATCH_MAX_ITEMS = int(os.environ.get('TRANSACTION_BATCH_MAX_ITEMS', 500))
+
+def check_batch_size(count: int):
+    if count > TRANSACTION_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {TRANSACTION_BATCH_MAX_ITEMS} items per batch")
+
+def validate_batch_items(items: List[Dict[str, Any]], model: type, results: List[dict],
+                         unique: Optional[str] = None) -> List[tuple]:
+    """(index, item) for the items `model` accepts; the others are recorded as invalid.
+
+    With `unique`, an item repeating an earlier item's value of that field is invalid too.
+    """
+    valid, seen = [], set()
+    for index, item in enumerate(items):
+        try:
+            parsed = model.model_validate(item)
+        except ValidationError as e:
+            error = "; ".join(f"{'.'.join(map(str, err['loc'])) or 'item'}: {err['msg']}" for err in e.errors())
+            results.append({"index": index, "status": "invalid", "error": error})
+            continue
+        if unique:
+            value = getattr(parsed, unique)
+            if value in seen:
+                results.append({"index": index, "status": "invalid", "error": f"{unique}: repeated in the batch"})
+                continue
+            seen.add(value)
+        valid.append((index, parsed))
+    return valid
+
+def batch_summary(results: List[dict]) -> dict:
+    results.sort(key=lambda result: result['index'])
+    counts: Dict[str, int] = {}
+    for result in results:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+    return {"results": results, "counts": counts}
+
+@api_router.post("/transactions/batch")
+async def create_transactions_batch(input: TransactionBatch, request: Request):
+    """Create up to TRANSACTION_BATCH_MAX_ITEMS transactions.
+
+    Items carrying an `idempotency_key` already used by this user (or
+    earlier in the batch) are not created again and report `replayed` with
+    the existing id.
+    """
+    check_batch_size(len(input.items))
+    user = await get_current_user(request, db)
+    user_email = user['email'] if user else 'anonymous'
+    
+    results = []
+    valid = validate_batch_items(input.items, TransactionBatchCreateItem, results)
+    keys = [item.idempotency_key for _, item in valid if item.idempotency_key]
+    existing = {}
+    if keys:
+        async for txn in db.transactions.find(
+            {"user_email": user_email, "idempotency_key": {"$in": keys}}, {"_id": 0, "id": 1, "idempotency_key": 1}
+        ):
+            existing[txn['idempotency_key']] = txn['id']
+    
+    docs, doc_indexes = [], []
+    for index, item in valid:
+        key = item.idempotency_key
+        if key in existing:
+            results.append({"index": index, "status": "replayed", "id": existing[key]})
+            continue
+        doc = Transaction(**item.model_dump(exclude={"idempotency_key"})).model_dump()
+        doc['date'] = storage_date(doc['date'])
+        doc['created_at'] = storage_date(doc['created_at'])
+        doc['user_email'] = user_email
+        if key:
+            doc['idempotency_key'] = key
+            existing[key] = doc['id']
+        docs.append(doc)
+        doc_indexes.append(index)
+    
+    inserted = await insert_transaction_batches(docs, TRANSACTION_BATCH_MAX_ITEMS)
+    inserted_ids = {doc['id'] for doc in inserted}
+    # Rows rejected by the idempotency index lost a race with a concurrent request
+    raced = [doc['idempotency_key'] for doc in docs if doc['id'] not in inserted_ids and doc.get('idempotency_key')]
+    if raced:
+        async for txn in db.transactions.find(
+            {"user_email": user_email, "idempotency_key": {"$in": raced}}, {"_id": 0, "id": 1, "idempotency_key": 1}
+        ):
+            existing[txn['idempotency_key']] = txn['id']
+    for index, doc in zip(doc_indexes, docs):
+        if doc['id'] in inserted_ids:
+            results.append({"index": index, "status": "created", "id": doc['id']})
+        elif doc.get('idempotency_key') in raced and existing[doc['idempotency_key']] != doc['id']:
+            results.append({"index": index, "status": "replayed", "id": existing[doc['idempotency_key']]})
+        else:
+            results.append({"index": index, "status": "failed", "error": "Not inserted"})
+    
+    if inserted:
+        await apply_transaction_deltas(user_email, added=inserted)
+    logger.info(f"Batch created {len(inserted)} of {len(input.items)} transactions for user {user_email}")
+    return batch_summary(results)
+
+@api_router.put("/transactions/batch")
+async def update_transactions_batch(input: TransactionBatch, request: Request):
+    """Replace up to TRANSACTION_BATCH_MAX_ITEMS transactions, each item being a TransactionCreate plus its `id`"""
+    check_batch_size(len(input.items))
+    user = await get_current_user(request, db)
+    user_email = user['email'] if user else 'anonymous'
+    
+    results = []
+    # One item per id, so the outcome never depends on write order
+    valid = validate_batch_items(input.items, TransactionBatchUpdateItem, results, unique="id")
+    changes = {}
+    for _, item in valid:
+        changes[item.id] = item.model_dump(exclude={"id"})
+        changes[item.id]['date'] = storage_date(changes[item.id]['date'])
+    
+    async def update(session):
+        if session is None:
+            # Without a transaction, take each pre-image from its own write so
+            # concurrent updates never reverse the same version twice
+            return await gather_queries({
+                txn_id: db.transactions.find_one_and_update(
+                    {"id": txn_id, "user_email": user_email}, {"$set": update_data},
+                    projection={"_id": 0}, return_document=ReturnDocument.BEFORE
+                )
+                for txn_id, update_data in changes.items()
+            })
+        found = await db.transactions.find(
+            {"user_email": user_email, "id": {"$in": list(changes)}}, {"_id": 0}, session=session
+        ).to_list(None)
+        if found:
+            await db.transactions.bulk_write([
+                UpdateOne({"id": txn['id'], "user_email": user_email}, {"$set": changes[txn['id']]})
+                for txn in found
+            ], ordered=False, session=session)
+        return {txn['id']: txn for txn in found}
+    
+    previous = await run_in_transaction(update) if changes else {}
+    for index, item in valid:
+        status = "updated" if previous.get(item.id) else "not_found"
+        results.append({"index": index, "status": status, "id": item.id})
+    
+    replaced = [txn for txn in previous.values() if txn]
+    if replaced:
+        await apply_transaction_deltas(
+            user_email, added=[{**txn, **changes[txn['id']]} for txn in replaced], removed=replaced
+        )
+    return batch_summary(results)
+
+@api_router.delete("/transactions/batch")
+async def delete_transactions_batch(input: TransactionBatchDelete, request: Request):
+    """Delete up to TRANSACTION_BATCH_MAX_ITEMS transactions by id"""
+    check_batch_size(len(input.ids))
+    user = await get_current_user(request, db)
+    user_email = user['email'] if user else 'anonymous'
+    
+    async def delete(session):
+        if session is None:
+            # Without a transaction a row found here may be deleted concurrently before delete_many;
+            # find_one_and_delete hands each row to exactly one caller
+            deleted = await gather_queries({
+                txn_id: db.transactions.find_one_and_delete({"user_email": user_email, "id": txn_id}, {"_id": 0})
+                for txn_id in input.ids
+            })
+            return [txn for txn in deleted.values() if txn]
+        found = await db.transactions.find(
+            {"user_email": user_email, "id": {"$in": input.ids}}, {"_id": 0}, session=session
+        ).to_list(None)
+        await db.transactions.delete_many(
+            {"user_email": user_email, "id": {"$in": [txn['id'] for txn in found]}}, session=session
+        )
+        return found
+    
+    # Concurrent deletes of the same rows must reverse their balances once
+    deleted = await run_in_transaction(delete)
+    deleted_ids = {txn['id'] for txn in deleted}
+    results = [
+        {"index": index, "status": "deleted" if txn_id in deleted_ids else "not_found", "id": txn_id}
+        for index, txn_id in enumerate(input.ids)
+    ]
+    if deleted:
+        await apply_transaction_deltas(user_email, removed=deleted)
+    return batch_summary(results)
+
+TRANSACTION_PAGE_SIZE = 100
+
+@api_router.get("/transactions", response_model=Union[List[Transaction], TransactionPage])
 async def get_transactions(
     request: Request,
     account_id: Optional[str] = None,
     type: Optional[TransactionType] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    category: Optional[List[str]] = Query(default=None),
+    tags: Optional[List[str]] = Query(default=None),
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    fields: Optional[str] = None,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    page_size: Optional[int] = Query(default=None, ge=1, le=1000),
     limit: int = Query(default=10000, le=50000)
 ):
+    """Transactions newest first, as a plain list of up to `limit` rows.
+
+    Passing `page_size`, `after` or `before` returns TransactionPage pages
+    instead, paginated with (date, id) keyset cursors (100 rows by default).
+    All filters run in MongoDB: `date_from`/`date_to` are inclusive days,
+    `category` and `tags` may be repeated (any of), and `fields=id,date,amount`
+    restricts the returned columns.
+    """
     user = await get_current_user(request, db)
     query = {"user_email": user['email']} if user else {"user_email": "anonymous"}
     
     if account_id:
-        query["account_id"] = account_id
-        # Also check camelCase version
-        if not await db.transactions.count_documents(query):
-            query["accountId"] = account_id
-            del query["account_id"]
+        query.setdefault("$and", []).append(account_filter(account_id))
     if type:
         query["type"] = type
-    
-    transactions = await db.transactions.find(query, {"_id": 0}).sort("date", -1).limit(limit).to_list(limit)
-    for txn in transactions:
-        # Convert camelCase to snake_case for backward compatibility
-        txn = convert_camel_to_snake(txn, TRANSACTION_FIELD_MAP)
-        
-        # Handle dates
-        txn = convert_dates_from_string(txn, ['date', 'created_at', 'recurring_next_date'])
-    return transactions
+    date_filter = date_range_filter("date", date_from, date_to)
+    if date_filter:
+        query.setdefault("$and", []).append(date_filter)
+    if category:
+        query["category"] = {"$in": category}
+    if tags:
+        query["tags"] = {"$in": tags}
+    if min_amount is not None or max_amount is not None:
+        query["amount"] = {}
+        if min_amount is not None:
+            query["amount"]["$gte"] = min_amount
+        if max_amount is not None:
+            query["amount"]["$lte"] = max_amount
+    
+    requested_fields = None
+    projection = {"_id": 0}
+    if fields:
+        requested_fields, projection = projection_for_fields(fields, Transaction, TRANSACTION_FIELD_MAP)
+        # Cursors are built from (date, id)
+        projection.update({"date": 1, "id": 1})
+    
+    def prepare(txns: List[dict]) -> List[dict]:
+        for txn in txns:
+            # Convert camelCase to snake_case for backward compatibility
+            convert_legacy_fields(txn, "transactions", TRANSACTION_FIELD_MAP)
+            
+            # Handle dates
+            convert_stored_dates(txn, "transactions", ['date', 'created_at', 'recurring_next_date'])
+        if requested_fields is not None:
+            txns = [{f: txn[f] for f in requested_fields if f in txn} for txn in txns]
+        return txns
+    
+    if page_size is None and not after and not before:
+        transactions = await db.transactions.find(query, projection).sort("date", -1).limit(limit).to_list(limit)
+        transactions = prepare(transactions)
+        # Partial rows can't be validated against the Transaction model
+        return JSONResponse(jsonable_encoder(transactions)) if requested_fields is not None else transactions
+    
+    if after and before:
+        raise HTTPException(status_code=400, detail="Use either after or before, not both")
+    page_size = page_size or TRANSACTION_PAGE_SIZE
+    
+    # Keyset pagination on (date, id): seek past the cursor instead of skipping rows
+    direction = -1
+    if after or before:
+        cursor_date, cursor_id = decode_cursor(after or before)
+        op = "$lt" if after else "$gt"
+        seek = [
+            {"date": {op: cursor_date}},
+            {"date": cursor_date, "id": {op: cursor_id}}
+        ]
+        if "transactions" not in native_date_collections:
+            # Mid-conversion rows hold both forms, and BSON sorts every string before every date
+            if after and isinstance(cursor_date, datetime):
+                seek.append({"date": {"$type": "string"}})
+            elif before and isinstance(cursor_date, str):
+                seek.append({"date": {"$type": "date"}})
+        query.setdefault("$and", []).append({"$or": seek})
+        if before:
+            direction = 1
+    
+    transactions = await db.transactions.find(query, projection) \
+        .sort([("date", direction), ("id", direction)]).limit(page_size + 1).to_list(page_size + 1)
+    has_more = len(transactions) > page_size
+    transactions = transactions[:page_size]
+    if before:
+        transactions.reverse()
+    
+    next_cursor = prev_cursor = None
+    if transactions:
+        first, last = transactions[0], transactions[-1]
+        if (has_more and not before) or before:
+            next_cursor = encode_cursor(last.get('date'), last.get('id'))
+        if (has_more and before) or after:
+            prev_cursor = encode_cursor(first.get('date'), first.get('id'))
+    
+    page = {"items": prepare(transactions), "next_cursor": next_cursor, "prev_cursor": prev_cursor}
+    return JSONResponse(jsonable_encoder(page)) if requested_fields is not None else page
 
 @api_router.get("/transactions/{transaction_id}", response_model=Transaction)
 async def get_transaction(transaction_id: str):
@@ -866,18 +2039,21 @@ async def update_transaction(transaction_id: str, input: TransactionCreate, requ
     user = await get_current_user(request, db)
     user_email = user['email'] if user else 'anonymous'
     
-    transaction = await db.transactions.find_one({"id": transaction_id, "user_email": user_email}, {"_id": 0})
-    if not transaction:
-        raise HTTPException(status_code=404, detail="Transaction not found")
-    
     update_data = input.model_dump()
-    update_data['date'] = update_data['date'].isoformat()
-    result = await db.transactions.update_one(
-        {"id": transaction_id, "user_email": user_email}, 
-        {"$set": update_data}
+    update_data['date'] = storage_date(update_data['date'])
+    # The pre-image comes from the write itself: concurrent updates each reverse
+    # the version they replaced, never the same one twice
+    transaction = await db.transactions.find_one_and_update(
+        {"id": transaction_id, "user_email": user_email},
+        {"$set": update_data},
+        projection={"_id": 0},
+        return_document=ReturnDocument.BEFORE
     )
+    if not transaction:
+        raise HTTPException(status_code=404, detail="Transaction not found")
     
-    updated = await db.transactions.find_one({"id": transaction_id}, {"_id": 0})
+    updated = {**transaction, **update_data}
+    await apply_transaction_deltas(user_email, added=[updated], removed=[transaction])
     if isinstance(updated.get('date'), str):
         updated['date'] = datetime.fromisoformat(updated['date'])
     if isinstance(updated.get('created_at'), str):
@@ -886,9 +2062,10 @@ async def update_transaction(transaction_id: str, input: TransactionCreate, requ
 
 @api_router.delete("/transactions/{transaction_id}")
 async def delete_transaction(transaction_id: str):
-    result = await db.transactions.delete_one({"id": transaction_id})
-    if result.deleted_count == 0:
+    deleted = await db.transactions.find_one_and_delete({"id": transaction_id}, {"_id": 0})
+    if not deleted:
         raise HTTPException(status_code=404, detail="Transaction not found")
+    await apply_transaction_deltas(deleted.get('user_email', 'anonymous'), removed=[deleted])
     return {"message": "Transaction deleted successfully"}
 
 
@@ -902,9 +2079,11 @@ async def create_investment(input: InvestmentCreate, request: Request):
     
     investment = Investment(**input.model_dump())
     doc = investment.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
+    doc['created_at'] = storage_date(doc['created_at'])
     doc['user_email'] = user_email
     await db.investments.insert_one(doc)
+    search_indexes.add(user_email, "investments", [doc])
+    await bump_data_version(user_email, changed={"investments": [doc['id']]})
     return investment
 
 @api_router.get("/investments", response_model=List[Investment])
@@ -915,17 +2094,17 @@ async def get_investments(request: Request):
     investments = await db.investments.find(query, {"_id": 0}).to_list(1000)
     for inv in investments:
         # Convert camelCase to snake_case for backward compatibility
-        inv = convert_camel_to_snake(inv, INVESTMENT_FIELD_MAP)
+        inv = convert_legacy_fields(inv, "investments", INVESTMENT_FIELD_MAP)
         
         # CRITICAL FIX: Add symbol if missing (old data compatibility)
         if 'symbol' not in inv or inv['symbol'] is None:
             inv['symbol'] = ""
         
         # Handle dates
-        inv = convert_dates_from_string(inv, ['created_at', 'purchase_date'])
+        inv = convert_stored_dates(inv, "investments", ['created_at', 'purchase_date'])
         
         for op in inv.get('operations', []):
-            op = convert_dates_from_string(op, ['date'])
+            op = convert_stored_dates(op, "investments", ['date'])
     return investments
 
 @api_router.post("/investments/{investment_id}/operations", response_model=Investment)
@@ -945,7 +2124,7 @@ async def add_investment_operation(investment_id: str, input: InvestmentOperatio
     )
     
     operation_dict = operation.model_dump()
-    operation_dict['date'] = operation_dict['date'].isoformat()
+    operation_dict['date'] = storage_date(operation_dict['date'])
     
     # Add operation to array
     await db.investments.update_one(
@@ -1083,6 +2262,8 @@ async def add_investment_operation(investment_id: str, input: InvestmentOperatio
                 "current_price": current_value
             }}
         )
+    # Bumped once the totals are written, so a sync at this version sees them
+    await bump_data_version(investment.get('user_email', 'anonymous'), changed={"investments": [investment_id]})
     
     # Get final updated investment
     updated = await db.investments.find_one({"id": investment_id}, {"_id": 0})
@@ -1109,14 +2290,16 @@ async def update_investment(investment_id: str, input: InvestmentUpdate, request
     if 'operations' in update_data:
         for op in update_data['operations']:
             if isinstance(op.get('date'), datetime):
-                op['date'] = op['date'].isoformat()
+                op['date'] = storage_date(op['date'])
     
     result = await db.investments.update_one(
         {"id": investment_id, "user_email": user_email}, 
         {"$set": update_data}
     )
+    await bump_data_version(user_email, changed={"investments": [investment_id]})
     
     updated = await db.investments.find_one({"id": investment_id}, {"_id": 0})
+    search_indexes.add(user_email, "investments", [updated])
     if isinstance(updated.get('created_at'), str):
         updated['created_at'] = datetime.fromisoformat(updated['created_at'])
     for op in updated.get('operations', []):
@@ -1147,13 +2330,14 @@ async def update_investment_operation(investment_id: str, operation_index: int,
     )
     
     operation_dict = operation.model_dump()
-    operation_dict['date'] = operation_dict['date'].isoformat()
+    operation_dict['date'] = storage_date(operation_dict['date'])
     
     # Update the specific operation
     await db.investments.update_one(
         {"id": investment_id, "user_email": user_email},
         {"$set": {f"operations.{operation_index}": operation_dict}}
     )
+    await bump_data_version(user_email, changed={"investments": [investment_id]})
     
     updated = await db.investments.find_one({"id": investment_id}, {"_id": 0})
     if isinstance(updated.get('created_at'), str):
@@ -1183,14 +2367,17 @@ async def delete_investment_operation(investment_id: str, operation_index: int,
         {"id": investment_id, "user_email": user_email},
         {"$set": {"operations": operations}}
     )
+    await bump_data_version(user_email, changed={"investments": [investment_id]})
     
     return {"message": "Operation deleted successfully"}
 
 @api_router.delete("/investments/{investment_id}")
 async def delete_investment(investment_id: str):
-    result = await db.investments.delete_one({"id": investment_id})
-    if result.deleted_count == 0:
+    deleted = await db.investments.find_one_and_delete({"id": investment_id}, {"_id": 0, "user_email": 1})
+    if not deleted:
         raise HTTPException(status_code=404, detail="Investment not found")
+    search_indexes.remove(deleted.get('user_email', 'anonymous'), "investments", [investment_id])
+    await bump_data_version(deleted.get('user_email', 'anonymous'), deleted={"investments": [investment_id]})
     return {"message": "Investment deleted successfully"}
 
 
@@ -1204,9 +2391,11 @@ async def create_category(input: CategoryCreate, request: Request):
     
     category = Category(**input.model_dump())
     doc = category.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
+    doc['created_at'] = storage_date(doc['created_at'])
     doc['user_email'] = user_email
     await db.categories.insert_one(doc)
+    search_indexes.add(user_email, "categories", [doc])
+    await bump_data_version(user_email, changed={"categories": [doc['id']]})
     return category
 
 @api_router.get("/categories", response_model=List[Category])
@@ -1239,6 +2428,8 @@ async def update_category(category_id: str, input: CategoryCreate, request: Requ
     )
     
     updated = await db.categories.find_one({"id": category_id}, {"_id": 0})
+    search_indexes.add(user_email, "categories", [updated])
+    await bump_data_version(user_email, changed={"categories": [category_id]})
     if isinstance(updated.get('created_at'), str):
         updated['created_at'] = datetime.fromisoformat(updated['created_at'])
     return updated
@@ -1251,6 +2442,8 @@ async def delete_category(category_id: str, request: Request):
     result = await db.categories.delete_one({"id": category_id, "user_email": user_email})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Category not found")
+    search_indexes.remove(user_email, "categories", [category_id])
+    await bump_data_version(user_email, deleted={"categories": [category_id]})
     return {"message": "Category deleted successfully"}
 
 
@@ -1264,7 +2457,7 @@ async def create_payee(input: PayeeCreate, request: Request):
     
     payee = Payee(**input.model_dump())
     doc = payee.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
+    doc['created_at'] = storage_date(doc['created_at'])
     doc['user_email'] = user_email
     await db.payees.insert_one(doc)
     return payee
@@ -1321,9 +2514,9 @@ async def create_task(input: TaskCreate, request: Request):
     
     task = Task(**input.model_dump())
     doc = task.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
+    doc['created_at'] = storage_date(doc['created_at'])
     if doc.get('due_date'):
-        doc['due_date'] = doc['due_date'].isoformat()
+        doc['due_date'] = storage_date(doc['due_date'])
     doc['user_email'] = user_email
     await db.tasks.insert_one(doc)
     return task
@@ -1357,7 +2550,7 @@ async def update_task(task_id: str, input: TaskCreate, request: Request):
     
     update_data = input.model_dump()
     if update_data.get('due_date'):
-        update_data['due_date'] = update_data['due_date'].isoformat()
+        update_data['due_date'] = storage_date(update_data['due_date'])
     
     result = await db.tasks.update_one(
         {"id": task_id, "user_email": user_email}, 
@@ -1429,8 +2622,8 @@ async def get_preferences(request: Request):
         default_prefs = UserPreferences()
         doc = default_prefs.model_dump()
         doc['user_email'] = user_email
-        doc['created_at'] = doc['created_at'].isoformat()
-        doc['updated_at'] = doc['updated_at'].isoformat()
+        doc['created_at'] = storage_date(doc['created_at'])
+        doc['updated_at'] = storage_date(doc['updated_at'])
         await db.preferences.insert_one(doc)
         return default_prefs
     
@@ -1451,11 +2644,11 @@ async def update_preferences(input: UserPreferencesUpdate, request: Request):
         default_prefs = UserPreferences()
         prefs = default_prefs.model_dump()
         prefs['user_email'] = user_email
-        prefs['created_at'] = datetime.now(timezone.utc).isoformat()
+        prefs['created_at'] = storage_date(datetime.now(timezone.utc))
     
     # Update with new values
     update_data = {k: v for k, v in input.model_dump().items() if v is not None}
-    update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
+    update_data['updated_at'] = storage_date(datetime.now(timezone.utc))
     
     await db.preferences.update_one(
         {"user_email": user_email},
@@ -1481,11 +2674,13 @@ async def create_goal(input: GoalCreate, request: Request):
     
     goal = Goal(**input.model_dump())
     doc = goal.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
+    doc['created_at'] = storage_date(doc['created_at'])
     if doc.get('deadline'):
-        doc['deadline'] = doc['deadline'].isoformat()
+        doc['deadline'] = storage_date(doc['deadline'])
     doc['user_email'] = user_email
     await db.goals.insert_one(doc)
+    search_indexes.add(user_email, "goals", [doc])
+    await bump_data_version(user_email, changed={"goals": [doc['id']]})
     return goal
 
 @api_router.get("/goals", response_model=List[Goal])
@@ -1496,10 +2691,10 @@ async def get_goals(request: Request):
     goals = await db.goals.find(query, {"_id": 0}).to_list(1000)
     for goal in goals:
         # Convert camelCase to snake_case
-        goal = convert_camel_to_snake(goal, GOAL_FIELD_MAP)
+        goal = convert_legacy_fields(goal, "goals", GOAL_FIELD_MAP)
         
         # Handle dates
-        goal = convert_dates_from_string(goal, ['created_at', 'deadline'])
+        goal = convert_stored_dates(goal, "goals", ['created_at', 'deadline'])
     return goals
 
 @api_router.put("/goals/{goal_id}", response_model=Goal)
@@ -1509,13 +2704,15 @@ async def update_goal(goal_id: str, input: GoalCreate, request: Request):
     
     update_data = input.model_dump()
     if update_data.get('deadline'):
-        update_data['deadline'] = update_data['deadline'].isoformat()
+        update_data['deadline'] = storage_date(update_data['deadline'])
     
     result = await db.goals.update_one({"id": goal_id, "user_email": user_email}, {"$set": update_data})
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Goal not found")
+    await bump_data_version(user_email, changed={"goals": [goal_id]})
     
     updated = await db.goals.find_one({"id": goal_id}, {"_id": 0})
+    search_indexes.add(user_email, "goals", [updated])
     if isinstance(updated.get('created_at'), str):
         updated['created_at'] = datetime.fromisoformat(updated['created_at'])
     if updated.get('deadline') and isinstance(updated.get('deadline'), str):
@@ -1524,9 +2721,11 @@ async def update_goal(goal_id: str, input: GoalCreate, request: Request):
 
 @api_router.delete("/goals/{goal_id}")
 async def delete_goal(goal_id: str):
-    result = await db.goals.delete_one({"id": goal_id})
-    if result.deleted_count == 0:
+    deleted = await db.goals.find_one_and_delete({"id": goal_id}, {"_id": 0, "user_email": 1})
+    if not deleted:
         raise HTTPException(status_code=404, detail="Goal not found")
+    search_indexes.remove(deleted.get('user_email', 'anonymous'), "goals", [goal_id])
+    await bump_data_version(deleted.get('user_email', 'anonymous'), deleted={"goals": [goal_id]})
     return {"message": "Goal deleted successfully"}
 
 
@@ -1540,21 +2739,17 @@ async def create_debt(input: DebtCreate, request: Request):
     
     debt = Debt(**input.model_dump())
     doc = debt.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
+    doc['created_at'] = storage_date(doc['created_at'])
     if doc.get('due_date'):
-        doc['due_date'] = doc['due_date'].isoformat()
+        doc['due_date'] = storage_date(doc['due_date'])
     doc['user_email'] = user_email
     
-    # Initialize remaining_amount = total_amount if not set (support both camelCase and snake_case)
-    total = doc.get('total_amount') or doc.get('totalAmount', 0)
-    if 'remaining_amount' not in doc and 'remainingAmount' not in doc:
-        doc['remainingAmount'] = total  # Use camelCase for debts (has alias)
-        doc['remaining_amount'] = total
-    elif doc.get('remaining_amount') is None and doc.get('remainingAmount') is None:
-        doc['remainingAmount'] = total
-        doc['remaining_amount'] = total
+    # Initialize remaining_amount = total_amount if not set
+    if doc.get('remaining_amount') is None:
+        doc['remaining_amount'] = doc.get('total_amount') or 0
     
     await db.debts.insert_one(doc)
+    await bump_data_version(user_email, changed={"debts": [doc['id']]})
     return debt
 
 @api_router.get("/debts", response_model=List[Debt])
@@ -1565,7 +2760,7 @@ async def get_debts(request: Request):
     debts = await db.debts.find(query, {"_id": 0}).to_list(1000)
     for debt in debts:
         # Convert camelCase to snake_case
-        debt = convert_camel_to_snake(debt, DEBT_FIELD_MAP)
+        debt = convert_legacy_fields(debt, "debts", DEBT_FIELD_MAP)
         
         # Handle old history format to new payments format
         if 'history' in debt and not debt.get('payments'):
@@ -1584,11 +2779,11 @@ async def get_debts(request: Request):
             debt['interest_rate'] = 0
         
         # Handle dates
-        debt = convert_dates_from_string(debt, ['created_at', 'due_date'])
+        debt = convert_stored_dates(debt, "debts", ['created_at', 'due_date'])
         
         # Convert dates in payments
         for payment in debt.get('payments', []):
-            payment = convert_dates_from_string(payment, ['date'])
+            payment = convert_stored_dates(payment, "debts", ['date'])
     return debts
 
 @api_router.put("/debts/{debt_id}", response_model=Debt)
@@ -1603,19 +2798,23 @@ async def update_debt(debt_id: str, input: DebtCreate, request: Request):
     
     update_data = input.model_dump()
     if update_data.get('due_date'):
-        update_data['due_date'] = update_data['due_date'].isoformat()
+        update_data['due_date'] = storage_date(update_data['due_date'])
     
     # Recalculate remaining_amount if total_amount changed
     payments = existing_debt.get('payments', [])
     total_paid = sum(p.get('amount', 0) for p in payments)
     new_total = update_data.get('total_amount', existing_debt.get('total_amount', existing_debt.get('totalAmount', 0)))
     update_data['remaining_amount'] = new_total - total_paid
-    # Also update camelCase field for database compatibility
-    update_data['remainingAmount'] = new_total - total_paid
     
-    result = await db.debts.update_one({"id": debt_id, "user_email": user_email}, {"$set": update_data})
+    # Drop stale camelCase twins: they would win over snake_case through the model aliases
+    update = {"$set": update_data}
+    unset = camel_unset(DEBT_FIELD_MAP, update_data)
+    if unset:
+        update["$unset"] = unset
+    result = await db.debts.update_one({"id": debt_id, "user_email": user_email}, update)
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Debt not found")
+    await bump_data_version(user_email, changed={"debts": [debt_id]})
     
     updated = await db.debts.find_one({"id": debt_id}, {"_id": 0})
     if isinstance(updated.get('created_at'), str):
@@ -1626,9 +2825,10 @@ async def update_debt(debt_id: str, input: DebtCreate, request: Request):
 
 @api_router.delete("/debts/{debt_id}")
 async def delete_debt(debt_id: str):
-    result = await db.debts.delete_one({"id": debt_id})
-    if result.deleted_count == 0:
+    deleted = await db.debts.find_one_and_delete({"id": debt_id}, {"_id": 0, "user_email": 1})
+    if not deleted:
         raise HTTPException(status_code=404, detail="Debt not found")
+    await bump_data_version(deleted.get('user_email', 'anonymous'), deleted={"debts": [debt_id]})
     return {"message": "Debt deleted successfully"}
 
 @api_router.post("/debts/{debt_id}/payments", response_model=Debt)
@@ -1651,7 +2851,7 @@ async def add_debt_payment(debt_id: str, input: DebtPaymentCreate, request: Requ
     )
     
     payment_dict = payment.model_dump()
-    payment_dict['date'] = payment_dict['date'].isoformat()
+    payment_dict['date'] = storage_date(payment_dict['date'])
     
     # First add the payment
     await db.debts.update_one(
@@ -1667,22 +2867,25 @@ async def add_debt_payment(debt_id: str, input: DebtPaymentCreate, request: Requ
     
     await db.debts.update_one(
         {"id": debt_id, "user_email": user_email},
-        {"$set": {"remainingAmount": new_remaining}}  # Use camelCase for database
+        {"$set": {"remaining_amount": new_remaining}, "$unset": {"remainingAmount": ""}}
     )
+    await bump_data_version(user_email, changed={"debts": [debt_id]})
     
     # Create linked transaction if account_id exists
     if debt.get('account_id'):
-        await db.transactions.insert_one({
+        payment_txn = {
             "id": str(uuid.uuid4()),
             "account_id": debt['account_id'],
             "type": "expense",
             "amount": input.amount,
             "category": "Debt Payment",
             "description": f"Payment for {debt['name']}",
-            "date": input.date.isoformat(),
+            "date": storage_date(input.date),
             "user_email": user_email,
-            "created_at": datetime.now(timezone.utc).isoformat()
-        })
+            "created_at": storage_date(datetime.now(timezone.utc))
+        }
+        await db.transactions.insert_one(payment_txn)
+        await apply_transaction_deltas(user_email, added=[payment_txn])
     
     updated = await db.debts.find_one({"id": debt_id}, {"_id": 0})
     if isinstance(updated.get('created_at'), str):
@@ -1708,7 +2911,7 @@ async def update_debt_payment(debt_id: str, payment_index: int, input: DebtPayme
     
     payment = DebtPayment(date=input.date, amount=input.amount, notes=input.notes)
     payment_dict = payment.model_dump()
-    payment_dict['date'] = payment_dict['date'].isoformat()
+    payment_dict['date'] = storage_date(payment_dict['date'])
     
     # Update the payment
     await db.debts.update_one(
@@ -1725,8 +2928,9 @@ async def update_debt_payment(debt_id: str, payment_index: int, input: DebtPayme
     
     await db.debts.update_one(
         {"id": debt_id},
-        {"$set": {"remainingAmount": new_remaining}}
+        {"$set": {"remaining_amount": new_remaining}, "$unset": {"remainingAmount": ""}}
     )
+    await bump_data_version(user_email, changed={"debts": [debt_id]})
     
     # Return final updated debt
     updated = await db.debts.find_one({"id": debt_id}, {"_id": 0})
@@ -1761,8 +2965,9 @@ async def delete_debt_payment(debt_id: str, payment_index: int, request: Request
     
     await db.debts.update_one(
         {"id": debt_id, "user_email": user_email},
-        {"$set": {"payments": payments, "remainingAmount": new_remaining}}
+        {"$set": {"payments": payments, "remaining_amount": new_remaining}, "$unset": {"remainingAmount": ""}}
     )
+    await bump_data_version(user_email, changed={"debts": [debt_id]})
     
     return {"message": "Payment deleted successfully"}
 
@@ -1777,9 +2982,9 @@ async def create_receivable(input: ReceivableCreate, request: Request):
     
     receivable = Receivable(**input.model_dump())
     doc = receivable.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
+    doc['created_at'] = storage_date(doc['created_at'])
     if doc.get('due_date'):
-        doc['due_date'] = doc['due_date'].isoformat()
+        doc['due_date'] = storage_date(doc['due_date'])
     doc['user_email'] = user_email
     
     # Initialize remaining_amount = total_amount if not set
@@ -1787,6 +2992,7 @@ async def create_receivable(input: ReceivableCreate, request: Request):
         doc['remaining_amount'] = doc.get('total_amount', 0)
     
     await db.receivables.insert_one(doc)
+    await bump_data_version(user_email, changed={"receivables": [doc['id']]})
     return receivable
 
 @api_router.get("/receivables", response_model=List[Receivable])
@@ -1797,7 +3003,7 @@ async def get_receivables(request: Request):
     receivables = await db.receivables.find(query, {"_id": 0}).to_list(1000)
     for rec in receivables:
         # Convert camelCase to snake_case
-        rec = convert_camel_to_snake(rec, RECEIVABLE_FIELD_MAP)
+        rec = convert_legacy_fields(rec, "receivables", RECEIVABLE_FIELD_MAP)
         
         # Ensure amounts have defaults
         if 'total_amount' not in rec:
@@ -1806,11 +3012,11 @@ async def get_receivables(request: Request):
             rec['remaining_amount'] = rec.get('total_amount', 0)
         
         # Handle dates
-        rec = convert_dates_from_string(rec, ['created_at', 'due_date'])
+        rec = convert_stored_dates(rec, "receivables", ['created_at', 'due_date'])
         
         # Handle payments dates
         for payment in rec.get('payments', []):
-            payment = convert_dates_from_string(payment, ['date'])
+            payment = convert_stored_dates(payment, "receivables", ['date'])
     return receivables
 
 @api_router.put("/receivables/{receivable_id}", response_model=Receivable)
@@ -1825,7 +3031,7 @@ async def update_receivable(receivable_id: str, input: ReceivableCreate, request
     
     update_data = input.model_dump()
     if update_data.get('due_date'):
-        update_data['due_date'] = update_data['due_date'].isoformat()
+        update_data['due_date'] = storage_date(update_data['due_date'])
     
     # Recalculate remaining_amount if total_amount changed
     payments = existing_receivable.get('payments', [])
@@ -1836,6 +3042,7 @@ async def update_receivable(receivable_id: str, input: ReceivableCreate, request
     result = await db.receivables.update_one({"id": receivable_id, "user_email": user_email}, {"$set": update_data})
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Receivable not found")
+    await bump_data_version(user_email, changed={"receivables": [receivable_id]})
     
     updated = await db.receivables.find_one({"id": receivable_id}, {"_id": 0})
     if isinstance(updated.get('created_at'), str):
@@ -1856,6 +3063,7 @@ async def delete_receivable(receivable_id: str, request: Request):
     result = await db.receivables.delete_one({"id": receivable_id, "user_email": user_email})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Receivable not found")
+    await bump_data_version(user_email, deleted={"receivables": [receivable_id]})
     return {"message": "Receivable deleted successfully"}
 
 @api_router.post("/receivables/{receivable_id}/payments", response_model=Receivable)
@@ -1873,7 +3081,7 @@ async def add_receivable_payment(receivable_id: str, input: ReceivablePaymentCre
     
     payment = ReceivablePayment(date=input.date, amount=input.amount, notes=input.notes)
     payment_dict = payment.model_dump()
-    payment_dict['date'] = payment_dict['date'].isoformat()
+    payment_dict['date'] = storage_date(payment_dict['date'])
     
     # First add the payment
     await db.receivables.update_one(
@@ -1891,20 +3099,23 @@ async def add_receivable_payment(receivable_id: str, input: ReceivablePaymentCre
         {"id": receivable_id, "user_email": user_email},
         {"$set": {"remaining_amount": new_remaining}}  # Use snake_case for receivables (no aliases)
     )
+    await bump_data_version(user_email, changed={"receivables": [receivable_id]})
     
     # Create linked transaction if account_id exists
     if receivable.get('account_id'):
-        await db.transactions.insert_one({
+        payment_txn = {
             "id": str(uuid.uuid4()),
             "account_id": receivable['account_id'],
             "type": "income",
             "amount": input.amount,
             "category": "Receivable Payment",
             "description": f"Payment for {receivable['name']}",
-            "date": input.date.isoformat(),
+            "date": storage_date(input.date),
             "user_email": user_email,
-            "created_at": datetime.now(timezone.utc).isoformat()
-        })
+            "created_at": storage_date(datetime.now(timezone.utc))
+        }
+        await db.transactions.insert_one(payment_txn)
+        await apply_transaction_deltas(user_email, added=[payment_txn])
     
     updated = await db.receivables.find_one({"id": receivable_id}, {"_id": 0})
     if isinstance(updated.get('created_at'), str):
@@ -1930,7 +3141,7 @@ async def update_receivable_payment(receivable_id: str, payment_index: int, inpu
     
     payment = ReceivablePayment(date=input.date, amount=input.amount, notes=input.notes)
     payment_dict = payment.model_dump()
-    payment_dict['date'] = payment_dict['date'].isoformat()
+    payment_dict['date'] = storage_date(payment_dict['date'])
     
     # Update the payment
     await db.receivables.update_one(
@@ -1949,6 +3160,7 @@ async def update_receivable_payment(receivable_id: str, payment_index: int, inpu
         {"id": receivable_id},
         {"$set": {"remaining_amount": new_remaining}}
     )
+    await bump_data_version(user_email, changed={"receivables": [receivable_id]})
     
     # Return final updated receivable
     updated = await db.receivables.find_one({"id": receivable_id}, {"_id": 0})
@@ -1985,6 +3197,7 @@ async def delete_receivable_payment(receivable_id: str, payment_index: int, requ
         {"id": receivable_id, "user_email": user_email},
         {"$set": {"payments": payments, "remaining_amount": new_remaining}}
     )
+    await bump_data_version(user_email, changed={"receivables": [receivable_id]})
     
     return {"message": "Payment deleted successfully"}
 
@@ -1993,18 +3206,25 @@ async def delete_receivable_payment(receivable_id: str, payment_index: int, requ
 # API ROUTES - SHOPPING/PRODUCTS
 # ============================================================================
 @api_router.post("/products", response_model=Product)
-async def create_product(input: ProductCreate):
+async def create_product(input: ProductCreate, request: Request):
+    user = await get_current_user(request, db)
+    user_email = user['email'] if user else 'anonymous'
+    
     product = Product(**input.model_dump())
     doc = product.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
+    doc['created_at'] = storage_date(doc['created_at'])
     if doc.get('last_purchased_date'):
-        doc['last_purchased_date'] = doc['last_purchased_date'].isoformat()
+        doc['last_purchased_date'] = storage_date(doc['last_purchased_date'])
+    doc['user_email'] = user_email
     await db.products.insert_one(doc)
+    search_indexes.add(user_email, "products", [doc])
+    await bump_data_version(user_email, changed={"products": [doc['id']]})
     return product
 
 @api_router.get("/products", response_model=List[Product])
-async def get_products(category: Optional[str] = None):
-    query = {}
+async def get_products(request: Request, category: Optional[str] = None):
+    user = await get_current_user(request, db)
+    query = {"user_email": user['email']} if user else {"user_email": "anonymous"}
     if category:
         query["category"] = category
     
@@ -2017,16 +3237,21 @@ async def get_products(category: Optional[str] = None):
     return products
 
 @api_router.put("/products/{product_id}", response_model=Product)
-async def update_product(product_id: str, input: ProductCreate):
+async def update_product(product_id: str, input: ProductCreate, request: Request):
+    user = await get_current_user(request, db)
+    user_email = user['email'] if user else 'anonymous'
+    
     update_data = input.model_dump()
     if update_data.get('last_purchased_date'):
-        update_data['last_purchased_date'] = update_data['last_purchased_date'].isoformat()
+        update_data['last_purchased_date'] = storage_date(update_data['last_purchased_date'])
     
-    result = await db.products.update_one({"id": product_id}, {"$set": update_data})
+    result = await db.products.update_one({"id": product_id, "user_email": user_email}, {"$set": update_data})
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    updated = await db.products.find_one({"id": product_id}, {"_id": 0})
+    updated = await db.products.find_one({"id": product_id, "user_email": user_email}, {"_id": 0})
+    search_indexes.add(user_email, "products", [updated])
+    await bump_data_version(user_email, changed={"products": [product_id]})
     if isinstance(updated.get('created_at'), str):
         updated['created_at'] = datetime.fromisoformat(updated['created_at'])
     if updated.get('last_purchased_date') and isinstance(updated.get('last_purchased_date'), str):
@@ -2034,23 +3259,31 @@ async def update_product(product_id: str, input: ProductCreate):
     return updated
 
 @api_router.delete("/products/{product_id}")
-async def delete_product(product_id: str):
-    result = await db.products.delete_one({"id": product_id})
+async def delete_product(product_id: str, request: Request):
+    user = await get_current_user(request, db)
+    user_email = user['email'] if user else 'anonymous'
+    
+    result = await db.products.delete_one({"id": product_id, "user_email": user_email})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Product not found")
+    search_indexes.remove(user_email, "products", [product_id])
+    await bump_data_version(user_email, deleted={"products": [product_id]})
     return {"message": "Product deleted successfully"}
 
 @api_router.post("/products/{product_id}/purchase")
-async def record_purchase(product_id: str, location: str, price: float):
+async def record_purchase(product_id: str, location: str, price: float, request: Request):
     """Record a product purchase"""
+    user = await get_current_user(request, db)
+    user_email = user['email'] if user else 'anonymous'
+    
     update_data = {
-        "last_purchased_date": datetime.now(timezone.utc).isoformat(),
+        "last_purchased_date": storage_date(datetime.now(timezone.utc)),
         "last_purchased_location": location,
         "current_price": price
     }
     
     result = await db.products.update_one(
-        {"id": product_id},
+        {"id": product_id, "user_email": user_email},
         {
             "$set": update_data,
             "$addToSet": {"locations": location}
@@ -2059,6 +3292,7 @@ async def record_purchase(product_id: str, location: str, price: float):
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Product not found")
+    await bump_data_version(user_email, changed={"products": [product_id]})
     
     return {"message": "Purchase recorded successfully"}
 
@@ -2067,24 +3301,34 @@ async def record_purchase(product_id: str, location: str, price: float):
 # API ROUTES - SHOPPING LISTS
 # ============================================================================
 @api_router.post("/shopping-lists", response_model=ShoppingList)
-async def create_shopping_list(input: ShoppingListCreate):
+async def create_shopping_list(input: ShoppingListCreate, request: Request):
+    user = await get_current_user(request, db)
+    user_email = user['email'] if user else 'anonymous'
+    
     shopping_list = ShoppingList(**input.model_dump())
     doc = shopping_list.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
+    doc['created_at'] = storage_date(doc['created_at'])
+    doc['user_email'] = user_email
     await db.shopping_lists.insert_one(doc)
     return shopping_list
 
 @api_router.get("/shopping-lists", response_model=List[ShoppingList])
-async def get_shopping_lists():
-    lists = await db.shopping_lists.find({}, {"_id": 0}).to_list(1000)
+async def get_shopping_lists(request: Request):
+    user = await get_current_user(request, db)
+    query = {"user_email": user['email']} if user else {"user_email": "anonymous"}
+    
+    lists = await db.shopping_lists.find(query, {"_id": 0}).to_list(1000)
     for lst in lists:
         if isinstance(lst.get('created_at'), str):
             lst['created_at'] = datetime.fromisoformat(lst['created_at'])
     return lists
 
 @api_router.get("/shopping-lists/{list_id}", response_model=ShoppingList)
-async def get_shopping_list(list_id: str):
-    shopping_list = await db.shopping_lists.find_one({"id": list_id}, {"_id": 0})
+async def get_shopping_list(list_id: str, request: Request):
+    user = await get_current_user(request, db)
+    user_email = user['email'] if user else 'anonymous'
+    
+    shopping_list = await db.shopping_lists.find_one({"id": list_id, "user_email": user_email}, {"_id": 0})
     if not shopping_list:
         raise HTTPException(status_code=404, detail="Shopping list not found")
     if isinstance(shopping_list.get('created_at'), str):
@@ -2092,22 +3336,28 @@ async def get_shopping_list(list_id: str):
     return shopping_list
 
 @api_router.put("/shopping-lists/{list_id}", response_model=ShoppingList)
-async def update_shopping_list(list_id: str, input: ShoppingListCreate):
+async def update_shopping_list(list_id: str, input: ShoppingListCreate, request: Request):
+    user = await get_current_user(request, db)
+    user_email = user['email'] if user else 'anonymous'
+    
     result = await db.shopping_lists.update_one(
-        {"id": list_id},
+        {"id": list_id, "user_email": user_email},
         {"$set": input.model_dump()}
     )
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Shopping list not found")
     
-    updated = await db.shopping_lists.find_one({"id": list_id}, {"_id": 0})
+    updated = await db.shopping_lists.find_one({"id": list_id, "user_email": user_email}, {"_id": 0})
     if isinstance(updated.get('created_at'), str):
         updated['created_at'] = datetime.fromisoformat(updated['created_at'])
     return updated
 
 @api_router.delete("/shopping-lists/{list_id}")
-async def delete_shopping_list(list_id: str):
-    result = await db.shopping_lists.delete_one({"id": list_id})
+async def delete_shopping_list(list_id: str, request: Request):
+    user = await get_current_user(request, db)
+    user_email = user['email'] if user else 'anonymous'
+    
+    result = await db.shopping_lists.delete_one({"id": list_id, "user_email": user_email})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Shopping list not found")
     return {"message": "Shopping list deleted successfully"}
@@ -2122,7 +3372,7 @@ async def add_item_to_list(list_id: str, product_id: str, quantity: int = 1, req
     if not shopping_list:
         raise HTTPException(status_code=404, detail="Shopping list not found")
     
-    product = await db.products.find_one({"id": product_id}, {"_id": 0})
+    product = await db.products.find_one({"id": product_id, "user_email": user_email}, {"_id": 0})
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
@@ -2172,11 +3422,13 @@ async def remove_item_from_list(list_id: str, product_id: str, request: Request
     return {"message": "Product removed from list", "item_count": len(items)}
 
 @api_router.get("/shopping-lists/{list_id}/download")
-async def download_shopping_list(list_id: str):
+async def download_shopping_list(list_id: str, request: Request):
     """Generate downloadable shopping list"""
     from fastapi.responses import PlainTextResponse
+    user = await get_current_user(request, db)
+    user_email = user['email'] if user else 'anonymous'
     
-    shopping_list = await db.shopping_lists.find_one({"id": list_id}, {"_id": 0})
+    shopping_list = await db.shopping_lists.find_one({"id": list_id, "user_email": user_email}, {"_id": 0})
     if not shopping_list:
         raise HTTPException(status_code=404, detail="Shopping list not found")
     
@@ -2198,18 +3450,25 @@ async def download_shopping_list(list_id: str):
 # API ROUTES - BANK CONNECTIONS
 # ============================================================================
 @api_router.post("/bank-connections", response_model=BankConnection)
-async def create_bank_connection(input: BankConnectionCreate):
+async def create_bank_connection(input: BankConnectionCreate, request: Request):
+    user = await get_current_user(request, db)
+    user_email = user['email'] if user else 'anonymous'
+    
     connection = BankConnection(**input.model_dump())
     doc = connection.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
+    doc['created_at'] = storage_date(doc['created_at'])
     if doc.get('last_sync'):
-        doc['last_sync'] = doc['last_sync'].isoformat()
+        doc['last_sync'] = storage_date(doc['last_sync'])
+    doc['user_email'] = user_email
     await db.bank_connections.insert_one(doc)
     return connection
 
 @api_router.get("/bank-connections", response_model=List[BankConnection])
-async def get_bank_connections():
-    connections = await db.bank_connections.find({}, {"_id": 0}).to_list(1000)
+async def get_bank_connections(request: Request):
+    user = await get_current_user(request, db)
+    query = {"user_email": user['email']} if user else {"user_email": "anonymous"}
+    
+    connections = await db.bank_connections.find(query, {"_id": 0}).to_list(1000)
     for conn in connections:
         if isinstance(conn.get('created_at'), str):
             conn['created_at'] = datetime.fromisoformat(conn['created_at'])
@@ -2218,27 +3477,133 @@ async def get_bank_connections():
     return connections
 
 @api_router.post("/bank-connections/{connection_id}/sync")
-async def sync_bank_connection(connection_id: str):
+async def sync_bank_connection(connection_id: str, request: Request):
     """Trigger bank sync - placeholder for actual bank API integration"""
-    connection = await db.bank_connections.find_one({"id": connection_id}, {"_id": 0})
+    user = await get_current_user(request, db)
+    user_email = user['email'] if user else 'anonymous'
+    
+    connection = await db.bank_connections.find_one({"id": connection_id, "user_email": user_email}, {"_id": 0})
     if not connection:
         raise HTTPException(status_code=404, detail="Bank connection not found")
     
     # Update last sync time
     await db.bank_connections.update_one(
-        {"id": connection_id},
-        {"$set": {"last_sync": datetime.now(timezone.utc).isoformat()}}
+        {"id": connection_id, "user_email": user_email},
+        {"$set": {"last_sync": storage_date(datetime.now(timezone.utc))}}
     )
     
     return {"message": "Bank sync initiated", "status": "success"}
 
+CSV_IMPORT_BATCH_SIZE = int(os.environ.get('CSV_IMPORT_BATCH_SIZE', 1000))
+CSV_IMPORT_MAX_ERRORS = 100  # row errors listed in the response; the count covers all
+
+def transaction_fingerprint(account_id: str, date_value, amount, description) -> str:
+    """Deterministic duplicate key for a bank statement line.
+
+    Dates are compared as UTC instants and amounts to the cent, so the same
+    line matches whether it was stored as an ISO string or a native date.
+    """
+    moment = parse_stored_date(date_value)
+    if isinstance(moment, datetime):
+        moment = moment.astimezone(timezone.utc).isoformat()
+    parts = [account_id or "", str(moment), f"{round(float(amount or 0), 2):.2f}", " ".join((description or "").split())]
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+def csv_row_transaction(row: Any, account_id: str) -> Transaction:
+    """Validate one statement row (signed amount, ISO date) into a Transaction"""
+    if not isinstance(row, dict):
+        raise ValueError("row must be an object")
+    amount = float(row.get('amount', 0))
+    if amount != amount or amount in (float('inf'), float('-inf')):
+        raise ValueError("amount must be a finite number")
+    date_value = row.get('date') or datetime.now(timezone.utc).isoformat()
+    return Transaction(
+        account_id=account_id,
+        type=TransactionType.expense if amount < 0 else TransactionType.income,
+        amount=abs(amount),
+        category=row.get('category') or 'Divers',
+        description=row.get('description') or 'Import bancaire',
+        date=datetime.fromisoformat(date_value) if isinstance(date_value, str) else date_value
+    )
+
+async def existing_fingerprints(user_email: str, account_id: str, dates: List[datetime]) -> set:
+    """Fingerprints of the account's unfingerprinted transactions over the span of `dates` (one query).
+
+    Rows stored with a fingerprint are de-duplicated by the unique index
+    instead; this covers manual entries and rows imported before it existed.
+    """
+    days = [parse_stored_date(d).astimezone(timezone.utc).date() for d in dates]
+    query = {"user_email": user_email, "fingerprint": {"$exists": False}, "$and": [account_filter(account_id)]}
+    date_condition = date_range_filter("date", min(days), max(days))
+    if date_condition:
+        query["$and"].append(date_condition)
+    existing = await db.transactions.find(
+        query, {"_id": 0, "date": 1, "amount": 1, "description": 1}
+    ).to_list(None)
+    return {
+        transaction_fingerprint(account_id, txn.get('date'), txn.get('amount'), txn.get('description'))
+        for txn in existing
+    }
+
+async def insert_transaction_batches(docs: List[dict], batch_size: int = CSV_IMPORT_BATCH_SIZE) -> List[dict]:
+    """insert_many(ordered=False) in chunks; returns the documents actually written.
+
+    Rows rejected by the unique fingerprint index are duplicates and are skipped.
+    """
+    inserted = []
+    for i in range(0, len(docs), batch_size):
+        chunk = docs[i:i + batch_size]
+        try:
+            await db.transactions.insert_many(chunk, ordered=False)
+            inserted.extend(chunk)
+        except BulkWriteError as e:
+            write_errors = e.details.get('writeErrors', [])
+            failed = {error['index'] for error in write_errors}
+            unexpected = [error for error in write_errors if error.get('code') != 11000]
+            if unexpected:
+                logger.warning(f"{len(unexpected)} of {len(chunk)} transactions not inserted: {unexpected[:1]}")
+            inserted.extend(doc for j, doc in enumerate(chunk) if j not in failed)
+    return inserted
+
+async def import_transactions(user_email: str, account_id: str, transactions: List[Transaction]) -> List[dict]:
+    """Insert validated statement rows that are not already stored for the account.
+
+    Returns the documents written, with balances and rollups updated.
+    """
+    if not transactions:
+        return []
+    seen = await existing_fingerprints(user_email, account_id, [t.date for t in transactions])
+    new_docs = []
+    for transaction in transactions:
+        fingerprint = transaction_fingerprint(account_id, transaction.date, transaction.amount, transaction.description)
+        if fingerprint in seen:
+            continue
+        seen.add(fingerprint)
+        doc = transaction.model_dump()
+        doc['user_email'] = user_email
+        doc['date'] = storage_date(doc['date'])
+        doc['created_at'] = storage_date(doc['created_at'])
+        doc['fingerprint'] = fingerprint
+        new_docs.append(doc)
+    
+    imported_docs = await insert_transaction_batches(new_docs)
+    if imported_docs:
+        await apply_transaction_deltas(user_email, added=imported_docs)
+    return imported_docs
+
 @api_router.post("/bank-connections/{connection_id}/import-csv")
 async def import_bank_csv(connection_id: str, csv_data: Dict[str, Any], request: Request):
-    """Import transactions from CSV bank statement"""
+    """Import transactions from CSV bank statement
+
+    Rows are validated, de-duplicated against the account's transactions over
+    the statement's date span (and against each other) by fingerprint, then
+    written in batches. Invalid rows are reported and skipped.
+    """
     user = await get_current_user(request, db)
     user_email = user['email'] if user else 'anonymous'
+    started = time.perf_counter()
     
-    connection = await db.bank_connections.find_one({"id": connection_id}, {"_id": 0})
+    connection = await db.bank_connections.find_one({"id": connection_id, "user_email": user_email}, {"_id": 0})
     if not connection:
         raise HTTPException(status_code=404, detail="Bank connection not found")
     
@@ -2247,142 +3612,523 @@ async def import_bank_csv(connection_id: str, csv_data: Dict[str, Any], request:
         raise HTTPException(status_code=400, detail="No account linked to this connection")
     
     # Parse CSV data (expecting list of rows)
-    imported_count = 0
     transactions_data = csv_data.get('transactions', [])
-    
-    for row in transactions_data:
-        # Create transaction from CSV row
-        transaction = Transaction(
-            account_id=account_id,
-            type=TransactionType.expense if row.get('amount', 0) < 0 else TransactionType.income,
-            amount=abs(float(row.get('amount', 0))),
-            category=row.get('category', 'Divers'),
-            description=row.get('description', 'Import bancaire'),
-            date=datetime.fromisoformat(row.get('date', datetime.now(timezone.utc).isoformat()))
-        )
-        
-        doc = transaction.model_dump()
-        doc['user_email'] = user_email
-        doc['date'] = doc['date'].isoformat()
-        doc['created_at'] = doc['created_at'].isoformat()
-        
-        # Check if transaction already exists (avoid duplicates)
-        existing = await db.transactions.find_one({
-            "user_email": user_email,
-            "account_id": account_id,
-            "date": doc['date'],
-            "amount": doc['amount'],
-            "description": doc['description']
-        })
-        
-        if not existing:
-            await db.transactions.insert_one(doc)
-            imported_count += 1
+    if not isinstance(transactions_data, list):
+        raise HTTPException(status_code=400, detail="transactions must be a list of rows")
+    
+    valid = []
+    errors = []
+    invalid_count = 0
+    for line, row in enumerate(transactions_data, start=1):
+        try:
+            valid.append(csv_row_transaction(row, account_id))
+        except (ValueError, TypeError) as e:
+            invalid_count += 1
+            if len(errors) < CSV_IMPORT_MAX_ERRORS:
+                errors.append({"row": line, "error": str(e)})
+    
+    imported_docs = await import_transactions(user_email, account_id, valid)
+    imported_count = len(imported_docs)
     
     # Update last sync
     await db.bank_connections.update_one(
-        {"id": connection_id},
-        {"$set": {"last_sync": datetime.now(timezone.utc).isoformat()}}
+        {"id": connection_id, "user_email": user_email},
+        {"$set": {"last_sync": storage_date(datetime.now(timezone.utc))}}
     )
     
+    elapsed = time.perf_counter() - started
+    logger.info(f"CSV import for {user_email}: {imported_count}/{len(transactions_data)} rows in {elapsed:.2f}s")
     return {
         "message": f"{imported_count} transactions imported successfully",
         "imported_count": imported_count,
-        "total_rows": len(transactions_data)
+        "skipped_count": len(valid) - imported_count,
+        "invalid_count": invalid_count,
+        "errors": errors,
+        "total_rows": len(transactions_data),
+        "duration_ms": round(elapsed * 1000, 1),
+        "rows_per_second": round(len(transactions_data) / elapsed, 1) if elapsed > 0 else None
     }
 
 @api_router.delete("/bank-connections/{connection_id}")
-async def delete_bank_connection(connection_id: str):
-    result = await db.bank_connections.delete_one({"id": connection_id})
+async def delete_bank_connection(connection_id: str, request: Request):
+    user = await get_current_user(request, db)
+    user_email = user['email'] if user else 'anonymous'
+    
+    result = await db.bank_connections.delete_one({"id": connection_id, "user_email": user_email})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Bank connection not found")
     return {"message": "Bank connection deleted successfully"}
 
 
 # ============================================================================
-# API ROUTES - DASHBOARD & STATISTICS
+# API ROUTES - CSV UPLOAD IMPORT
 # ============================================================================
-@api_router.get("/dashboard/summary")
-async def get_dashboard_summary(request: Request):
-    """Get dashboard summary with key metrics"""
-    user = await get_current_user(request, db)
-    query = {"user_email": user['email']} if user else {"user_email": "anonymous"}
+CSV_UPLOAD_CHUNK_SIZE = 1024 * 1024
+CSV_UPLOAD_MAX_BYTES = int(os.environ.get('CSV_UPLOAD_MAX_BYTES', 200 * 1024 * 1024))
+CSV_SNIFF_BYTES = 64 * 1024
+CSV_HEADER_SCAN_ROWS = 20  # bank exports often put account details above the header
+CSV_DATE_FORMATS = ("%d.%m.%Y", "%d/%m/%Y", "%Y-%m-%d", "%d.%m.%y", "%d/%m/%y", "%d-%m-%Y")
+
+# Header names used by common Swiss and French bank exports, most specific first.
+# A header matches an alias it starts with ("Crédit en CHF" is a credit column).
+CSV_COLUMN_ALIASES = {
+    "date": ("date comptable", "date de comptabilisation", "date d'opération", "date operation",
+             "buchungsdatum", "booking date", "date", "valuta"),
+    "description": ("description", "libellé", "libelle", "texte", "motif", "détails", "buchungstext", "text"),
+    "amount": ("montant", "amount", "betrag"),
+    "debit": ("débit", "debit", "belastung"),
+    "credit": ("crédit", "credit", "gutschrift"),
+    "category": ("catégorie", "categorie", "category", "kategorie"),
+}
+
+# Background import tasks, referenced until they finish
+import_job_tasks: set = set()
+# Running jobs without progress for this long are reported as failed (lost on a restart or crash)
+IMPORT_JOB_STALE_AFTER = int(os.environ.get('IMPORT_JOB_STALE_AFTER', 300))
+
+class CSVImportOptions(BaseModel):
+    delimiter: Optional[str] = None  # sniffed from the file when unset
+    encoding: Optional[str] = None  # UTF-8, or Windows-1252 when the file is not valid UTF-8
+    decimal: Optional[str] = None  # "," or "."; guessed per value when unset
+    date_formats: List[str] = list(CSV_DATE_FORMATS)
+    mapping: Dict[str, str] = {}  # field -> header name, overriding CSV_COLUMN_ALIASES
+    default_category: str = "Divers"
+
+def fold_header(name: str) -> str:
+    return " ".join(tokenize(name))
+
+def resolve_csv_columns(header: List[str], mapping: Dict[str, str]) -> Optional[Dict[str, int]]:
+    """Column index of each field in a header row, or None if it is not the header.
+
+    A header needs a date column and an amount (or debit/credit) column.
+    """
+    folded = [fold_header(name) + " " for name in header]
+    columns = {}
+    for field, aliases in CSV_COLUMN_ALIASES.items():
+        candidates = (mapping[field],) if field in mapping else aliases
+        matches = (
+            index for alias in candidates for index, name in enumerate(folded)
+            if name.startswith(fold_header(alias) + " ")
+        )
+        index = next(matches, None)
+        if index is not None:
+            columns[field] = index
+        else:
+            if field in mapping:
+                return None
+    if "date" not in columns or not {"amount", "debit", "credit"} & columns.keys():
+        return None
+    return columns
+
+def parse_csv_amount(text: str, decimal: Optional[str] = None) -> Optional[float]:
+    """Signed amount from Swiss ("1'234.50"), French ("1 234,50", "-45,80 €") or plain notation"""
+    text = re.sub(r"[^\d,.+\-()]", "", text)
+    if not text:
+        return None
+    negative = text.startswith('-') or text.endswith('-') or (text.startswith('(') and text.endswith(')'))
+    digits = text.strip('+-()')
+    if decimal is None:
+        # The last separator is the decimal one, unless it repeats (thousands only)
+        last = max(digits.rfind(','), digits.rfind('.'))
+        decimal = digits[last] if last >= 0 and digits.count(digits[last]) == 1 else None
+    if decimal:
+        thousands = '.' if decimal == ',' else ','
+        digits = digits.replace(thousands, '').replace(decimal, '.')
+    else:
+        digits = digits.replace(',', '').replace('.', '')
+    amount = float(digits)
+    return -amount if negative else amount
+
+def parse_csv_date(text: str, formats: List[str]) -> datetime:
+    for fmt in formats:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        raise ValueError(f"unrecognized date '{text}'")
+
+def csv_upload_transaction(row: List[str], columns: Dict[str, int], options: CSVImportOptions,
+                           account_id: str) -> Optional[Transaction]:
+    """Transaction for one data row; None for blank lines"""
+    if not any(cell.strip() for cell in row):
+        return None
+    
+    def cell(field: str) -> str:
+        index = columns.get(field)
+        return row[index].strip() if index is not None and index < len(row) else ""
+    
+    if not cell("date"):
+        raise ValueError("missing date")
+    if "amount" in columns:
+        amount = parse_csv_amount(cell("amount"), options.decimal)
+    else:
+        credit = parse_csv_amount(cell("credit"), options.decimal)
+        debit = parse_csv_amount(cell("debit"), options.decimal)
+        amount = None if credit is None and debit is None else (credit or 0) - abs(debit or 0)
+    if amount is None:
+        raise ValueError("missing amount")
+    return Transaction(
+        account_id=account_id,
+        type=TransactionType.expense if amount < 0 else TransactionType.income,
+        amount=abs(amount),
+        category=cell("category") or options.default_category,
+        description=cell("description") or 'Import bancaire',
+        date=parse_csv_date(cell("date"), options.date_formats)
+    )
+
+async def spool_upload(upload: UploadFile) -> tuple:
+    """Copy an upload to a temp file chunk by chunk; returns (path, size)"""
+    fd, path = tempfile.mkstemp(prefix="csv-import-", suffix=".csv")
+    size = 0
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = await upload.read(CSV_UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > CSV_UPLOAD_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail=f"CSV file larger than {CSV_UPLOAD_MAX_BYTES} bytes")
+                out.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path, size
+
+def sniff_csv_format(path: str, options: CSVImportOptions) -> tuple:
+    """(encoding, delimiter) from the options, or guessed from the start of the file"""
+    with open(path, 'rb') as f:
+        sample = f.read(CSV_SNIFF_BYTES)
+    encoding = options.encoding
+    if not encoding:
+        try:
+            codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+            encoding = 'utf-8-sig'
+        except UnicodeDecodeError:
+            encoding = 'cp1252'
+    delimiter = options.delimiter
+    if not delimiter:
+        try:
+            delimiter = csv.Sniffer().sniff(sample.decode(encoding, errors='replace'), delimiters=";,\t|").delimiter
+        except csv.Error:
+            delimiter = ';'
+    return encoding, delimiter
+
+async def run_csv_import_job(job_id: str, user_email: str, account_id: str, path: str, options: CSVImportOptions):
+    """Parse a spooled CSV file and import it CSV_IMPORT_BATCH_SIZE rows at a time, recording progress on the job"""
+    started = time.perf_counter()
+    counts = {"rows_read": 0, "imported_count": 0, "skipped_count": 0, "invalid_count": 0}
+    errors = []
+    
+    async def update_job(**fields):
+        await db.import_jobs.update_one(
+            {"id": job_id},
+            {"$set": {**counts, "errors": errors, **fields, "updated_at": storage_date(datetime.now(timezone.utc))}}
+        )
     
-    accounts = await db.accounts.find(query, {"_id": 0}).to_list(1000)
-    transactions = await db.transactions.find(query, {"_id": 0}).to_list(10000)
-    investments = await db.investments.find(query, {"_id": 0}).to_list(1000)
-    goals = await db.goals.find(query, {"_id": 0}).to_list(1000)
-    debts = await db.debts.find(query, {"_id": 0}).to_list(1000)
+    async def flush(batch: List[Transaction], bytes_read: int):
+        imported = await import_transactions(user_email, account_id, batch)
+        counts["imported_count"] += len(imported)
+        counts["skipped_count"] += len(batch) - len(imported)
+        await update_job(bytes_read=bytes_read)
     
-    # Calculate totals from ACCOUNTS
-    total_balance = sum(acc.get('current_balance', 0) for acc in accounts if not acc.get('is_excluded_from_total'))
+    try:
+        encoding, delimiter = sniff_csv_format(path, options)
+        with open(path, 'rb') as raw:
+            reader = csv.reader(io.TextIOWrapper(raw, encoding=encoding, errors='replace', newline=''), delimiter=delimiter)
+            columns = None
+            batch = []
+            for line, row in enumerate(reader, start=1):
+                if columns is None:
+                    columns = resolve_csv_columns(row, options.mapping)
+                    if columns is None and line >= CSV_HEADER_SCAN_ROWS:
+                        break
+                    continue
+                counts["rows_read"] += 1
+                try:
+                    transaction = csv_upload_transaction(row, columns, options, account_id)
+                except (ValueError, TypeError) as e:
+                    counts["invalid_count"] += 1
+                    if len(errors) < CSV_IMPORT_MAX_ERRORS:
+                        errors.append({"row": line, "error": str(e)})
+                    continue
+                if transaction:
+                    batch.append(transaction)
+                if len(batch) >= CSV_IMPORT_BATCH_SIZE:
+                    await flush(batch, raw.tell())
+                    batch = []
+            if columns is None:
+                raise ValueError(f"No header with a date and an amount column in the first {CSV_HEADER_SCAN_ROWS} lines")
+            await flush(batch, raw.tell())
+        
+        elapsed = time.perf_counter() - started
+        await update_job(
+            status="completed",
+            finished_at=storage_date(datetime.now(timezone.utc)),
+            duration_ms=round(elapsed * 1000, 1),
+            rows_per_second=round(counts["rows_read"] / elapsed, 1) if elapsed > 0 else None
+        )
+        logger.info(f"CSV import job {job_id} for {user_email}: {counts} in {elapsed:.2f}s")
+    except Exception as e:
+        logger.error(f"CSV import job {job_id} failed: {e}")
+        await update_job(status="failed", error=str(e), finished_at=storage_date(datetime.now(timezone.utc)))
+    finally:
+        os.unlink(path)
+
+@api_router.post("/accounts/{account_id}/import-csv", status_code=202)
+async def upload_account_csv(
+    account_id: str,
+    request: Request,
+    file: UploadFile = File(...),
+    delimiter: Optional[str] = Form(None),
+    encoding: Optional[str] = Form(None),
+    decimal: Optional[str] = Form(None),
+    date_formats: Optional[str] = Form(None),
+    mapping: Optional[str] = Form(None),
+    default_category: str = Form("Divers")
+):
+    """Upload a bank statement CSV and import it into an account in the background.
+
+    The file is parsed on the server in bounded batches; poll
+    GET /import-jobs/{job_id} for progress. Optional form fields:
+    `delimiter` (";", ",", "tab", ...), `encoding`, `decimal` ("," or "."),
+    `date_formats` (comma-separated strptime formats, tried in order) and
+    `mapping`, a JSON object naming the header of each field (date,
+    description, amount or debit/credit, category).
+    """
+    user = await get_current_user(request, db)
+    user_email = user['email'] if user else 'anonymous'
+    
+    account = await db.accounts.find_one({"id": account_id, "user_email": user_email}, {"_id": 0, "id": 1})
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
     
-    # Calculate total from INVESTMENTS (quantity * current_price)
-    total_investments = sum(
-        inv.get('quantity', 0) * inv.get('current_price', 0) 
-        for inv in investments
+    if delimiter == "tab":
+        delimiter = "\t"
+    if delimiter is not None and len(delimiter) != 1:
+        raise HTTPException(status_code=400, detail="delimiter must be a single character")
+    if decimal not in (None, ",", "."):
+        raise HTTPException(status_code=400, detail="decimal must be ',' or '.'")
+    if encoding:
+        try:
+            codecs.lookup(encoding)
+        except LookupError:
+            raise HTTPException(status_code=400, detail=f"Unknown encoding: {encoding}")
+    try:
+        columns = json.loads(mapping) if mapping else {}
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="mapping must be a JSON object")
+    if not isinstance(columns, dict) or not all(isinstance(v, str) for v in columns.values()):
+        raise HTTPException(status_code=400, detail="mapping must map fields to header names")
+    unknown = [field for field in columns if field not in CSV_COLUMN_ALIASES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown mapping fields: {', '.join(unknown)}")
+    options = CSVImportOptions(
+        delimiter=delimiter,
+        encoding=encoding,
+        decimal=decimal,
+        mapping=columns,
+        default_category=default_category,
+        **({"date_formats": [f.strip() for f in date_formats.split(',') if f.strip()]} if date_formats else {})
     )
     
-    # Calculate investment cost basis and gains
-    total_invested = 0
-    for inv in investments:
-        for op in inv.get('operations', []):
-            if op.get('type') == 'buy':
-                total_invested += op.get('total', 0)
-            elif op.get('type') == 'sell':
-                total_invested -= op.get('total', 0)
+    path, size = await spool_upload(file)
+    now = storage_date(datetime.now(timezone.utc))
+    job = {
+        "id": str(uuid.uuid4()),
+        "user_email": user_email,
+        "account_id": account_id,
+        "filename": file.filename,
+        "status": "running",
+        "bytes_total": size,
+        "bytes_read": 0,
+        "rows_read": 0,
+        "imported_count": 0,
+        "skipped_count": 0,
+        "invalid_count": 0,
+        "errors": [],
+        "created_at": now,
+        "updated_at": now,
+    }
+    await db.import_jobs.insert_one(job)
+    
+    task = asyncio.create_task(run_csv_import_job(job['id'], user_email, account_id, path, options))
+    import_job_tasks.add(task)
+    task.add_done_callback(import_job_tasks.discard)
+    return {"job_id": job['id'], "status": job['status'], "bytes_total": size}
+
+@api_router.get("/import-jobs/{job_id}")
+async def get_import_job(job_id: str, request: Request):
+    """Progress and result of a background import"""
+    user = await get_current_user(request, db)
+    user_email = user['email'] if user else 'anonymous'
     
+    job = await db.import_jobs.find_one({"id": job_id, "user_email": user_email}, {"_id": 0, "user_email": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    
+    # A running job records progress after every batch; silence means its worker died
+    if job['status'] == 'running':
+        now = datetime.now(timezone.utc)
+        updated_at = parse_stored_date(job['updated_at'])
+        if updated_at.tzinfo is None:
+            updated_at = updated_at.replace(tzinfo=timezone.utc)
+        if now - updated_at > timedelta(seconds=IMPORT_JOB_STALE_AFTER):
+            failed = {
+                "status": "failed",
+                "error": f"Import interrupted: no progress for {IMPORT_JOB_STALE_AFTER} seconds",
+                "finished_at": storage_date(now),
+            }
+            await db.import_jobs.update_one(
+                {"id": job_id, "status": "running", "updated_at": job['updated_at']}, {"$set": failed}
+            )
+            job.update(failed)
+    return job
+
+
+# ============================================================================
+# API ROUTES - DASHBOARD & STATISTICS
+# ============================================================================
+@api_router.get("/dashboard/summary")
+async def get_dashboard_summary(request: Request):
+    """Get dashboard summary with key metrics.
+
+    Cached per user until their data changes; responses carry an ETag and a
+    matching If-None-Match gets a 304 without recomputing anything.
+    """
+    user = await get_current_user(request, db)
+    user_email = user['email'] if user else 'anonymous'
+    
+    version = await get_data_version(user_email)
+    today = datetime.now(timezone.utc).date().isoformat()
+    etag = '"' + hashlib.sha1(f"{user_email}:{version}:{today}".encode()).hexdigest()[:20] + '"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    body = await dashboard_cache.get(user_email, etag)
+    if body is None:
+        timings = {} if timings_requested(request) else None
+        summary = await compute_dashboard_summary(user_email, timings)
+        body = json.dumps(jsonable_encoder(summary)).encode()
+        await dashboard_cache.set(user_email, etag, body)
+        if timings is not None:
+            headers["Server-Timing"] = server_timing_header(timings)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+async def compute_dashboard_summary(user_email: str, timings: Optional[Dict[str, float]] = None) -> dict:
+    """Key metrics for the dashboard, computed with concurrent aggregations"""
+    query = {"user_email": user_email}
+    now = datetime.now(timezone.utc)
+
+    # Last six calendar months, oldest first
+    months = []
+    year, month = now.year, now.month
+    for _ in range(6):
+        months.insert(0, (year, month))
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    month_keys = [f"{y:04d}-{m:02d}" for y, m in months]
+
+    async def account_totals():
+        # Balances from the balance engine
+        accounts = await db.accounts.find(
+            query, {"_id": 0, "id": 1, "initial_balance": 1, "initialBalance": 1, "is_excluded_from_total": 1}
+        ).to_list(None)
+        accounts = await attach_account_balances(user_email, accounts)
+        total = sum(acc.get('current_balance', 0) for acc in accounts if not acc.get('is_excluded_from_total'))
+        return total, len(accounts)
+
+    async def investment_totals():
+        pipeline = [
+            {"$match": query},
+            {"$facet": {
+                # Market value: quantity * current_price
+                "value": [{"$group": {
+                    "_id": None,
+                    "total": {"$sum": {"$multiply": [{"$ifNull": ["$quantity", 0]}, {"$ifNull": ["$current_price", 0]}]}},
+                    "count": {"$sum": 1}
+                }}],
+                # Cost basis: buys minus sells
+                "invested": [
+                    {"$unwind": "$operations"},
+                    {"$group": {"_id": "$operations.type", "total": {"$sum": {"$ifNull": ["$operations.total", 0]}}}}
+                ]
+            }}
+        ]
+        result = (await db.investments.aggregate(pipeline).to_list(1))[0]
+        value = result['value'][0] if result['value'] else {"total": 0, "count": 0}
+        by_type = {row['_id']: row['total'] for row in result['invested']}
+        return value['total'], by_type.get('buy', 0) - by_type.get('sell', 0), value['count']
+
+    async def debt_total():
+        rows = await db.debts.aggregate([
+            {"$match": query},
+            {"$group": {"_id": None, "total": {"$sum": {"$ifNull": ["$remaining_amount", 0]}}}}
+        ]).to_list(1)
+        return rows[0]['total'] if rows else 0
+
+    async def last_30_days():
+        match = {**query, "type": {"$in": ["income", "expense"]}, **date_since_filter("date", now - timedelta(days=30))}
+        rows = await db.transactions.aggregate([
+            {"$match": match},
+            {"$group": {"_id": "$type", "total": {"$sum": {"$ifNull": ["$amount", 0]}}}}
+        ]).to_list(None)
+        by_type = {row['_id']: row['total'] for row in rows}
+        return by_type.get('income', 0), by_type.get('expense', 0)
+
+    async def rollup_totals():
+        # Trends and categories from the monthly rollups
+        await ensure_monthly_rollups(user_email)
+        pipeline = [
+            {"$match": {"user_email": user_email, "type": {"$in": ["income", "expense"]}}},
+            {"$facet": {
+                "trend": [
+                    {"$match": {"month": {"$in": month_keys}}},
+                    {"$group": {"_id": {"month": "$month", "type": "$type"}, "total": {"$sum": "$total"}}}
+                ],
+                "categories": [
+                    {"$match": {"type": "expense"}},
+                    {"$group": {"_id": {"$ifNull": ["$category", "Autre"]}, "total": {"$sum": "$total"}}},
+                    {"$sort": {"total": -1}},
+                    {"$limit": 5}
+                ]
+            }}
+        ]
+        result = (await db.monthly_rollups.aggregate(pipeline).to_list(1))[0]
+        month_totals = {(row['_id']['month'], row['_id']['type']): row['total'] for row in result['trend']}
+        return month_totals, [(row['_id'], row['total']) for row in result['categories']]
+
+    results = await gather_queries({
+        "accounts": account_totals(),
+        "investments": investment_totals(),
+        "debts": debt_total(),
+        "goals": db.goals.count_documents(query),
+        "last_30_days": last_30_days(),
+        "rollups": rollup_totals(),
+    }, timings)
+    total_balance, accounts_count = results["accounts"]
+    total_investments, total_invested, active_investments = results["investments"]
+    total_debts = results["debts"]
+    goals_count = results["goals"]
+    monthly_income, monthly_expenses = results["last_30_days"]
+    month_totals, top_categories = results["rollups"]
+
     investment_gains = total_investments - total_invested if total_invested > 0 else 0
     investment_gains_percent = (investment_gains / total_invested * 100) if total_invested > 0 else 0
     
-    # Calculate total DEBTS
-    total_debts = sum(debt.get('remaining_amount', 0) for debt in debts)
-    
     # NET WORTH = Comptes + Investissements - Dettes
     net_worth = total_balance + total_investments - total_debts
     
-    # Calculate monthly income and expenses
-    from datetime import timedelta
-    now = datetime.now(timezone.utc)
-    month_ago = now - timedelta(days=30)
-    
-    monthly_income = sum(
-        txn.get('amount', 0) for txn in transactions 
-        if txn.get('type') == 'income' and datetime.fromisoformat(txn.get('date')).replace(tzinfo=timezone.utc) > month_ago
-    )
-    
-    monthly_expenses = sum(
-        txn.get('amount', 0) for txn in transactions 
-        if txn.get('type') == 'expense' and datetime.fromisoformat(txn.get('date')).replace(tzinfo=timezone.utc) > month_ago
-    )
-    
-    # Calculate expenses by category (top 5)
-    from collections import defaultdict
-    category_expenses = defaultdict(float)
-    for txn in transactions:
-        if txn.get('type') == 'expense':
-            category_expenses[txn.get('category', 'Autre')] += txn.get('amount', 0)
-    
-    top_categories = sorted(category_expenses.items(), key=lambda x: x[1], reverse=True)[:5]
-    
-    # Calculate 6-month trends
+    # 6-month trends, oldest first
     trends = []
-    for i in range(6):
-        start_date = now - timedelta(days=30 * (i + 1))
-        end_date = now - timedelta(days=30 * i)
-        
-        period_income = sum(
-            txn.get('amount', 0) for txn in transactions 
-            if txn.get('type') == 'income' and start_date < datetime.fromisoformat(txn.get('date')).replace(tzinfo=timezone.utc) <= end_date
-        )
-        
-        period_expenses = sum(
-            txn.get('amount', 0) for txn in transactions 
-            if txn.get('type') == 'expense' and start_date < datetime.fromisoformat(txn.get('date')).replace(tzinfo=timezone.utc) <= end_date
-        )
-        
-        trends.insert(0, {
-            "month": end_date.strftime("%b %Y"),
+    for (y, m), key in zip(months, month_keys):
+        period_income = month_totals.get((key, 'income'), 0)
+        period_expenses = month_totals.get((key, 'expense'), 0)
+        trends.append({
+            "month": datetime(y, m, 1).strftime("%b %Y"),
             "income": period_income,
             "expenses": period_expenses,
             "savings": period_income - period_expenses
@@ -2399,70 +4145,496 @@ async def get_dashboard_summary(request: Request):
         "monthly_income": monthly_income,
         "monthly_expenses": monthly_expenses,
         "savings_rate": (monthly_income - monthly_expenses) / monthly_income if monthly_income > 0 else 0,
-        "accounts_count": len(accounts),
-        "goals_count": len(goals),
-        "active_investments": len(investments),
+        "accounts_count": accounts_count,
+        "goals_count": goals_count,
+        "active_investments": active_investments,
         "top_categories": [{"name": cat, "amount": amt} for cat, amt in top_categories],
         "trends": trends
     }
 
 
+# ============================================================================
+# API ROUTES - SYNC
+# ============================================================================
+# Collections served by /sync -> (legacy field map, response model)
+SYNC_COLLECTIONS = {
+    "accounts": (ACCOUNT_FIELD_MAP, Account),
+    "transactions": (TRANSACTION_FIELD_MAP, Transaction),
+    "investments": (INVESTMENT_FIELD_MAP, Investment),
+    "goals": (GOAL_FIELD_MAP, Goal),
+    "debts": (DEBT_FIELD_MAP, Debt),
+    "receivables": (RECEIVABLE_FIELD_MAP, Receivable),
+    "categories": ({}, Category),
+}
+# Clients further behind than this get a full snapshot instead of a replay
+SYNC_MAX_CHANGES = int(os.environ.get('SYNC_MAX_CHANGES', 5000))
+# A change_log gap younger than this is a write still in flight, not a lost entry
+SYNC_GAP_GRACE = timedelta(seconds=10)
+
+def sync_document(collection_name: str, doc: dict) -> dict:
+    """A stored document shaped like the collection's list endpoint returns it"""
+    field_map, model = SYNC_COLLECTIONS[collection_name]
+    doc = convert_legacy_fields(doc, collection_name, field_map)
+    try:
+        return model.model_validate(doc).model_dump(mode="json", by_alias=True)
+    except ValidationError:
+        # Keep serving documents that predate a model change
+        return jsonable_encoder({k: v for k, v in doc.items() if k != 'user_email'})
+
+async def sync_documents(user_email: str, ids: Optional[Dict[str, List[str]]],
+                         timings: Optional[Dict[str, float]] = None) -> Dict[str, List[dict]]:
+    """The user's documents per collection: all of them, or only `ids` when given"""
+    def query(name: str) -> dict:
+        if ids is None:
+            return {"user_email": user_email}
+        return {"user_email": user_email, "id": {"$in": ids[name]}}
+    names = list(SYNC_COLLECTIONS) if ids is None else [name for name in SYNC_COLLECTIONS if ids.get(name)]
+    found = await gather_queries({
+        name: db[name].find(query(name), {"_id": 0}).to_list(None)
+        for name in names
+    }, timings)
+    documents = {name: [sync_document(name, doc) for doc in docs] for name, docs in found.items()}
+    if documents.get("accounts"):
+        documents["accounts"] = await attach_account_balances(user_email, documents["accounts"])
+    if documents.get("transactions"):
+        documents["transactions"].sort(key=lambda txn: str(txn.get('date') or ''), reverse=True)
+    return documents
+
+async def change_log_entries(user_email: str, since: int, version: int) -> Optional[List[dict]]:
+    """Contiguous change_log entries after `since`, or None if the client must resync in full.
+
+    Stops before the first missing version or reset. An empty list means the
+    next entry is most likely still being written: the client retries.
+    """
+    entries = await db.change_log.find(
+        {"user_email": user_email, "version": {"$gt": since, "$lte": version}},
+        {"_id": 0, "user_email": 0}
+    ).sort("version", ASCENDING).to_list(None)
+    contiguous = []
+    for entry in entries:
+        if entry['version'] != since + len(contiguous) + 1 or entry.get('reset'):
+            break
+        contiguous.append(entry)
+    if contiguous:
+        return contiguous
+    if not entries or entries[0].get('reset'):
+        return None
+    # A gap before the first entry: lost (crash, TTL expiry) unless it is recent
+    first_at = entries[0]['at']
+    if first_at.tzinfo is None:
+        first_at = first_at.replace(tzinfo=timezone.utc)
+    return [] if datetime.now(timezone.utc) - first_at < SYNC_GAP_GRACE else None
+
+def change_log_states(entries: List[dict]) -> Dict[str, Dict[str, bool]]:
+    """Latest state per document in change_log entries: {collection: {id: deleted}}.
+
+    A write after a delete brings the document back.
+    """
+    states: Dict[str, Dict[str, bool]] = {}
+    for entry in entries:
+        for deleted, ids_by_name in ((False, entry.get('changed', {})), (True, entry.get('deleted', {}))):
+            for name, ids in ids_by_name.items():
+                states.setdefault(name, {}).update(dict.fromkeys(ids, deleted))
+    return states
+
+@api_router.get("/sync")
+async def sync_changes(request: Request, response: Response, since: int = Query(0, ge=0)):
+    """Documents created, updated or deleted since the client's data version.
+
+    Returns {"version", "full", "changed": {collection: [documents]},
+    "deleted": {collection: [ids]}}. With full=true, `changed` is a complete
+    snapshot replacing the client's copy (first sync, reset, or too far behind).
+    Clients pass the returned version as `since` on their next call.
+    """
+    user = await get_current_user(request, db)
+    user_email = user['email'] if user else 'anonymous'
+    
+    timings = {} if timings_requested(request) else None
+    version = await get_data_version(user_email)
+    result = {"version": version, "full": False, "changed": {}, "deleted": {}}
+    if since == version:
+        return result
+    
+    entries = None
+    if 0 < since < version and version - since <= SYNC_MAX_CHANGES:
+        entries = await change_log_entries(user_email, since, version)
+    if entries is None:
+        result.update(full=True, changed=await sync_documents(user_email, None, timings))
+    else:
+        states = {name: state for name, state in change_log_states(entries).items() if name in SYNC_COLLECTIONS}
+        changed_ids = {name: [i for i, deleted in state.items() if not deleted] for name, state in states.items()}
+        documents = await sync_documents(user_email, changed_ids, timings)
+        deleted_ids = {}
+        for name, state in states.items():
+            found = {doc.get('id') for doc in documents.get(name, [])}
+            # Changed documents that are gone by now were deleted by a later write
+            gone = [i for i, deleted in state.items() if deleted or i not in found]
+            if gone:
+                deleted_ids[name] = gone
+        result.update(
+            version=entries[-1]['version'] if entries else since,
+            changed={name: docs for name, docs in documents.items() if docs},
+            deleted=deleted_ids
+        )
+    if timings is not None:
+        response.headers["Server-Timing"] = server_timing_header(timings)
+    return result
+
+
 # ============================================================================
 # API ROUTES - DATA EXPORT/IMPORT
 # ============================================================================
+EXPORT_COLLECTIONS = (
+    "accounts", "transactions", "investments", "goals", "debts",
+    "receivables", "products", "shopping_lists", "bank_connections"
+)
+
+# Writes to these do not bump the data version, so an incremental export has
+# no change_log entries to go by: they are always exported in full
+EXPORT_UNVERSIONED_COLLECTIONS = ("shopping_lists", "bank_connections")
+
+EXPORT_BATCH_SIZE = 1000  # documents per cursor round-trip
+EXPORT_CHUNK_BYTES = 64 * 1024  # response chunk size before compression
+EXPORT_MEDIA_TYPES = {"json": "application/json", "ndjson": "application/x-ndjson"}
+EXPORT_COMPRESSION = {"gzip": ("application/gzip", ".gz"), "zstd": ("application/zstd", ".zst")}
+
+def export_json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def dump_export(value) -> str:
+    return json.dumps(value, default=export_json_default, ensure_ascii=False, separators=(",", ":"))
+
+async def export_documents(user_email: str, collection_name: str, ids: Optional[List[str]] = None):
+    """The user's documents in a collection (only `ids` when given), fetched EXPORT_BATCH_SIZE at a time"""
+    query = {"user_email": user_email}
+    if ids is not None:
+        query["id"] = {"$in": ids}
+    cursor = db[collection_name].find(query, {"_id": 0, "user_email": 0}).batch_size(EXPORT_BATCH_SIZE)
+    async for doc in cursor:
+        yield doc
+
+async def export_text(user_email: str, format: str, states: Optional[Dict[str, Dict[str, bool]]], checkpoint: int):
+    """Serialized export, one document at a time.
+
+    `states` (see change_log_states) limits a versioned collection to the
+    documents changed since the previous export; None exports everything.
+    json keeps the /import/all shape ({collection: [documents]}) plus
+    `checkpoint`, `full` and `deleted` ({collection: [ids]}); ndjson writes
+    one {"collection", "document"} object per line and ends with a
+    {"checkpoint", "full", "deleted", "counts"} line.
+    """
+    deleted = {}
+    
+    async def documents(name: str):
+        if states is None or name in EXPORT_UNVERSIONED_COLLECTIONS:
+            async for doc in export_documents(user_email, name):
+                yield doc
+            return
+        state = states.get(name, {})
+        changed = [doc_id for doc_id, gone in state.items() if not gone]
+        exported = set()
+        if changed:
+            async for doc in export_documents(user_email, name, changed):
+                exported.add(doc.get('id'))
+                yield doc
+        # Changed documents that are gone by now were deleted by a later write
+        gone = [doc_id for doc_id, was_deleted in state.items() if was_deleted or doc_id not in exported]
+        if gone:
+            deleted[name] = gone
+    
+    full = states is None
+    if format == "ndjson":
+        counts = {}
+        for name in EXPORT_COLLECTIONS:
+            counts[name] = 0
+            async for doc in documents(name):
+                yield dump_export({"collection": name, "document": doc}) + "\n"
+                counts[name] += 1
+        yield dump_export({"checkpoint": checkpoint, "full": full, "deleted": deleted, "counts": counts}) + "\n"
+        return
+    
+    yield "{"
+    for i, name in enumerate(EXPORT_COLLECTIONS):
+        yield ("," if i else "") + json.dumps(name) + ":["
+        separator = ""
+        async for doc in documents(name):
+            yield separator + dump_export(doc)
+            separator = ","
+        yield "]"
+    yield f',"deleted":{dump_export(deleted)},"full":{json.dumps(full)},"checkpoint":{checkpoint}}}'
+
+async def export_chunks(text, compress: Optional[str] = None):
+    """Encode (and optionally compress) serialized output in EXPORT_CHUNK_BYTES chunks"""
+    if compress == "gzip":
+        compressor = zlib.compressobj(wbits=31)  # gzip container
+    elif compress == "zstd":
+        compressor = zstandard.ZstdCompressor().compressobj()
+    else:
+        compressor = None
+    
+    buffer, size = [], 0
+    async for part in text:
+        buffer.append(part)
+        size += len(part)
+        if size >= EXPORT_CHUNK_BYTES:
+            data = "".join(buffer).encode("utf-8")
+            buffer, size = [], 0
+            if compressor:
+                data = compressor.compress(data)
+            if data:
+                yield data
+    data = "".join(buffer).encode("utf-8")
+    if compressor:
+        data = compressor.compress(data) + compressor.flush()
+    if data:
+        yield data
+
 @api_router.get("/export/all")
-async def export_all_data():
-    """Export all data as JSON"""
-    data = {
-        "accounts": await db.accounts.find({}, {"_id": 0}).to_list(10000),
-        "transactions": await db.transactions.find({}, {"_id": 0}).to_list(10000),
-        "investments": await db.investments.find({}, {"_id": 0}).to_list(10000),
-        "goals": await db.goals.find({}, {"_id": 0}).to_list(10000),
-        "debts": await db.debts.find({}, {"_id": 0}).to_list(10000),
-        "receivables": await db.receivables.find({}, {"_id": 0}).to_list(10000),
-        "products": await db.products.find({}, {"_id": 0}).to_list(10000),
-        "shopping_lists": await db.shopping_lists.find({}, {"_id": 0}).to_list(10000),
-        "bank_connections": await db.bank_connections.find({}, {"_id": 0}).to_list(10000)
-    }
-    return data
+async def export_all_data(
+    request: Request,
+    format: str = Query(default="json", pattern="^(json|ndjson)$"),
+    compress: Optional[str] = Query(default=None, pattern="^(gzip|zstd)$"),
+    since: Optional[int] = Query(default=None, ge=0)
+):
+    """Export the user's data, streamed straight from the database cursors.
+
+    `format=json` (default) is the /import/all shape; `format=ndjson` writes
+    one document per line. `compress=gzip|zstd` compresses the file. Every
+    export ends with a `checkpoint`, the data version it covers (also sent
+    as X-Export-Checkpoint).
+
+    Passing it back as `since` exports only what changed after it:
+    documents created or updated since, and the ids of deleted ones under
+    `deleted`. Such an export has `full: false` and is merged onto the
+    previous one by id; /import/all refuses it. When the change_log no
+    longer covers `since`, a full export is produced instead.
+    """
+    user = await get_current_user(request, db)
+    user_email = user['email'] if user else 'anonymous'
+    
+    if compress == "zstd" and zstandard is None:
+        raise HTTPException(status_code=400, detail="zstd compression is not available on this server")
+    
+    checkpoint = await get_data_version(user_email)
+    states = None
+    if since is not None and since <= checkpoint and checkpoint - since <= SYNC_MAX_CHANGES:
+        entries = [] if since == checkpoint else await change_log_entries(user_email, since, checkpoint)
+        if entries is not None:
+            # Entries still being written are left to the next export
+            checkpoint = entries[-1]['version'] if entries else since
+            states = change_log_states(entries)
+    
+    started = datetime.now(timezone.utc)
+    filename = f"financeapp-export-{started.strftime('%Y%m%dT%H%M%SZ')}.{format}"
+    media_type = EXPORT_MEDIA_TYPES[format]
+    if compress:
+        media_type, extension = EXPORT_COMPRESSION[compress]
+        filename += extension
+    
+    return StreamingResponse(
+        export_chunks(export_text(user_email, format, states, checkpoint), compress),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "X-Export-Checkpoint": str(checkpoint),
+            "X-Export-Full": "true" if states is None else "false"
+        }
+    )
+
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 1000))
+IMPORT_MAX_ERRORS = 100  # invalid documents listed in the response; counts cover all
+IMPORT_MODELS = {
+    "accounts": Account,
+    "transactions": Transaction,
+    "investments": Investment,
+    "goals": Goal,
+    "debts": Debt,
+    "receivables": Receivable,
+    "products": Product,
+    "shopping_lists": ShoppingList,
+    "bank_connections": BankConnection,
+}
+
+def prepare_import_document(collection_name: str, item: Any) -> dict:
+    """Bring a backup document to the current schema and validate it against its model"""
+    if not isinstance(item, dict):
+        raise ValueError("document must be an object")
+    item = dict(item)
+    item.pop('_id', None)
+    if collection_name in SCHEMA_COLLECTIONS:
+        # Old camelCase backups
+        update = normalize_document(collection_name, item)
+        for field in update.get("$unset", {}):
+            item.pop(field, None)
+        item.update(update["$set"])
+    # Store the validated values (coerced types, defaults), keeping keys the model doesn't know
+    validated = IMPORT_MODELS[collection_name].model_validate(item).model_dump()
+    item.update(storage_dates(validated))
+    return item
+
+async def swap_staged_import(user_email: str, staging_email: str, collection_names: List[str]):
+    """Replace the user's documents with the staged ones, in one transaction where supported.
+
+    Without transactions the user's documents are first handed to a trash
+    owner, the staged ones re-owned, and the trash purged last; a failure
+    before the purge hands everything back. Staged documents are discarded
+    only once the user's documents are known to be in place; if even the
+    rollback fails, both copies are kept and logged for manual recovery.
+    """
+    trash_email = f"{staging_email}:replaced"
+    trashed, started = [], []
+    fallback = False
+    
+    async def swap(session):
+        nonlocal fallback
+        if session is not None:
+            for name in collection_names:
+                await db[name].delete_many({"user_email": user_email}, session=session)
+                await db[name].update_many(
+                    {"user_email": staging_email}, {"$set": {"user_email": user_email}}, session=session
+                )
+            return
+        fallback = True
+        for name in collection_names:
+            started.append(name)
+            await db[name].update_many({"user_email": user_email}, {"$set": {"user_email": trash_email}})
+            trashed.append(name)
+            await db[name].update_many({"user_email": staging_email}, {"$set": {"user_email": user_email}})
+    
+    try:
+        await run_in_transaction(swap)
+    except BaseException:
+        if fallback:
+            try:
+                for name in reversed(started):
+                    if name in trashed:
+                        # Every original is in the trash: what the user owns now came from staging
+                        await db[name].update_many({"user_email": user_email}, {"$set": {"user_email": staging_email}})
+                    await db[name].update_many({"user_email": trash_email}, {"$set": {"user_email": user_email}})
+            except Exception as e:
+                logger.error(
+                    f"Import swap for {user_email} could not be rolled back ({e}): "
+                    f"previous documents are owned by {trash_email}, imported ones by {staging_email}"
+                )
+                raise
+        await gather_queries({name: db[name].delete_many({"user_email": staging_email}) for name in collection_names})
+        raise
+    if fallback:
+        await gather_queries({name: db[name].delete_many({"user_email": trash_email}) for name in collection_names})
 
 @api_router.post("/import/all")
-async def import_all_data(data: Dict[str, Any], request: Request):
-    """Import all data from JSON"""
+async def import_all_data(
+    request: Request,
+    format: Optional[str] = Query(default=None, pattern="^(json|ndjson)$"),
+    dry_run: bool = False
+):
+    """Import a backup produced by /export/all, replacing the collections it contains.
+
+    The body is read as a stream: JSON ({collection: [documents]}) or, with
+    `format=ndjson` or an application/x-ndjson body, NDJSON; it may be
+    gzip-compressed (Content-Encoding: gzip). Documents are validated and
+    written in batches under a staging owner, then swapped in for the
+    user's data at the end, so a failed import leaves existing data
+    untouched. `dry_run=true` only parses and validates.
+    """
     user = await get_current_user(request, db)
     user_email = user['email'] if user else 'anonymous'
+    started = time.perf_counter()
+    
+    content_type = request.headers.get('content-type', '')
+    if format is None:
+        format = "ndjson" if "ndjson" in content_type else "json"
+    chunks = request.stream()
+    if request.headers.get('content-encoding') == 'gzip' or 'gzip' in content_type:
+        chunks = gunzip(chunks)
+    metadata = {}
+    documents = iter_ndjson(chunks, metadata) if format == "ndjson" else iter_json_collections(chunks, metadata)
+    
+    staging_email = f"import:{uuid.uuid4()}"
+    stats: Dict[str, dict] = {}
+    batches: Dict[str, List[dict]] = {}
+    errors = []
+    
+    async def flush(name: str):
+        batch = batches.pop(name, [])
+        if batch and not dry_run:
+            try:
+                await db[name].insert_many(batch, ordered=False)
+            except BulkWriteError as e:
+                first = e.details.get('writeErrors', [{}])[0]
+                raise HTTPException(status_code=400, detail=f"Could not import {name}: {first.get('errmsg', e)}")
+        stats[name]["finished"] = time.perf_counter()
     
-    collections_map = {
-        "accounts": db.accounts,
-        "transactions": db.transactions,
-        "investments": db.investments,
-        "goals": db.goals,
-        "debts": db.debts,
-        "receivables": db.receivables,
-        "products": db.products,
-        "shopping_lists": db.shopping_lists,
-        "bank_connections": db.bank_connections
+    try:
+        try:
+            async for name, item in documents:
+                if name not in IMPORT_MODELS:
+                    continue
+                collection_stats = stats.setdefault(name, {"imported": 0, "invalid": 0, "started": time.perf_counter()})
+                try:
+                    doc = prepare_import_document(name, item)
+                except (ValidationError, ValueError, TypeError) as e:
+                    collection_stats["invalid"] += 1
+                    if len(errors) < IMPORT_MAX_ERRORS:
+                        errors.append({
+                            "collection": name,
+                            "id": item.get('id') if isinstance(item, dict) else None,
+                            "error": str(e)
+                        })
+                    continue
+                doc['user_email'] = staging_email
+                batches.setdefault(name, []).append(doc)
+                collection_stats["imported"] += 1
+                if len(batches[name]) >= IMPORT_BATCH_SIZE:
+                    await flush(name)
+        except (ValueError, zlib.error) as e:
+            raise HTTPException(status_code=400, detail=f"Malformed backup: {e}")
+        if metadata.get("full") is False:
+            # Importing replaces the user's data: a delta would drop everything it does not mention
+            raise HTTPException(status_code=400, detail="This is an incremental export: import a full export instead")
+        for name in stats:
+            await flush(name)
+        
+        imported = [name for name, collection_stats in stats.items() if collection_stats["imported"]]
+    except BaseException:
+        if not dry_run:
+            await gather_queries({name: db[name].delete_many({"user_email": staging_email}) for name in stats})
+        raise
+    if not dry_run and imported:
+        # Cleans up after itself: once it has started, staged documents may be the only copy
+        await swap_staged_import(user_email, staging_email, imported)
+    
+    if not dry_run and imported:
+        # Imported accounts/transactions replace history wholesale: replay balances
+        if "accounts" in imported or "transactions" in imported:
+            await rebuild_account_balances(user_email)
+        if "transactions" in imported:
+            await rebuild_monthly_rollups(user_email)
+        search_indexes.invalidate(user_email)
+        await bump_data_version(user_email, reset=True)
+    
+    throughput = {}
+    for name, collection_stats in stats.items():
+        elapsed = collection_stats["finished"] - collection_stats["started"]
+        throughput[name] = {
+            "imported": collection_stats["imported"],
+            "invalid": collection_stats["invalid"],
+            "duration_ms": round(elapsed * 1000, 1),
+            "documents_per_second": round(collection_stats["imported"] / elapsed, 1) if elapsed > 0 else None
+        }
+    elapsed = time.perf_counter() - started
+    logger.info(f"Import for {user_email} ({'dry run' if dry_run else 'applied'}): {throughput} in {elapsed:.2f}s")
+    return {
+        "message": "Backup validated" if dry_run else "Data imported successfully",
+        "dry_run": dry_run,
+        "imported": {name: collection_stats["imported"] for name, collection_stats in throughput.items() if collection_stats["imported"]},
+        "invalid_count": sum(collection_stats["invalid"] for collection_stats in throughput.values()),
+        "errors": errors,
+        "collections": throughput,
+        "duration_ms": round(elapsed * 1000, 1)
     }
-    
-    imported_counts = {}
-    
-    for collection_name, items in data.items():
-        if collection_name in collections_map and items:
-            collection = collections_map[collection_name]
-            
-            # CRITICAL FIX: Delete existing data for this user before importing to avoid duplicates
-            await collection.delete_many({"user_email": user_email})
-            
-            # Add user_email to each item
-            for item in items:
-                item['user_email'] = user_email
-            
-            # Insert new data
-            if items:
-                await collection.insert_many(items)
-            imported_counts[collection_name] = len(items)
-    
-    return {"message": "Data imported successfully", "imported": imported_counts}
 
 
 # ============================================================================
@@ -2531,6 +4703,25 @@ async def debug_auth(request: Request):
     }
 
 
+# Process-wide cache and index statistics are only served when DEBUG_STATS is
+# set, and then only to signed-in users
+DEBUG_STATS = os.environ.get('DEBUG_STATS', '').lower() in ('1', 'true', 'yes')
+
+@api_router.get("/debug/stats")
+async def debug_stats(request: Request):
+    """Session cache, dashboard cache, search index and exchange rate statistics for this worker"""
+    if not DEBUG_STATS:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not await get_current_user(request, db):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return {
+        "session_cache": session_cache.stats(),
+        "dashboard_cache": dashboard_cache.stats(),
+        "search_indexes": search_indexes.stats(),
+        "exchange_rates": rate_provider.stats()
+    }
+
+
 @api_router.post("/auth/logout")
 async def logout(request: Request, response: Response):
     """Logout current user"""
@@ -2542,71 +4733,147 @@ async def logout(request: Request, response: Response):
 # ============================================================================
 # ROOT ROUTE
 # ============================================================================
+# Searchable entity types -> (model, legacy field map, display fields, searchable
+# fields). Each collection has a text index over its searchable fields (see
+# INDEX_SPECS).
+SEARCH_TYPES = {
+    "transactions": (Transaction, TRANSACTION_FIELD_MAP,
+                     ("id", "description", "category", "amount", "type", "date", "account_id"), ("description", "category")),
+    "investments": (Investment, INVESTMENT_FIELD_MAP, ("id", "name", "symbol", "type"), ("name", "symbol")),
+    "accounts": (Account, ACCOUNT_FIELD_MAP, ("id", "name", "type", "currency", "initial_balance"), ("name",)),
+    "goals": (Goal, GOAL_FIELD_MAP, ("id", "name", "target_amount", "current_amount", "deadline"), ("name",)),
+    "products": (Product, {}, ("id", "name", "category", "usual_price"), ("name", "category")),
+    "categories": (Category, {}, ("id", "name", "type", "icon", "color"), ("name",)),
+}
+
+# Typeahead: each user's searchable entities are held in an in-process prefix
+# index, built on their first search and kept current by the write paths.
+# Users with more than SEARCH_INDEX_MAX_ENTITIES entities use the text indexes.
+SEARCH_INDEX_MAX_USERS = int(os.environ.get('SEARCH_INDEX_MAX_USERS', 500))
+SEARCH_INDEX_MAX_ENTITIES = int(os.environ.get('SEARCH_INDEX_MAX_ENTITIES', 50000))
+SEARCH_INDEX_RECHECK = float(os.environ.get('SEARCH_INDEX_RECHECK', 30))
+search_indexes = PrefixIndexRegistry(
+    SEARCH_INDEX_MAX_USERS,
+    {type_name: (display, searchable) for type_name, (_, _, display, searchable) in SEARCH_TYPES.items()}
+)
+
+async def load_search_index(user_email: str) -> Optional[PrefixIndex]:
+    """The user's prefix index, built if missing or behind writes from another worker.
+
+    Returns None for users too large to index in memory.
+    """
+    index = search_indexes.get(user_email)
+    if index is not None and time.monotonic() - index.checked_at > SEARCH_INDEX_RECHECK:
+        if await get_data_version(user_email) != index.version:
+            index = None
+        else:
+            index.checked_at = time.monotonic()
+    if index is not None:
+        return index
+    
+    query = {"user_email": user_email}
+    version = await get_data_version(user_email)
+    counts = await gather_queries({type_name: db[type_name].count_documents(query) for type_name in SEARCH_TYPES})
+    if sum(counts.values()) > SEARCH_INDEX_MAX_ENTITIES:
+        return None
+    
+    def load(type_name: str):
+        model, field_map, display, _ = SEARCH_TYPES[type_name]
+        _, projection = projection_for_fields(",".join(display), model, field_map)
+        return db[type_name].find(query, projection).to_list(None)
+    
+    fetched = await gather_queries({type_name: load(type_name) for type_name in SEARCH_TYPES})
+    index = PrefixIndex(version)
+    index.build(
+        (type_name, search_indexes.display(type_name, convert_legacy_fields(doc, type_name, SEARCH_TYPES[type_name][1])),
+         SEARCH_TYPES[type_name][3])
+        for type_name, docs in fetched.items() for doc in docs if doc.get('id')
+    )
+    search_indexes.set(user_email, index)
+    return index
+
 @api_router.get("/search")
-async def global_search(q: str, request: Request):
-    """Global search across all entities"""
+async def global_search(
+    q: str,
+    request: Request,
+    response: Response,
+    type: Optional[str] = None,
+    prev_q: Optional[str] = None,
+    page: int = Query(default=1, ge=1),
+    page_size: int = Query(default=10, ge=1, le=100)
+):
+    """Ranked search across entities, grouped by type.
+
+    Every word of `q` matches as a prefix ("mig" finds "Migros"). Each type
+    maps to a list of display fields plus a relevance `score`, best match
+    first. `type` restricts the search to one entity type; `page` and
+    `page_size` page through every list (a short page is the last one).
+    Pass the previous query as `prev_q` while the user types: when `q`
+    extends it, the previous results are narrowed instead of searched again.
+    """
     user = await get_current_user(request, db)
-    query = {"user_email": user['email']} if user else {"user_email": "anonymous"}
-    
-    search_term = q.lower()
-    results = {
-        "transactions": [],
-        "investments": [],
-        "accounts": [],
-        "goals": [],
-        "products": [],
-        "categories": []
-    }
-    
-    # Search in transactions
-    transactions = await db.transactions.find(query, {"_id": 0}).to_list(1000)
-    results["transactions"] = [
-        txn for txn in transactions 
-        if search_term in txn.get('description', '').lower() or 
-           search_term in txn.get('category', '').lower()
-    ][:10]
-    
-    # Search in investments
-    investments = await db.investments.find(query, {"_id": 0}).to_list(1000)
-    results["investments"] = [
-        inv for inv in investments 
-        if search_term in inv.get('name', '').lower() or 
-           search_term in inv.get('symbol', '').lower()
-    ][:10]
-    
-    # Search in accounts
-    accounts = await db.accounts.find(query, {"_id": 0}).to_list(1000)
-    results["accounts"] = [
-        acc for acc in accounts 
-        if search_term in acc.get('name', '').lower()
-    ][:10]
-    
-    # Search in goals
-    goals = await db.goals.find(query, {"_id": 0}).to_list(1000)
-    results["goals"] = [
-        goal for goal in goals 
-        if search_term in goal.get('name', '').lower()
-    ][:10]
-    
-    # Search in products
-    products = await db.products.find(query, {"_id": 0}).to_list(1000)
-    results["products"] = [
-        prod for prod in products 
-        if search_term in prod.get('name', '').lower() or 
-           search_term in prod.get('category', '').lower()
-    ][:10]
+    user_email = user['email'] if user else 'anonymous'
     
-    # Search in categories
-    categories = await db.categories.find(query, {"_id": 0}).to_list(1000)
-    results["categories"] = [
-        cat for cat in categories 
-        if search_term in cat.get('name', '').lower()
-    ][:10]
+    if type is not None and type not in SEARCH_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unknown search type: {type}")
+    types = [type] if type else list(SEARCH_TYPES)
+    terms = q.strip()
+    if not terms:
+        return {type_name: [] for type_name in types}
+    
+    index = await load_search_index(user_email)
+    if index is not None:
+        words = tokenize(terms)
+        grouped = {type_name: [] for type_name in types}
+        for key in index.search(terms, prev_q):
+            if key[0] in grouped:
+                grouped[key[0]].append(key)
+        results = {
+            type_name: [
+                {**index.doc(key), "score": index.score(key, words)}
+                for key in keys[(page - 1) * page_size:page * page_size]
+            ]
+            for type_name, keys in grouped.items()
+        }
+        if results.get("accounts"):
+            await attach_account_balances(user_email, results["accounts"])
+        return results
+    
+    def search(type_name: str):
+        model, field_map, fields, _ = SEARCH_TYPES[type_name]
+        _, projection = projection_for_fields(",".join(fields), model, field_map)
+        projection["score"] = {"$meta": "textScore"}
+        return db[type_name].find(
+            {"user_email": user_email, "$text": {"$search": terms}}, projection
+        ).sort([("score", {"$meta": "textScore"})]).skip((page - 1) * page_size).limit(page_size).to_list(page_size)
+    
+    timings = {} if timings_requested(request) else None
+    fetched = await gather_queries({type_name: search(type_name) for type_name in types}, timings)
+    if timings is not None:
+        response.headers["Server-Timing"] = server_timing_header(timings)
+    
+    results = {}
+    for type_name, items in fetched.items():
+        _, field_map, fields, _ = SEARCH_TYPES[type_name]
+        results[type_name] = [
+            {f: item[f] for f in (*fields, "score") if f in item}
+            for item in (convert_legacy_fields(item, type_name, field_map) for item in items)
+        ]
+    if results.get("accounts"):
+        await attach_account_balances(user_email, results["accounts"])
     
     return results
 
+# Everything a user owns, including derived materializations (data_versions
+# is kept so version numbers never go backwards)
+USER_DATA_COLLECTIONS = (
+    "accounts", "account_balances", "transactions", "monthly_rollups", "rollup_status",
+    "investments", "goals", "debts", "receivables", "categories", "products",
+    "shopping_lists", "bank_connections", "tasks", "payees", "preferences", "import_jobs"
+)
+
 @api_router.delete("/user/data/all")
-async def delete_all_user_data(request: Request):
+async def delete_all_user_data(request: Request, response: Response):
     """Delete ALL user data - use with caution!"""
     user = await get_current_user(request, db)
     if not user:
@@ -2615,19 +4882,15 @@ async def delete_all_user_data(request: Request):
     user_email = user['email']
     
     # Delete from all collections
-    await db.accounts.delete_many({"user_email": user_email})
-    await db.transactions.delete_many({"user_email": user_email})
-    await db.investments.delete_many({"user_email": user_email})
-    await db.goals.delete_many({"user_email": user_email})
-    await db.debts.delete_many({"user_email": user_email})
-    await db.receivables.delete_many({"user_email": user_email})
-    await db.categories.delete_many({"user_email": user_email})
-    await db.products.delete_many({"user_email": user_email})
-    await db.shopping_lists.delete_many({"user_email": user_email})
-    await db.bank_connections.delete_many({"user_email": user_email})
-    await db.tasks.delete_many({"user_email": user_email})
-    await db.payees.delete_many({"user_email": user_email})
-    await db.preferences.delete_many({"user_email": user_email})
+    timings = {} if timings_requested(request) else None
+    await gather_queries({
+        name: db[name].delete_many({"user_email": user_email})
+        for name in USER_DATA_COLLECTIONS
+    }, timings)
+    if timings is not None:
+        response.headers["Server-Timing"] = server_timing_header(timings)
+    search_indexes.invalidate(user_email)
+    await bump_data_version(user_email, reset=True)
     
     return {
         "message": "All user data deleted successfully",
@@ -2644,7 +4907,7 @@ async def root():
             "/accounts", "/transactions", "/investments",
             "/goals", "/debts", "/receivables", "/categories",
             "/products", "/shopping-lists", "/bank-connections",
-            "/dashboard/summary", "/search", "/export/all", "/import/all",
+            "/dashboard/summary", "/search", "/sync", "/export/all", "/import/all",
             "/user/data/all (DELETE)"
         ]
     }
@@ -2663,6 +4926,7 @@ app.add_middleware(
     ],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Export-Checkpoint"],
 )
 
 # Configure logging
@@ -2672,6 +4936,129 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# ============================================================================
+# DATABASE INDEXES
+# ============================================================================
+def _user_id_index():
+    return IndexModel([("user_email", ASCENDING), ("id", ASCENDING)], name="user_email_id")
+
+def _search_index(**weights):
+    """Per-user text index for /api/search; no stemming or stop words, as data mixes French and English"""
+    return IndexModel(
+        [("user_email", ASCENDING)] + [(field, TEXT) for field in weights],
+        name="user_email_text",
+        weights=weights,
+        default_language="none"
+    )
+
+INDEX_SPECS = {
+    "accounts": [_user_id_index(), _search_index(name=1)],
+    "transactions": [
+        _user_id_index(),
+        IndexModel([("user_email", ASCENDING), ("account_id", ASCENDING), ("date", DESCENDING)], name="user_email_account_id_date"),
+        # Serves the legacy branch of account_filter(); only camelCase rows are indexed
+        IndexModel(
+            [("user_email", ASCENDING), ("accountId", ASCENDING), ("date", DESCENDING)],
+            name="user_email_accountId_date",
+            partialFilterExpression={"accountId": {"$exists": True}}
+        ),
+        IndexModel([("user_email", ASCENDING), ("type", ASCENDING), ("date", DESCENDING)], name="user_email_type_date"),
+        IndexModel([("user_email", ASCENDING), ("date", DESCENDING), ("id", DESCENDING)], name="user_email_date_id"),
+        _search_index(description=2, category=1),
+        # Duplicate detection for imported rows and retried creates; rows without the field are not indexed
+        IndexModel(
+            [("user_email", ASCENDING), ("fingerprint", ASCENDING)],
+            name="user_email_fingerprint",
+            unique=True,
+            partialFilterExpression={"fingerprint": {"$exists": True}}
+        ),
+        IndexModel(
+            [("user_email", ASCENDING), ("idempotency_key", ASCENDING)],
+            name="user_email_idempotency_key",
+            unique=True,
+            partialFilterExpression={"idempotency_key": {"$exists": True}}
+        ),
+    ],
+    "investments": [_user_id_index(), _search_index(name=2, symbol=2)],
+    "goals": [_user_id_index(), _search_index(name=1)],
+    "debts": [_user_id_index()],
+    "receivables": [_user_id_index()],
+    "categories": [_user_id_index(), _search_index(name=1)],
+    "payees": [_user_id_index()],
+    "tasks": [_user_id_index()],
+    "products": [_user_id_index(), _search_index(name=2, category=1)],
+    "shopping_lists": [_user_id_index()],
+    "bank_connections": [_user_id_index()],
+    "import_jobs": [_user_id_index()],
+    "preferences": [IndexModel([("user_email", ASCENDING)], name="user_email")],
+    "account_balances": [
+        IndexModel([("user_email", ASCENDING), ("account_id", ASCENDING)], name="user_email_account_id", unique=True)
+    ],
+    "monthly_rollups": [
+        IndexModel(
+            [("user_email", ASCENDING), ("month", ASCENDING), ("account_id", ASCENDING),
+             ("type", ASCENDING), ("category", ASCENDING)],
+            name="user_email_month_account_id_type_category",
+            unique=True
+        )
+    ],
+    "rollup_status": [IndexModel([("user_email", ASCENDING)], name="user_email", unique=True)],
+    "data_versions": [IndexModel([("user_email", ASCENDING)], name="user_email", unique=True)],
+    "change_log": [
+        IndexModel([("user_email", ASCENDING), ("version", ASCENDING)], name="user_email_version", unique=True),
+        IndexModel([("at", ASCENDING)], name="at_ttl", expireAfterSeconds=CHANGE_LOG_TTL_DAYS * 86400),
+    ],
+    "sessions": [IndexModel([("session_token", ASCENDING)], name="session_token", unique=True)],
+    "users": [IndexModel([("email", ASCENDING)], name="email", unique=True)],
+}
+
+async def ensure_indexes() -> List[str]:
+    """Idempotently create the indexes in INDEX_SPECS; returns the ones that could not be built"""
+    failed = []
+    for collection_name, indexes in INDEX_SPECS.items():
+        logger.info(f"Ensuring {len(indexes)} index(es) on {collection_name}")
+        for index in indexes:
+            name = index.document['name']
+            try:
+                await db[collection_name].create_indexes([index])
+            except OperationFailure as e:
+                # e.g. duplicate values blocking a unique index: keep serving, report it
+                logger.error(f"Could not build index {collection_name}.{name}: {e}")
+                failed.append(f"{collection_name}.{name}")
+    logger.info(f"Index bootstrap finished ({len(failed)} failed)")
+    return failed
+
+async def index_report() -> dict:
+    """Expected indexes that are missing, and existing ones with no recorded use.
+
+    Usage counters come from $indexStats and reset when mongod restarts.
+    """
+    missing, unused = [], []
+    for collection_name, indexes in INDEX_SPECS.items():
+        existing = {idx['name'] async for idx in db[collection_name].list_indexes()}
+        missing.extend(
+            f"{collection_name}.{index.document['name']}"
+            for index in indexes if index.document['name'] not in existing
+        )
+        async for stats in db[collection_name].aggregate([{"$indexStats": {}}]):
+            if stats['name'] != '_id_' and stats.get('accesses', {}).get('ops', 0) == 0:
+                unused.append(f"{collection_name}.{stats['name']}")
+    return {"missing": missing, "unused": unused}
+
+
+@app.on_event("startup")
+async def startup_db_client():
+    await load_migration_state()
+    await backfill_account_balances()
+    await backfill_document_owners()
+    await migrate_session_expiry(db)
+    await ensure_session_indexes(db)
+    failed = await ensure_indexes()
+    if failed:
+        logger.warning(f"Missing indexes after bootstrap: {', '.join(failed)}")
+    await init_http_client()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await close_http_client()
     client.close()
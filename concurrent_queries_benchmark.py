@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Concurrent Queries Benchmark for FinanceApp
+Compares the dashboard, search and delete-all handlers with their
+independent Mongo queries awaited one after another vs. gathered concurrently
+
+BEFORE: each query awaited in turn (latency = sum of round-trips)
+AFTER:  server.gather_queries (latency ~ slowest query, QUERY_CONCURRENCY at a time)
+
+Runs against a local mongod in a throwaway database, calling the handlers
+directly as the anonymous user.
+
+Usage:
+    MONGO_URL=mongodb://localhost:27017 python concurrent_queries_benchmark.py [--transactions 20000]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'financeapp_benchmark')
+# Keep search on the text indexes: the in-memory prefix index makes no queries
+os.environ.setdefault('SEARCH_INDEX_MAX_ENTITIES', '0')
+
+from starlette.requests import Request  # noqa: E402
+from fastapi import Response  # noqa: E402
+
+import server  # noqa: E402
+
+USER_EMAIL = "anonymous"
+DELETE_USER_EMAIL = "benchmark-delete@example.com"
+CATEGORIES = ["Alimentation", "Transport", "Logement", "Loisirs", "Santé"]
+
+
+def log(message, level="INFO"):
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] {level}: {message}")
+
+
+def make_request():
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": b""})
+
+
+async def sequential_queries(queries, timings=None, limit=None):
+    """Drop-in for server.gather_queries awaiting each query in turn"""
+    results = {}
+    for name, query in queries.items():
+        results[name] = await query
+    return results
+
+
+def user_documents(user_email, transactions):
+    start = datetime(2022, 1, 1, tzinfo=timezone.utc)
+    account_ids = [str(uuid.uuid4()) for _ in range(8)]
+    docs = {
+        "accounts": [
+            {"id": account_id, "name": f"Compte {i}", "type": "checking", "currency": "CHF",
+             "initial_balance": 1000, "user_email": user_email}
+            for i, account_id in enumerate(account_ids)
+        ],
+        "transactions": [
+            {"id": str(uuid.uuid4()), "account_id": random.choice(account_ids),
+             "type": random.choice(["income", "expense"]), "amount": round(random.uniform(1, 500), 2),
+             "category": random.choice(CATEGORIES), "description": f"Transaction {i}",
+             "date": (start + timedelta(hours=2 * i)).isoformat(), "user_email": user_email}
+            for i in range(transactions)
+        ],
+        "investments": [
+            {"id": str(uuid.uuid4()), "name": f"Action {i}", "symbol": f"SYM{i}", "type": "stock",
+             "quantity": 10, "current_price": 100,
+             "operations": [{"type": "buy", "quantity": 10, "price": 90, "total": 900}],
+             "user_email": user_email}
+            for i in range(50)
+        ],
+        "goals": [{"id": str(uuid.uuid4()), "name": f"Objectif {i}", "user_email": user_email} for i in range(20)],
+        "debts": [{"id": str(uuid.uuid4()), "name": f"Dette {i}", "remaining_amount": 500, "user_email": user_email}
+                  for i in range(20)],
+        "products": [{"id": str(uuid.uuid4()), "name": f"Produit {i}", "category": random.choice(CATEGORIES),
+                      "user_email": user_email} for i in range(200)],
+        "categories": [{"id": str(uuid.uuid4()), "name": name, "user_email": user_email} for name in CATEGORIES],
+    }
+    for name in ("receivables", "shopping_lists", "bank_connections", "tasks", "payees"):
+        docs[name] = [{"id": str(uuid.uuid4()), "name": f"{name} {i}", "user_email": user_email} for i in range(20)]
+    return docs
+
+
+async def seed(user_email, transactions):
+    for name, docs in user_documents(user_email, transactions).items():
+        if docs:
+            await server.db[name].insert_many(docs)
+    await server.rebuild_account_balances(user_email)
+
+
+async def run_handlers():
+    """One pass over the read handlers, returning per-handler wall times in ms"""
+    durations = {}
+
+    start = time.perf_counter()
+    await server.compute_dashboard_summary(USER_EMAIL)
+    durations["dashboard"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    await server.global_search("transaction", make_request(), Response(), type=None, prev_q=None, page=1, page_size=10)
+    durations["search"] = (time.perf_counter() - start) * 1000
+
+    # delete-all needs an authenticated user: run its query set on a small seeded user
+    await seed(DELETE_USER_EMAIL, 200)
+    start = time.perf_counter()
+    await server.gather_queries({
+        name: server.db[name].delete_many({"user_email": DELETE_USER_EMAIL})
+        for name in server.USER_DATA_COLLECTIONS
+    })
+    durations["delete_all"] = (time.perf_counter() - start) * 1000
+    return durations
+
+
+def percentiles(timings):
+    timings = sorted(timings)
+    return statistics.median(timings), timings[max(int(len(timings) * 0.95) - 1, 0)]
+
+
+async def measure(name, iterations):
+    samples = {}
+    for _ in range(iterations):
+        for handler, duration in (await run_handlers()).items():
+            samples.setdefault(handler, []).append(duration)
+    results = {}
+    for handler, timings in samples.items():
+        results[handler] = percentiles(timings)
+        log(f"{name} {handler:<10}: p50 {results[handler][0]:.2f}ms, p95 {results[handler][1]:.2f}ms")
+    return results
+
+
+async def main(args):
+    await server.client.drop_database(server.db.name)
+    try:
+        await server.ensure_indexes()
+        log(f"Seeding {args.transactions} transactions")
+        await seed(USER_EMAIL, args.transactions)
+        await server.ensure_monthly_rollups(USER_EMAIL)
+
+        gather_queries = server.gather_queries
+        await run_handlers()  # warm up
+
+        server.gather_queries = sequential_queries
+        before = await measure("BEFORE (sequential)", args.iterations)
+        server.gather_queries = gather_queries
+        after = await measure("AFTER  (concurrent)", args.iterations)
+
+        for handler in before:
+            log(f"{handler}: p50 speedup {before[handler][0] / after[handler][0]:.2f}x, "
+                f"p95 speedup {before[handler][1] / after[handler][1]:.2f}x")
+        return 0
+    finally:
+        await server.client.drop_database(server.db.name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transactions", type=int, default=20000)
+    parser.add_argument("--iterations", type=int, default=50)
+    try:
+        sys.exit(asyncio.run(main(parser.parse_args())))
+    finally:
+        server.client.close()
@@ -1,4 +1,4 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import "@/App.css";
 import { 
   PiggyBank, LayoutDashboard, Wallet, ArrowRightLeft, TrendingUp, TrendingDown,
@@ -11,7 +11,7 @@ import { Pie, Bar, Line } from 'react-chartjs-2';
 import { 
   accountsAPI, transactionsAPI, investmentsAPI, goalsAPI, debtsAPI, 
   receivablesAPI, productsAPI, shoppingListsAPI, bankConnectionsAPI, 
-  dashboardAPI, dataAPI, categoriesAPI, searchAPI, preferencesAPI
+  dashboardAPI, dataAPI, categoriesAPI, searchAPI, preferencesAPI, syncAPI
 } from './services/api';
 import AuthButton from './components/AuthButton';
 import LoginRequired from './components/LoginRequired';
@@ -76,6 +76,8 @@ function App() {
   const [showCSVImporter, setShowCSVImporter] = useState(false);
   const [sidebarOpen, setSidebarOpen] = useState(true);
   const [linkTransactionModal, setLinkTransactionModal] = useState({ show: false, transaction: null });
+  // Data version of the synced collections; 0 until the first full sync
+  const syncVersion = useRef(0);
 
   // Load all data AFTER authentication is confirmed
   useEffect(() => {
@@ -94,6 +96,38 @@ function App() {
     };
   }, []);
 
+  // Fetch only what changed since the last sync and merge it into state
+  const syncData = async () => {
+    const { data } = await syncAPI.get(syncVersion.current);
+    const setters = {
+      accounts: setAccounts,
+      transactions: setTransactions,
+      investments: setInvestments,
+      goals: setGoals,
+      debts: setDebts,
+      receivables: setReceivables,
+      categories: setCategories,
+    };
+    Object.entries(setters).forEach(([name, setItems]) => {
+      const changed = data.changed[name] || [];
+      const deleted = data.deleted[name] || [];
+      if (data.full) {
+        setItems(changed);
+        return;
+      }
+      if (!changed.length && !deleted.length) return;
+      setItems(items => {
+        const removed = new Set([...deleted, ...changed.map(item => item.id)]);
+        const merged = [...items.filter(item => !removed.has(item.id)), ...changed];
+        if (name === 'transactions') {
+          merged.sort((a, b) => new Date(b.date) - new Date(a.date));
+        }
+        return merged;
+      });
+    });
+    syncVersion.current = data.version;
+  };
+
   const loadAllData = async () => {
     setLoading(true);
     try {
@@ -108,34 +142,19 @@ function App() {
       }
       
       const [
-        accountsRes, transactionsRes, investmentsRes, goalsRes, debtsRes,
-        receivablesRes, productsRes, shoppingListsRes, bankConnectionsRes, 
-        dashboardRes, categoriesRes
+        productsRes, shoppingListsRes, bankConnectionsRes, dashboardRes
       ] = await Promise.all([
-        accountsAPI.getAll(),
-        transactionsAPI.getAll({ limit: 10000 }),
-        investmentsAPI.getAll(),
-        goalsAPI.getAll(),
-        debtsAPI.getAll(),
-        receivablesAPI.getAll(),
         productsAPI.getAll(),
         shoppingListsAPI.getAll(),
         bankConnectionsAPI.getAll(),
         dashboardAPI.getSummary(),
-        categoriesAPI.getAll()
+        syncData()
       ]);
 
-      setAccounts(accountsRes.data);
-      setTransactions(transactionsRes.data);
-      setInvestments(investmentsRes.data);
-      setGoals(goalsRes.data);
-      setDebts(debtsRes.data);
-      setReceivables(receivablesRes.data);
       setProducts(productsRes.data);
       setShoppingLists(shoppingListsRes.data);
       setBankConnections(bankConnectionsRes.data);
       setDashboardData(dashboardRes.data);
-      setCategories(categoriesRes.data);
     } catch (error) {
       console.error('Error loading data:', error);
     } finally {
@@ -291,9 +310,9 @@ function App() {
   // Export/Import handlers
   const handleExport = async () => {
     try {
+      // The server streams the backup file; save it as is
       const response = await dataAPI.exportAll();
-      const blob = new Blob([JSON.stringify(response.data, null, 2)], { type: 'application/json' });
-      const url = window.URL.createObjectURL(blob);
+      const url = window.URL.createObjectURL(response.data);
       const a = document.createElement('a');
       a.href = url;
       a.download = `financeapp-backup-${new Date().toISOString()}.json`;
@@ -306,19 +325,14 @@ function App() {
   const handleImport = async (event) => {
     const file = event.target.files[0];
     if (file) {
-      const reader = new FileReader();
-      reader.onload = async (e) => {
-        try {
-          const data = JSON.parse(e.target.result);
-          await dataAPI.importAll(data);
-          loadAllData();
-          alert('Données importées avec succès !');
-        } catch (error) {
-          console.error('Error importing data:', error);
-          alert('Erreur lors de l\'importation');
-        }
-      };
-      reader.readAsText(file);
+      try {
+        await dataAPI.importAll(file);
+        loadAllData();
+        alert('Données importées avec succès !');
+      } catch (error) {
+        console.error('Error importing data:', error);
+        alert('Erreur lors de l\'importation');
+      }
     }
   };
 
@@ -399,7 +413,7 @@ function App() {
           <label className="w-full bg-gray-100 hover:bg-gray-200 text-gray-700 py-2 px-4 rounded-lg flex items-center justify-center space-x-2 cursor-pointer">
             <Upload size={18} />
             <span>Importer</span>
-            <input type="file" accept=".json" onChange={handleImport} className="hidden" />
+            <input type="file" accept=".json,.ndjson" onChange={handleImport} className="hidden" />
           </label>
         </div>
         
@@ -481,27 +495,26 @@ function App() {
               {currentView === 'tasks' && <EisenhowerMatrix />}
               {currentView === 'ocr' && <GranularOCRScanner onTransactionsImported={async (txns) => {
                 console.log('Importing transactions:', txns);
-                // Importer toutes les transactions
-                for (const txn of txns) {
-                  try {
-                    // Utiliser le premier compte disponible
-                    const accountId = accounts.length > 0 ? accounts[0].id : null;
-                    if (!accountId) {
-                      alert('Veuillez créer un compte avant d\'importer des transactions');
-                      break;
-                    }
-                    
-                    await transactionsAPI.create({
-                      ...txn,
-                      account_id: accountId,
-                      tags: txn.tags || [],
-                      is_recurring: false
-                    });
-                  } catch (error) {
-                    console.error('Erreur import transaction:', error);
-                  }
+                // Utiliser le premier compte disponible
+                const accountId = accounts.length > 0 ? accounts[0].id : null;
+                if (!accountId) {
+                  alert('Veuillez créer un compte avant d\'importer des transactions');
+                  return;
+                }
+                // Importer les transactions par lots (TRANSACTION_BATCH_MAX_ITEMS par requête)
+                try {
+                  const response = await transactionsAPI.createBatch(txns.map(txn => ({
+                    ...txn,
+                    account_id: accountId,
+                    tags: txn.tags || [],
+                    is_recurring: false
+                  })));
+                  const failed = response.data.results.filter(result => !['created', 'replayed'].includes(result.status));
+                  failed.forEach(result => console.error('Erreur import transaction:', result));
+                  alert(`${txns.length - failed.length} transactions importées avec succès!`);
+                } catch (error) {
+                  console.error('Erreur import transactions:', error);
                 }
-                alert(`${txns.length} transactions importées avec succès!`);
                 loadAllData();
               }} />}
               {currentView === 'projection' && <InvestmentProjection />}
@@ -696,25 +709,11 @@ function App() {
             </button>
             <div className="p-6">
               <CSVImporter
-                onImportComplete={async (transactions) => {
-                  // Import transactions to default account
-                  const defaultAccount = accounts[0];
-                  if (defaultAccount) {
-                    for (const txn of transactions) {
-                      await transactionsAPI.create({
-                        account_id: defaultAccount.id,
-                        type: txn.amount < 0 ? 'expense' : 'income',
-                        amount: Math.abs(txn.amount),
-                        category: txn.category,
-                        description: txn.description,
-                        date: new Date(txn.date).toISOString(),
-                        tags: [],
-                        is_recurring: false
-                      });
-                    }
-                    await loadAllData();
-                    setShowCSVImporter(false);
-                  }
+                accountId={accounts[0]?.id}
+                onImportComplete={async () => {
+                  // Transactions are imported into the default account
+                  await loadAllData();
+                  setShowCSVImporter(false);
                 }}
               />
             </div>
@@ -1,11 +1,17 @@
 import React, { useState } from 'react';
 import { Upload, FileText, CheckCircle, AlertCircle, Download } from 'lucide-react';
+import { accountsAPI, importJobsAPI } from '../services/api';
 
-const CSVImporter = ({ onImportComplete }) => {
+// Poll the import job every second for at most 30 minutes
+const JOB_POLL_INTERVAL_MS = 1000;
+const JOB_POLL_MAX_ATTEMPTS = 1800;
+
+const CSVImporter = ({ accountId, onImportComplete }) => {
   const [file, setFile] = useState(null);
   const [importing, setImporting] = useState(false);
   const [result, setResult] = useState(null);
   const [error, setError] = useState(null);
+  const [progress, setProgress] = useState(0);
 
   const handleFileChange = (e) => {
     const selectedFile = e.target.files[0];
@@ -19,74 +25,44 @@ const CSVImporter = ({ onImportComplete }) => {
     }
   };
 
-  const parseCSV = (text) => {
-    const lines = text.split('\n').filter(line => line.trim());
-    if (lines.length < 2) return [];
-    
-    // Assume first line is header
-    const headers = lines[0].split(';').map(h => h.trim().toLowerCase());
-    
-    const transactions = [];
-    for (let i = 1; i < lines.length; i++) {
-      const values = lines[i].split(';').map(v => v.trim());
-      
-      // Try to find date, description, amount columns
-      let date, description, amount;
-      
-      // Common French bank CSV formats
-      headers.forEach((header, idx) => {
-        if (header.includes('date')) date = values[idx];
-        if (header.includes('libelle') || header.includes('description') || header.includes('motif')) {
-          description = values[idx];
-        }
-        if (header.includes('montant') || header.includes('debit') || header.includes('credit')) {
-          amount = values[idx];
-        }
-      });
-      
-      if (date && amount) {
-        // Parse amount (handle French format with comma)
-        let parsedAmount = parseFloat(amount.replace(',', '.').replace(/[^\d.-]/g, ''));
-        
-        if (!isNaN(parsedAmount)) {
-          transactions.push({
-            date: date,
-            description: description || 'Transaction importée',
-            amount: parsedAmount,
-            category: 'Divers'
-          });
-        }
-      }
+  const waitForJob = async (jobId) => {
+    // The server parses and imports the file in the background
+    for (let attempt = 0; attempt < JOB_POLL_MAX_ATTEMPTS; attempt++) {
+      const { data: job } = await importJobsAPI.get(jobId);
+      setProgress(job.bytes_total ? Math.round((job.bytes_read / job.bytes_total) * 100) : 0);
+      if (job.status !== 'running') return job;
+      await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
     }
-    
-    return transactions;
+    throw new Error('L\'import prend trop de temps, vérifiez vos transactions plus tard');
   };
 
   const handleImport = async () => {
-    if (!file) return;
+    if (!file || !accountId) return;
     
     setImporting(true);
     setError(null);
+    setProgress(0);
     
     try {
-      // Read file
-      const text = await file.text();
+      const { data } = await accountsAPI.importCSV(accountId, file);
+      const job = await waitForJob(data.job_id);
       
-      // Parse CSV
-      const transactions = parseCSV(text);
-      
-      if (transactions.length === 0) {
+      if (job.status === 'failed') {
+        throw new Error(job.error || 'Erreur lors de l\'import du fichier CSV');
+      }
+      if (job.imported_count === 0 && job.skipped_count === 0) {
         throw new Error('Aucune transaction valide trouvée dans le fichier CSV');
       }
       
-      // Call parent callback with parsed transactions
       if (onImportComplete) {
-        await onImportComplete(transactions);
+        await onImportComplete(job);
       }
       
       setResult({
         success: true,
-        count: transactions.length
+        count: job.imported_count,
+        skipped: job.skipped_count,
+        invalid: job.invalid_count
       });
       
       // Reset after 3 seconds
@@ -97,7 +73,7 @@ const CSVImporter = ({ onImportComplete }) => {
       
     } catch (err) {
       console.error('Erreur import CSV:', err);
-      setError(err.message || 'Erreur lors de l\'import du fichier CSV');
+      setError(err.response?.data?.detail || err.message || 'Erreur lors de l\'import du fichier CSV');
     } finally {
       setImporting(false);
     }
@@ -140,7 +116,7 @@ const CSVImporter = ({ onImportComplete }) => {
               {file ? file.name : 'Cliquez pour uploader un fichier CSV'}
             </p>
             <p className="text-sm text-gray-500">
-              Format CSV avec séparateur point-virgule (;)
+              Relevés CSV (séparateur ; ou ,), formats suisses et français
             </p>
           </label>
 
@@ -170,7 +146,7 @@ const CSVImporter = ({ onImportComplete }) => {
                 {importing ? (
                   <>
                     <div className="animate-spin rounded-full h-5 w-5 border-2 border-white border-t-transparent"></div>
-                    <span>Import en cours...</span>
+                    <span>Import en cours... {progress}%</span>
                   </>
                 ) : (
                   <>
@@ -188,9 +164,9 @@ const CSVImporter = ({ onImportComplete }) => {
               Votre fichier CSV doit contenir au minimum les colonnes suivantes:
             </p>
             <ul className="text-sm text-gray-600 space-y-1 mb-4">
-              <li>• <strong>date</strong>: Date de la transaction (format: YYYY-MM-DD ou DD/MM/YYYY)</li>
+              <li>• <strong>date</strong>: Date de la transaction (format: YYYY-MM-DD, DD.MM.YYYY ou DD/MM/YYYY)</li>
               <li>• <strong>description</strong> ou <strong>libelle</strong>: Description de la transaction</li>
-              <li>• <strong>montant</strong>: Montant (négatif pour dépense, positif pour revenu)</li>
+              <li>• <strong>montant</strong>: Montant (négatif pour dépense, positif pour revenu), ou colonnes <strong>débit</strong> / <strong>crédit</strong></li>
             </ul>
             <button
               onClick={downloadTemplate}
@@ -211,6 +187,11 @@ const CSVImporter = ({ onImportComplete }) => {
             <p className="text-gray-600 mb-4">
               {result.count} transaction(s) ont été importées avec succès
             </p>
+            {(result.skipped > 0 || result.invalid > 0) && (
+              <p className="text-sm text-gray-500 mb-4">
+                {result.skipped} doublon(s) ignoré(s), {result.invalid} ligne(s) invalide(s)
+              </p>
+            )}
             <button
               onClick={() => {
                 setFile(null);
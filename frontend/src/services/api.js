@@ -19,6 +19,37 @@ export const accountsAPI = {
   create: (data) => api.post('/accounts', data),
   update: (id, data) => api.put(`/accounts/${id}`, data),
   delete: (id) => api.delete(`/accounts/${id}`),
+  importCSV: (id, file, options = {}) => {
+    const form = new FormData();
+    form.append('file', file);
+    Object.entries(options).forEach(([key, value]) => form.append(key, value));
+    return api.post(`/accounts/${id}/import-csv`, form, {
+      headers: { 'Content-Type': 'multipart/form-data' },
+    });
+  },
+};
+
+// Background import jobs
+export const importJobsAPI = {
+  get: (id) => api.get(`/import-jobs/${id}`),
+};
+
+// Items per batch request: TRANSACTION_BATCH_MAX_ITEMS on the backend
+const TRANSACTION_BATCH_MAX_ITEMS = Number(process.env.REACT_APP_TRANSACTION_BATCH_MAX_ITEMS) || 500;
+
+// Send items in requests of at most TRANSACTION_BATCH_MAX_ITEMS, one after
+// the other, and merge their per-item results as if from a single request
+const inBatches = async (items, send) => {
+  const results = [];
+  const counts = {};
+  for (let start = 0; start < items.length; start += TRANSACTION_BATCH_MAX_ITEMS) {
+    const response = await send(items.slice(start, start + TRANSACTION_BATCH_MAX_ITEMS));
+    response.data.results.forEach((result) => {
+      results.push({ ...result, index: result.index + start });
+      counts[result.status] = (counts[result.status] || 0) + 1;
+    });
+  }
+  return { data: { results, counts } };
 };
 
 // Transactions
@@ -28,6 +59,10 @@ export const transactionsAPI = {
   create: (data) => api.post('/transactions', data),
   update: (id, data) => api.put(`/transactions/${id}`, data),
   delete: (id) => api.delete(`/transactions/${id}`),
+  // Batch writes return a per-item { index, status, id, error } result, for any number of items
+  createBatch: (items) => inBatches(items, (chunk) => api.post('/transactions/batch', { items: chunk })),
+  updateBatch: (items) => inBatches(items, (chunk) => api.put('/transactions/batch', { items: chunk })),
+  deleteBatch: (ids) => inBatches(ids, (chunk) => api.delete('/transactions/batch', { data: { ids: chunk } })),
 };
 
 // Investments
@@ -156,10 +191,19 @@ export const transfersAPI = {
     }),
 };
 
+// Incremental sync: changes since a data version (0 for a full snapshot)
+export const syncAPI = {
+  get: (since) => api.get('/sync', { params: { since } }),
+};
+
 // Data Export/Import
 export const dataAPI = {
-  exportAll: () => api.get('/export/all'),
-  importAll: (data) => api.post('/import/all', data),
+  exportAll: (params) => api.get('/export/all', { params, responseType: 'blob' }),
+  // Send the backup file as is: the server parses it as a stream
+  importAll: (file, params) => api.post('/import/all', file, {
+    params,
+    headers: { 'Content-Type': file.name?.endsWith('.ndjson') ? 'application/x-ndjson' : 'application/json' },
+  }),
   deleteAllUserData: () => api.delete('/user/data/all'),
 };
 
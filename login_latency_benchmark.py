@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Login Latency Benchmark for FinanceApp
+Compares Emergent Auth session-data lookups through the shared pooled httpx
+client (auth.get_session_data) with a fresh client per request
+
+BEFORE: a new httpx.AsyncClient per login, i.e. a new TCP connection each time
+AFTER:  the shared client opened on startup, reusing one keep-alive connection
+
+Runs offline against the local Emergent Auth stub used by the test suite.
+
+Usage:
+    python login_latency_benchmark.py [--logins 200]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import httpx
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'financeapp_benchmark')
+
+import auth  # noqa: E402
+from tests.conftest import EmergentAuthStub  # noqa: E402
+
+
+def log(message, level="INFO"):
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] {level}: {message}")
+
+
+async def pooled(logins):
+    await auth.init_http_client()
+    try:
+        timings = []
+        for i in range(logins):
+            start = time.perf_counter()
+            await auth.get_session_data(f"pooled{i}")
+            timings.append(time.perf_counter() - start)
+        return timings
+    finally:
+        await auth.close_http_client()
+
+
+async def per_request(url, logins):
+    timings = []
+    for i in range(logins):
+        start = time.perf_counter()
+        async with httpx.AsyncClient() as client:
+            response = await client.get(url, headers={"X-Session-ID": f"fresh{i}"})
+            response.raise_for_status()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(name, timings, connections):
+    ordered = sorted(timings)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    log(f"{name:<20} median {statistics.median(timings) * 1000:7.2f}ms  p95 {p95 * 1000:7.2f}ms  "
+        f"over {connections} connection(s)")
+
+
+def main(args):
+    stub = EmergentAuthStub()
+    stub.start()
+    auth.EMERGENT_AUTH_API = stub.url
+    try:
+        log(f"{args.logins} sequential logins against {stub.url}")
+        fresh_timings = asyncio.run(per_request(stub.url, args.logins))
+        report("per-request client", fresh_timings, len(stub.connections))
+        stub.connections.clear()
+        pooled_timings = asyncio.run(pooled(args.logins))
+        report("pooled client", pooled_timings, len(stub.connections))
+        speedup = statistics.median(fresh_timings) / statistics.median(pooled_timings)
+        log(f"pooled client is {speedup:.1f}x faster at the median")
+    finally:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    main(parser.parse_args())
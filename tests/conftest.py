@@ -0,0 +1,110 @@
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# server.py / auth.py read these at import time
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "financeapp_test")
+
+
+class EmergentAuthStub:
+    """Local stand-in for the Emergent Auth session-data endpoint"""
+
+    def __init__(self):
+        self.requests = 0
+        self.connections = set()
+        self.fail_next = 0  # number of upcoming requests answered with 503
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                    stub.connections.add(self.client_address)
+                    failing = stub.fail_next > 0
+                    if failing:
+                        stub.fail_next -= 1
+
+                session_id = self.headers.get("X-Session-ID")
+                if failing:
+                    status, payload = 503, {"detail": "unavailable"}
+                elif not session_id or session_id == "invalid":
+                    status, payload = 404, {"detail": "session not found"}
+                else:
+                    status, payload = 200, {
+                        "id": f"user-{session_id}",
+                        "email": f"{session_id}@example.com",
+                        "name": "Stub User",
+                        "picture": None,
+                        "session_token": f"token-{session_id}",
+                    }
+
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/auth/v1/env/oauth/session-data"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def emergent_auth_stub(monkeypatch):
+    """Point auth.get_session_data at a local stub server"""
+    import auth
+
+    stub = EmergentAuthStub()
+    stub.start()
+    monkeypatch.setattr(auth, "EMERGENT_AUTH_API", stub.url)
+    monkeypatch.setattr(auth, "EMERGENT_AUTH_BACKOFF", 0.01)
+    yield stub
+    stub.stop()
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """TestClient for the API over an in-memory mongomock database, as the anonymous user.
+
+    Startup (index builds, migrations) does not run, and mongomock has no
+    sessions, so writes take the non-transactional paths. In-process caches
+    start empty: data versions restart at 0 with every database.
+    """
+    from fastapi.testclient import TestClient
+    from mongomock_motor import AsyncMongoMockClient
+
+    import server
+    from cache import LRUCacheBackend, VersionedResultCache
+    from search_index import PrefixIndexRegistry
+
+    client = AsyncMongoMockClient()
+    monkeypatch.setattr(server, "client", client)
+    monkeypatch.setattr(server, "db", client[os.environ["DB_NAME"]])
+    monkeypatch.setattr(server, "mongo_transactions_supported", False)
+    monkeypatch.setattr(server, "dashboard_cache", VersionedResultCache("dashboard", LRUCacheBackend(maxsize=10)))
+    monkeypatch.setattr(server, "search_indexes", PrefixIndexRegistry(10, server.search_indexes.types))
+    return TestClient(server.app)
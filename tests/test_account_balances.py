@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def accounts(api):
+    return [
+        api.post("/api/accounts", json={"name": name, "currency": "CHF", "initial_balance": initial}).json()
+        for name, initial in (("Compte courant", 1000), ("Épargne", 5000))
+    ]
+
+
+def transaction(account, amount, type="expense", **extra):
+    return {
+        "account_id": account["id"], "type": type, "amount": amount, "category": "Divers",
+        "description": "Test", "date": "2025-03-01T10:00:00+00:00", **extra
+    }
+
+
+def stored(account):
+    row = asyncio.run(server.db.account_balances.find_one({"account_id": account["id"]}, {"_id": 0}))
+    return {field: row.get(field, 0) for field in server.BALANCE_TOTAL_FIELDS}
+
+
+def balances(api):
+    return {acc["name"]: acc["current_balance"] for acc in api.get("/api/accounts").json()}
+
+
+def assert_matches_history(accounts):
+    """The materialized rows equal the totals replayed from transaction history"""
+    report = asyncio.run(server.rebuild_account_balances("anonymous", repair=False))
+    assert report["drifted"] == []
+    computed = asyncio.run(server.compute_account_totals("anonymous"))
+    for account in accounts:
+        expected = computed.get(account["id"], server.empty_balance_totals())
+        assert stored(account) == pytest.approx(expected)
+
+
+def test_new_account_starts_with_empty_totals(api, accounts):
+    assert stored(accounts[0]) == server.empty_balance_totals()
+    assert balances(api) == {"Compte courant": 1000, "Épargne": 5000}
+
+
+def test_create_adds_to_the_account_totals(api, accounts):
+    api.post("/api/transactions", json=transaction(accounts[0], 40))
+    api.post("/api/transactions", json=transaction(accounts[0], 100, type="income"))
+    assert stored(accounts[0])["expense"] == pytest.approx(40)
+    assert stored(accounts[0])["income"] == pytest.approx(100)
+    assert balances(api)["Compte courant"] == pytest.approx(1060)
+    assert_matches_history(accounts)
+
+
+def test_update_moves_the_amount_between_accounts(api, accounts):
+    txn = api.post("/api/transactions", json=transaction(accounts[0], 40)).json()
+    api.put(f"/api/transactions/{txn['id']}", json=transaction(accounts[1], 65))
+    assert stored(accounts[0])["expense"] == pytest.approx(0)
+    assert stored(accounts[1])["expense"] == pytest.approx(65)
+    assert balances(api) == pytest.approx({"Compte courant": 1000, "Épargne": 4935})
+    assert_matches_history(accounts)
+
+
+def test_update_changing_type_swaps_totals(api, accounts):
+    txn = api.post("/api/transactions", json=transaction(accounts[0], 40)).json()
+    api.put(f"/api/transactions/{txn['id']}", json=transaction(accounts[0], 40, type="income"))
+    assert stored(accounts[0])["expense"] == pytest.approx(0)
+    assert stored(accounts[0])["income"] == pytest.approx(40)
+    assert_matches_history(accounts)
+
+
+def test_delete_reverses_the_transaction(api, accounts):
+    txn = api.post("/api/transactions", json=transaction(accounts[0], 40)).json()
+    api.delete(f"/api/transactions/{txn['id']}")
+    assert stored(accounts[0]) == pytest.approx(server.empty_balance_totals())
+    assert balances(api)["Compte courant"] == pytest.approx(1000)
+
+
+def test_batch_writes_keep_totals_in_step(api, accounts):
+    created = api.post("/api/transactions/batch", json={"items": [
+        transaction(accounts[0], 10), transaction(accounts[0], 20), transaction(accounts[1], 300, type="income"),
+    ]}).json()
+    ids = [result["id"] for result in created["results"]]
+    assert_matches_history(accounts)
+
+    api.put("/api/transactions/batch", json={"items": [{**transaction(accounts[1], 15), "id": ids[0]}]})
+    assert_matches_history(accounts)
+
+    api.request("DELETE", "/api/transactions/batch", json={"ids": ids[1:]})
+    assert_matches_history(accounts)
+    assert balances(api) == pytest.approx({"Compte courant": 1000, "Épargne": 4985})
+
+
+def test_rebuild_repairs_drifted_rows(api, accounts):
+    api.post("/api/transactions", json=transaction(accounts[0], 40))
+    asyncio.run(server.db.account_balances.update_one(
+        {"account_id": accounts[0]["id"]}, {"$inc": {"expense": 999}}
+    ))
+    asyncio.run(server.db.account_balances.delete_one({"account_id": accounts[1]["id"]}))
+
+    report = asyncio.run(server.rebuild_account_balances("anonymous"))
+    assert {row["account_id"] for row in report["drifted"]} == {accounts[0]["id"], accounts[1]["id"]}
+    assert stored(accounts[0])["expense"] == pytest.approx(40)
+    assert stored(accounts[1]) == server.empty_balance_totals()
+    assert_matches_history(accounts)
+
+
+def test_account_without_a_balance_row_reads_as_empty(api, accounts):
+    asyncio.run(server.db.account_balances.delete_one({"account_id": accounts[0]["id"]}))
+    assert balances(api)["Compte courant"] == pytest.approx(1000)
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import auth
+
+
+def run(coro):
+    async def wrapper():
+        await auth.init_http_client()
+        try:
+            return await coro
+        finally:
+            await auth.close_http_client()
+    return asyncio.run(wrapper())
+
+
+def test_get_session_data_returns_user(emergent_auth_stub):
+    data = run(auth.get_session_data("alice"))
+    assert data["email"] == "alice@example.com"
+    assert data["session_token"] == "token-alice"
+
+
+def test_invalid_session_is_not_retried(emergent_auth_stub):
+    with pytest.raises(HTTPException) as exc:
+        run(auth.get_session_data("invalid"))
+    assert exc.value.status_code == 401
+    assert emergent_auth_stub.requests == 1
+
+
+def test_server_errors_are_retried(emergent_auth_stub):
+    emergent_auth_stub.fail_next = auth.EMERGENT_AUTH_RETRIES
+    data = run(auth.get_session_data("bob"))
+    assert data["email"] == "bob@example.com"
+    assert emergent_auth_stub.requests == auth.EMERGENT_AUTH_RETRIES + 1
+
+
+def test_server_errors_give_up_after_retries(emergent_auth_stub):
+    emergent_auth_stub.fail_next = auth.EMERGENT_AUTH_RETRIES + 1
+    with pytest.raises(HTTPException) as exc:
+        run(auth.get_session_data("carol"))
+    assert exc.value.status_code == 401
+
+
+def test_logins_reuse_the_shared_client(emergent_auth_stub, monkeypatch):
+    created = []
+    create = auth.create_http_client
+    monkeypatch.setattr(auth, "create_http_client", lambda: created.append(create()) or created[-1])
+
+    async def logins():
+        for i in range(5):
+            await auth.get_session_data(f"user{i}")
+        return auth.get_http_client()
+    client = run(logins())
+
+    assert emergent_auth_stub.requests == 5
+    assert created == [client]
+    assert client.is_closed
@@ -0,0 +1,168 @@
+import asyncio
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def account(api):
+    return api.post("/api/accounts", json={"name": "Compte courant", "currency": "CHF", "initial_balance": 0}).json()
+
+
+@pytest.fixture
+def upload(api, account, monkeypatch):
+    """Upload a CSV to the account and run its import job to completion; returns the finished job.
+
+    The TestClient runs each request on its own event loop, which would drop
+    the background task, so the job is captured and run here instead.
+    """
+    run_job = server.run_csv_import_job
+    jobs = []
+
+    async def capture(*args):
+        jobs.append(args)
+    monkeypatch.setattr(server, "run_csv_import_job", capture)
+
+    def upload(content, encoding="utf-8", **form):
+        data = content.encode(encoding) if isinstance(content, str) else content
+        response = api.post(
+            f"/api/accounts/{account['id']}/import-csv",
+            files={"file": ("releve.csv", data, "text/csv")}, data=form
+        )
+        assert response.status_code == 202, response.text
+        asyncio.run(run_job(*jobs.pop()))
+        return api.get(f"/api/import-jobs/{response.json()['job_id']}").json()
+    return upload
+
+
+def imported(api):
+    return sorted(
+        ((t["date"][:10], t["type"], t["amount"], t["description"]) for t in api.get("/api/transactions").json()),
+    )
+
+
+def test_header_is_found_below_the_account_details(api, upload):
+    job = upload(
+        "Compte;CH93 0076 2011 6238 5295 7\n"
+        "Période;01.03.2025 - 31.03.2025\n"
+        "\n"
+        "Date comptable;Libellé;Montant;Solde\n"
+        "01.03.2025;Migros Zürich;-45.80;954.20\n"
+        "02.03.2025;Salaire;2500.00;3454.20\n"
+    )
+    assert job["status"] == "completed"
+    assert job["rows_read"] == 2
+    assert job["imported_count"] == 2
+    assert imported(api) == [
+        ("2025-03-01", "expense", 45.8, "Migros Zürich"),
+        ("2025-03-02", "income", 2500.0, "Salaire"),
+    ]
+
+
+def test_file_without_a_header_fails_the_job(api, upload):
+    job = upload("".join(f"ligne {i};texte\n" for i in range(server.CSV_HEADER_SCAN_ROWS + 5)))
+    assert job["status"] == "failed"
+    assert "No header" in job["error"]
+    assert imported(api) == []
+
+
+def test_windows_1252_files_are_decoded(api, upload):
+    job = upload("Date;Détails;Débit;Crédit\n03.03.2025;Café Crème;4.50;\n", encoding="cp1252")
+    assert job["imported_count"] == 1
+    assert imported(api) == [("2025-03-03", "expense", 4.5, "Café Crème")]
+
+
+def test_debit_and_credit_columns_give_the_sign(api, upload):
+    job = upload(
+        "Buchungsdatum,Buchungstext,Belastung,Gutschrift\n"
+        "04.03.2025,Coop,12.30,\n"
+        "05.03.2025,Rückerstattung,,80.00\n"
+    )
+    assert job["imported_count"] == 2
+    assert imported(api) == [
+        ("2025-03-04", "expense", 12.3, "Coop"),
+        ("2025-03-05", "income", 80.0, "Rückerstattung"),
+    ]
+
+
+@pytest.mark.parametrize("text, amount", [
+    ("1'234.50", 1234.5),
+    ("-1'234.50", -1234.5),
+    ("1 234,50", 1234.5),
+    ("-45,80 €", -45.8),
+    ("1'000", 1000.0),
+    ("(12.00)", -12.0),
+])
+def test_parse_csv_amount(text, amount):
+    assert server.parse_csv_amount(text) == pytest.approx(amount)
+
+
+def test_swiss_amounts_are_imported(api, upload):
+    job = upload("Date;Description;Montant\n06.03.2025;Loyer;-1'850.00\n25.03.2025;Bonus;1'234.50\n")
+    assert job["imported_count"] == 2
+    assert imported(api) == [
+        ("2025-03-06", "expense", 1850.0, "Loyer"),
+        ("2025-03-25", "income", 1234.5, "Bonus"),
+    ]
+
+
+def test_uploading_the_same_statement_again_skips_every_row(api, upload):
+    # The unique index from INDEX_SPECS rejects the repeats (every row here has a fingerprint;
+    # mongomock would ignore the partial filter on the other unique indexes)
+    asyncio.run(server.db.transactions.create_index([("user_email", 1), ("fingerprint", 1)], unique=True))
+    statement = "Date;Description;Montant\n07.03.2025;Migros;-20.00\n08.03.2025;Coop;-35.10\n"
+    assert upload(statement)["imported_count"] == 2
+
+    job = upload(statement)
+    assert job["status"] == "completed"
+    assert job["imported_count"] == 0
+    assert job["skipped_count"] == 2
+    assert len(imported(api)) == 2
+
+
+def test_lines_matching_manual_entries_are_skipped(api, account, upload):
+    api.post("/api/transactions", json={
+        "account_id": account["id"], "type": "expense", "amount": 20, "category": "Alimentation",
+        "description": "Migros", "date": "2025-03-07T00:00:00"
+    })
+    job = upload("Date;Description;Montant\n07.03.2025;Migros;-20.00\n08.03.2025;Coop;-35.10\n")
+    assert job["imported_count"] == 1
+    assert job["skipped_count"] == 1
+    assert [t[3] for t in imported(api)] == ["Migros", "Coop"]
+
+
+def test_invalid_rows_are_reported_and_the_rest_imported(api, upload):
+    job = upload(
+        "Date;Description;Montant\n"
+        "09.03.2025;Migros;-20.00\n"
+        "le 10 mars;Coop;-35.10\n"
+        "11.03.2025;Sans montant;\n"
+        "\n"
+        "12.03.2025;Pharmacie;-18.40\n"
+    )
+    assert job["status"] == "completed"
+    assert job["imported_count"] == 2
+    assert job["invalid_count"] == 2
+    assert job["errors"] == [
+        {"row": 3, "error": "unrecognized date 'le 10 mars'"},
+        {"row": 4, "error": "missing amount"},
+    ]
+    assert [t[3] for t in imported(api)] == ["Migros", "Pharmacie"]
+
+
+def test_mapping_names_the_columns(api, upload):
+    job = upload(
+        "Jour|Quoi|Combien\n2025-03-13|Marché|-9.90\n",
+        delimiter="|", mapping='{"date": "Jour", "description": "Quoi", "amount": "Combien"}'
+    )
+    assert job["imported_count"] == 1
+    assert imported(api) == [("2025-03-13", "expense", 9.9, "Marché")]
+
+
+def test_unknown_mapping_fields_are_rejected(api, account):
+    response = api.post(
+        f"/api/accounts/{account['id']}/import-csv",
+        files={"file": ("releve.csv", b"Date;Montant\n", "text/csv")}, data={"mapping": '{"solde": "Solde"}'}
+    )
+    assert response.status_code == 400
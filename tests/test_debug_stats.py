@@ -0,0 +1,22 @@
+import server
+
+
+def test_auth_debug_does_not_expose_process_stats(api):
+    body = api.get("/api/auth/debug").json()
+    assert body["authenticated"] is False
+    assert not {"session_cache", "dashboard_cache", "search_indexes", "exchange_rates"} & set(body)
+
+
+def test_stats_are_hidden_unless_enabled(api):
+    assert api.get("/api/debug/stats").status_code == 404
+
+
+def test_stats_require_a_signed_in_user(api, monkeypatch):
+    monkeypatch.setattr(server, "DEBUG_STATS", True)
+    assert api.get("/api/debug/stats").status_code == 401
+
+    async def signed_in(request, db):
+        return {"email": "admin@example.com"}
+    monkeypatch.setattr(server, "get_current_user", signed_in)
+    body = api.get("/api/debug/stats").json()
+    assert set(body) == {"session_cache", "dashboard_cache", "search_indexes", "exchange_rates"}
@@ -0,0 +1,87 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import server
+
+
+def create_account(api, name, initial_balance=0):
+    return api.post("/api/accounts", json={"name": name, "currency": "CHF", "initial_balance": initial_balance}).json()
+
+
+def export(api, **params):
+    response = api.get("/api/export/all", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_full_export_has_every_document_and_a_checkpoint(api):
+    first = create_account(api, "Compte courant")
+    second = create_account(api, "Épargne")
+    body = export(api)
+    assert body["full"] is True
+    assert {acc["id"] for acc in body["accounts"]} == {first["id"], second["id"]}
+    assert body["checkpoint"] == 2
+    assert body["deleted"] == {}
+
+
+def test_incremental_export_includes_updates_and_deletions(api):
+    kept = create_account(api, "Compte courant")
+    renamed = create_account(api, "Épargne")
+    removed = create_account(api, "Revolut")
+    checkpoint = export(api)["checkpoint"]
+
+    api.put(f"/api/accounts/{renamed['id']}", json={"name": "Épargne 3a", "currency": "CHF"})
+    api.delete(f"/api/accounts/{removed['id']}")
+    added = create_account(api, "Compte EUR")
+
+    body = export(api, since=checkpoint)
+    assert body["full"] is False
+    assert sorted(acc["name"] for acc in body["accounts"]) == ["Compte EUR", "Épargne 3a"]
+    assert kept["id"] not in {acc["id"] for acc in body["accounts"]}
+    assert body["deleted"] == {"accounts": [removed["id"]]}
+    assert body["checkpoint"] > checkpoint
+    assert added["id"] in {acc["id"] for acc in body["accounts"]}
+
+    assert export(api, since=body["checkpoint"])["accounts"] == []
+
+
+def test_incremental_ndjson_lists_deletions_in_the_trailer(api):
+    account = create_account(api, "Compte courant")
+    checkpoint = export(api)["checkpoint"]
+    api.delete(f"/api/accounts/{account['id']}")
+
+    lines = api.get("/api/export/all", params={"format": "ndjson", "since": checkpoint}).text.splitlines()
+    trailer = json.loads(lines[-1])
+    assert trailer["full"] is False
+    assert trailer["deleted"] == {"accounts": [account["id"]]}
+    assert trailer["counts"]["accounts"] == 0
+
+
+def test_checkpoint_not_covered_by_change_log_exports_in_full(api):
+    create_account(api, "Compte courant")
+    checkpoint = export(api)["checkpoint"]
+    create_account(api, "Épargne")
+    create_account(api, "Revolut")
+
+    # The entry after the checkpoint expired
+    async def expire():
+        await server.db.change_log.delete_one({"version": checkpoint + 1})
+        await server.db.change_log.update_many({}, {"$set": {"at": datetime.now(timezone.utc) - timedelta(days=1)}})
+    asyncio.run(expire())
+
+    response = api.get("/api/export/all", params={"since": checkpoint})
+    assert response.headers["X-Export-Full"] == "true"
+    assert response.json()["full"] is True
+    assert len(response.json()["accounts"]) == 3
+
+
+def test_import_refuses_incremental_export(api):
+    create_account(api, "Compte courant")
+    checkpoint = export(api)["checkpoint"]
+    create_account(api, "Épargne")
+    delta = api.get("/api/export/all", params={"since": checkpoint}).content
+
+    response = api.post("/api/import/all", content=delta, headers={"Content-Type": "application/json"})
+    assert response.status_code == 400
+    assert len(api.get("/api/accounts").json()) == 2
@@ -0,0 +1,116 @@
+import asyncio
+
+import httpx
+import pytest
+
+import fx_rates
+from fx_rates import HTTPRateProvider, StaticRateProvider
+
+URL = "https://rates.example/latest"
+FALLBACK = {"EUR": 1.0, "CHF": 0.95, "USD": 1.10, "BTC": 0.000024}
+
+
+class RatesAPI:
+    """Answers rate requests from `rates`, or with `status` when it is set"""
+
+    def __init__(self):
+        self.rates = {"CHF": 0.93, "USD": 1.08}
+        self.status = None
+        self.requests = []
+
+    def handle(self, request):
+        self.requests.append(request)
+        if self.status:
+            return httpx.Response(self.status)
+        return httpx.Response(200, json={"base": "EUR", "rates": self.rates})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(fx_rates.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def rates_api():
+    return RatesAPI()
+
+
+@pytest.fixture
+def provider(rates_api, clock):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(rates_api.handle))
+    return HTTPRateProvider(URL, lambda: client, ttl=3600, retry_after=60, fallback=FALLBACK)
+
+
+def fetch(provider):
+    return asyncio.run(provider.fetch_rates())
+
+
+def test_static_cross_rates():
+    provider = StaticRateProvider(FALLBACK)
+    assert asyncio.run(provider.rate("CHF", "CHF")) == 1.0
+    assert asyncio.run(provider.rate("CHF", "USD")) == pytest.approx(1.10 / 0.95)
+    assert asyncio.run(provider.table("CHF"))["EUR"] == pytest.approx(1 / 0.95)
+    with pytest.raises(KeyError):
+        asyncio.run(provider.rate("CHF", "JPY"))
+
+
+def test_fetched_rates_overlay_the_fallback(provider, rates_api):
+    rates = fetch(provider)
+    assert rates == {"EUR": 1.0, "CHF": 0.93, "USD": 1.08, "BTC": 0.000024}
+    assert rates_api.requests[0].url.params["from"] == "EUR"
+    assert provider.stats()["fetched_at"] is not None
+
+
+def test_rates_are_cached_for_the_ttl(provider, rates_api, clock):
+    fetch(provider)
+    rates_api.rates = {"CHF": 0.90}
+    clock[0] += 3599
+    assert fetch(provider)["CHF"] == 0.93
+    assert provider.fetches == 1
+
+    clock[0] += 2
+    assert fetch(provider)["CHF"] == 0.90
+    assert provider.fetches == 2
+
+
+def test_concurrent_callers_share_one_fetch(provider, rates_api):
+    async def callers():
+        return await asyncio.gather(*(provider.rate("EUR", "CHF") for _ in range(10)))
+    assert asyncio.run(callers()) == [0.93] * 10
+    assert len(rates_api.requests) == 1
+
+
+def test_fallback_serves_until_the_first_fetch_succeeds(provider, rates_api, clock):
+    rates_api.status = 503
+    assert fetch(provider) == FALLBACK
+    assert provider.failures == 1
+
+    # Failures are retried after retry_after, not on every call
+    clock[0] += 59
+    fetch(provider)
+    assert provider.fetches == 1
+    rates_api.status = None
+    clock[0] += 2
+    assert fetch(provider)["CHF"] == 0.93
+    assert provider.fetches == 2
+
+
+def test_failed_refresh_keeps_the_last_table(provider, rates_api, clock):
+    fetch(provider)
+    rates_api.status = 500
+    clock[0] += 3601
+    assert fetch(provider)["CHF"] == 0.93
+    assert provider.failures == 1
+    # and retries after retry_after rather than the full ttl
+    rates_api.status = None
+    rates_api.rates = {"CHF": 0.91}
+    clock[0] += 61
+    assert fetch(provider)["CHF"] == 0.91
+
+
+def test_malformed_responses_count_as_failures(provider, rates_api):
+    rates_api.rates = {"CHF": "n/a"}
+    assert fetch(provider) == FALLBACK
+    assert provider.failures == 1
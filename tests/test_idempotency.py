@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def account(api):
+    # The unique index from INDEX_SPECS turns a retried insert into a replay. Every row
+    # in these tests carries a key: mongomock would ignore the partial filter.
+    asyncio.run(server.db.transactions.create_index([("user_email", 1), ("idempotency_key", 1)], unique=True))
+    return api.post("/api/accounts", json={"name": "Compte courant", "currency": "CHF", "initial_balance": 100}).json()
+
+
+def transaction(account, amount=40):
+    return {
+        "account_id": account["id"], "type": "expense", "amount": amount, "category": "Alimentation",
+        "description": "Coop", "date": "2025-03-01T10:00:00+00:00"
+    }
+
+
+def create(api, body, key):
+    response = api.post("/api/transactions", json=body, headers={"Idempotency-Key": key})
+    assert response.status_code == 200
+    return response
+
+
+def balance(api, account):
+    return next(acc for acc in api.get("/api/accounts").json() if acc["id"] == account["id"])["current_balance"]
+
+
+def test_retry_returns_the_original_transaction(api, account):
+    first = create(api, transaction(account), "receipt-1")
+    retry = create(api, transaction(account), "receipt-1")
+
+    assert "Idempotent-Replayed" not in first.headers
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+    assert [t["id"] for t in api.get("/api/transactions").json()] == [first.json()["id"]]
+    assert balance(api, account) == pytest.approx(60)
+
+
+def test_retry_with_a_changed_body_still_returns_the_original(api, account):
+    first = create(api, transaction(account, 40), "receipt-1").json()
+    retry = create(api, transaction(account, 99), "receipt-1").json()
+    assert retry["id"] == first["id"]
+    assert retry["amount"] == 40
+    assert balance(api, account) == pytest.approx(60)
+
+
+def test_distinct_keys_create_distinct_transactions(api, account):
+    first = create(api, transaction(account), "receipt-1").json()
+    second = create(api, transaction(account), "receipt-2").json()
+    assert first["id"] != second["id"]
+    assert len(api.get("/api/transactions").json()) == 2
+    assert balance(api, account) == pytest.approx(20)
+
+
+def test_retry_does_not_apply_the_balance_delta_again(api, account):
+    create(api, transaction(account), "receipt-1")
+    create(api, transaction(account), "receipt-1")
+    report = asyncio.run(server.rebuild_account_balances("anonymous", repair=False))
+    assert report["drifted"] == []
+    row = asyncio.run(server.db.account_balances.find_one({"account_id": account["id"]}))
+    assert row["expense"] == pytest.approx(40)
+
+
+@pytest.mark.parametrize("key", ["", "k" * 256])
+def test_key_length_is_checked(api, account, key):
+    response = api.post("/api/transactions", json=transaction(account), headers={"Idempotency-Key": key})
+    assert response.status_code == 400
+    assert api.get("/api/transactions").json() == []
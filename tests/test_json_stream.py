@@ -0,0 +1,76 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+
+from json_stream import gunzip, iter_json_collections, iter_ndjson
+
+
+async def chunked(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def collect(iterator):
+    async def run():
+        return [item async for item in iterator]
+    return asyncio.run(run())
+
+
+BACKUP = {
+    "accounts": [{"id": "a1", "name": "Épargne", "initial_balance": 1250.5}],
+    "transactions": [
+        {"id": f"t{i}", "amount": i * 10.25, "description": f"Café {i}", "tags": ["a", "b"]}
+        for i in range(20)
+    ],
+    "goals": [],
+    "checkpoint": "2025-01-01T00:00:00+00:00",
+}
+EXPECTED = [("accounts", BACKUP["accounts"][0])] + [("transactions", t) for t in BACKUP["transactions"]]
+
+
+@pytest.mark.parametrize("size", [1, 7, 4096])
+def test_json_documents_across_chunk_boundaries(size):
+    data = json.dumps(BACKUP, ensure_ascii=False, indent=2).encode()
+    assert collect(iter_json_collections(chunked(data, size))) == EXPECTED
+
+
+def test_json_number_split_between_chunks():
+    data = b'{"transactions": [{"amount": 12345}], "version": 678}'
+    assert collect(iter_json_collections(chunked(data, 31))) == [("transactions", {"amount": 12345})]
+
+
+def test_json_truncated_backup_is_rejected():
+    data = json.dumps(BACKUP).encode()[:-30]
+    with pytest.raises(ValueError):
+        collect(iter_json_collections(chunked(data, 64)))
+
+
+def test_ndjson_skips_checkpoint_and_blank_lines():
+    lines = [json.dumps({"collection": name, "document": doc}) for name, doc in EXPECTED]
+    lines += ["", json.dumps({"checkpoint": "2025-01-01T00:00:00+00:00", "counts": {}})]
+    data = "\n".join(lines).encode()
+    assert collect(iter_ndjson(chunked(data, 5))) == EXPECTED
+
+
+def test_ndjson_rejects_unexpected_records():
+    with pytest.raises(ValueError):
+        collect(iter_ndjson(chunked(b'{"id": "t1"}\n', 64)))
+
+
+def test_gunzip_stream():
+    data = json.dumps(BACKUP).encode()
+    assert collect(iter_json_collections(gunzip(chunked(gzip.compress(data), 3)))) == EXPECTED
+
+
+def test_metadata_is_collected_from_both_formats():
+    metadata = {}
+    data = json.dumps({**BACKUP, "full": False, "deleted": {"goals": ["g1"]}}).encode()
+    assert collect(iter_json_collections(chunked(data, 16), metadata)) == EXPECTED
+    assert metadata == {"checkpoint": BACKUP["checkpoint"], "full": False, "deleted": {"goals": ["g1"]}}
+
+    metadata = {}
+    trailer = {"checkpoint": 7, "full": False, "deleted": {}, "counts": {}}
+    collect(iter_ndjson(chunked(json.dumps(trailer).encode(), 8), metadata))
+    assert metadata == trailer
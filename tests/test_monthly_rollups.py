@@ -0,0 +1,122 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+import server
+
+THIS_MONTH = datetime.now(timezone.utc).strftime("%Y-%m")
+
+
+@pytest.fixture
+def account(api):
+    return api.post("/api/accounts", json={"name": "Compte courant", "currency": "CHF", "initial_balance": 0}).json()
+
+
+def transaction(account, amount, type="expense", category="Alimentation", date=None):
+    return {
+        "account_id": account["id"], "type": type, "amount": amount, "category": category,
+        "description": "Test", "date": date or f"{THIS_MONTH}-01T10:00:00+00:00"
+    }
+
+
+def rollup_rows():
+    rows = asyncio.run(server.db.monthly_rollups.find({"user_email": "anonymous"}, {"_id": 0}).to_list(None))
+    return {
+        (row["account_id"], row["month"], row["type"], row["category"]): {"total": row["total"], "count": row["count"]}
+        for row in rows
+    }
+
+
+def recomputed():
+    txns = asyncio.run(server.db.transactions.find({"user_email": "anonymous"}, {"_id": 0}).to_list(None))
+    return {key: delta for key, delta in server.rollup_deltas(txns).items() if delta["count"]}
+
+
+def assert_rollups_match_history(api):
+    assert rollup_rows() == recomputed()
+    # The dashboard reads the rollups: its totals agree with the transactions
+    txns = api.get("/api/transactions").json()
+    summary = api.get("/api/dashboard/summary").json()
+    expenses = sum(t["amount"] for t in txns if t["type"] == "expense")
+    income = sum(t["amount"] for t in txns if t["type"] == "income")
+    assert summary["trends"][-1]["expenses"] == pytest.approx(expenses)
+    assert summary["trends"][-1]["income"] == pytest.approx(income)
+    by_category = {}
+    for t in txns:
+        if t["type"] == "expense":
+            by_category[t["category"]] = by_category.get(t["category"], 0) + t["amount"]
+    assert {c["name"]: c["amount"] for c in summary["top_categories"]} == pytest.approx(by_category)
+
+
+def test_writes_keep_rollups_equal_to_a_full_recompute(api, account):
+    api.get("/api/dashboard/summary")  # first read builds the rollups
+    food = api.post("/api/transactions", json=transaction(account, 40)).json()
+    api.post("/api/transactions", json=transaction(account, 2500, type="income", category="Salaire"))
+    api.post("/api/transactions", json=transaction(account, 15, category="Transport"))
+    assert_rollups_match_history(api)
+
+    api.put(f"/api/transactions/{food['id']}", json=transaction(account, 55, category="Restaurants"))
+    assert_rollups_match_history(api)
+
+    api.delete(f"/api/transactions/{food['id']}")
+    assert_rollups_match_history(api)
+    assert not [key for key in rollup_rows() if key[3] == "Restaurants"]
+
+
+def test_rebuild_matches_incremental_rows(api, account):
+    api.get("/api/dashboard/summary")
+    for amount in (10, 20, 30):
+        api.post("/api/transactions", json=transaction(account, amount))
+    incremental = rollup_rows()
+    assert asyncio.run(server.rebuild_monthly_rollups("anonymous")) == 1
+    assert rollup_rows() == incremental
+
+
+def test_offset_dates_use_the_utc_month_on_both_paths(api, account):
+    api.get("/api/dashboard/summary")
+    late = "2025-01-31T23:30:00-02:00"  # 2025-02-01 in UTC
+    api.post("/api/transactions", json=transaction(account, 10, date=late))
+    assert [key[1] for key in rollup_rows()] == ["2025-02"]
+    asyncio.run(server.rebuild_monthly_rollups("anonymous"))
+    assert [key[1] for key in rollup_rows()] == ["2025-02"]
+
+
+def test_rebuild_repeats_when_a_write_lands_during_it(api, account, monkeypatch):
+    api.post("/api/transactions", json=transaction(account, 10))
+    run_in_transaction = server.run_in_transaction
+    passes = []
+
+    async def write_during_first_pass(callback):
+        result = await run_in_transaction(callback)
+        passes.append(result)
+        if len(passes) == 1:
+            # A transaction written (and its delta applied) while the rebuild ran
+            doc = server.Transaction(**transaction(account, 7)).model_dump()
+            doc.update(user_email="anonymous", date=server.storage_date(doc["date"]))
+            await server.db.transactions.insert_one(dict(doc))
+            await server.apply_rollup_deltas("anonymous", added=[doc])
+        return result
+    monkeypatch.setattr(server, "run_in_transaction", write_during_first_pass)
+
+    asyncio.run(server.rebuild_monthly_rollups("anonymous"))
+    assert len(passes) == 2
+    assert rollup_rows() == recomputed()
+
+
+def test_rollups_from_an_older_version_are_rebuilt(api, account):
+    api.post("/api/transactions", json=transaction(account, 10))
+    asyncio.run(server.ensure_monthly_rollups("anonymous"))
+    status = asyncio.run(server.db.rollup_status.find_one({"user_email": "anonymous"}))
+    assert status["version"] == server.ROLLUP_VERSION
+
+    # Rows keyed by an older version are replaced on the next read
+    asyncio.run(server.db.monthly_rollups.update_many({}, {"$set": {"month": "1999-01"}}))
+    asyncio.run(server.db.rollup_status.update_one({}, {"$set": {"version": server.ROLLUP_VERSION - 1}}))
+    asyncio.run(server.ensure_monthly_rollups("anonymous"))
+    assert rollup_rows() == recomputed()
+
+    # Current rows are left alone
+    asyncio.run(server.db.monthly_rollups.update_many({}, {"$set": {"month": "1999-01"}}))
+    asyncio.run(server.ensure_monthly_rollups("anonymous"))
+    assert [key[1] for key in rollup_rows()] == ["1999-01"]
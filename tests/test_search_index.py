@@ -0,0 +1,187 @@
+import asyncio
+
+import pytest
+
+import server
+from search_index import PrefixIndex, PrefixIndexRegistry, extends, tokenize
+
+TYPES = {"products": (("id", "name", "category"), ("name", "category"))}
+
+
+def product_index(*products, version=1):
+    index = PrefixIndex(version)
+    index.build(("products", doc, TYPES["products"][1]) for doc in products)
+    return index
+
+
+MIGROS = {"id": "p1", "name": "Migros Zürich", "category": "Courses"}
+MIGROLINO = {"id": "p2", "name": "Migrolino", "category": "Courses"}
+CAFE = {"id": "p3", "name": "Café Crème", "category": "Boissons"}
+
+
+def test_tokenize_folds_case_and_accents():
+    assert tokenize("Café Crème, 2x") == ["cafe", "creme", "2x"]
+    assert tokenize(None) == []
+
+
+def test_extends_only_narrowing_queries():
+    assert extends(["mig"], ["migros"])
+    assert extends(["migros"], ["migros", "zu"])
+    assert not extends(["migros"], ["mig"])
+    assert not extends(["migros", "zu"], ["coop", "zu"])
+
+
+def test_every_word_must_prefix_a_token():
+    index = product_index(MIGROS, MIGROLINO, CAFE)
+    assert set(index.search("mig")) == {("products", "p1"), ("products", "p2")}
+    assert index.search("mig zur") == [("products", "p1")]
+    assert index.search("creme") == [("products", "p3")]
+    assert index.search("mig boissons") == []
+    assert index.search("   ") == []
+
+
+def test_exact_words_rank_first():
+    index = product_index(MIGROS, MIGROLINO)
+    assert index.search("migros")[0] == ("products", "p1")
+    assert index.search("migrolino")[0] == ("products", "p2")
+
+
+def test_narrowing_with_prev_q_matches_a_fresh_search():
+    index = product_index(MIGROS, MIGROLINO, CAFE)
+    index.search("mi")
+    narrowed = index.search("migros z", prev_q="mi")
+    assert narrowed == product_index(MIGROS, MIGROLINO, CAFE).search("migros z")
+
+
+def test_add_replaces_and_remove_forgets():
+    index = product_index(MIGROS)
+    index.add("products", {**MIGROS, "name": "Coop"}, TYPES["products"][1])
+    assert index.search("migros") == []
+    assert index.search("coop") == [("products", "p1")]
+    index.remove("products", "p1")
+    assert index.search("coop") == []
+    assert len(index) == 0
+
+
+def test_registry_updates_only_built_indexes():
+    registry = PrefixIndexRegistry(2, TYPES)
+    registry.add("alice", "products", [MIGROS])
+    assert registry.get("alice") is None
+
+    registry.set("alice", product_index(version=3))
+    registry.add("alice", "products", [MIGROS])
+    assert registry.get("alice").search("migros") == [("products", "p1")]
+
+
+def test_registry_advances_only_the_next_version():
+    registry = PrefixIndexRegistry(2, TYPES)
+    registry.set("alice", product_index(version=3))
+    registry.advance("alice", 4)
+    assert registry.get("alice").version == 4
+    # A version skipped means another worker wrote: the index stays behind and is rebuilt
+    registry.advance("alice", 6)
+    assert registry.get("alice").version == 4
+
+
+def test_registry_evicts_least_recent_users():
+    registry = PrefixIndexRegistry(2, TYPES)
+    for user in ("alice", "bob", "carol"):
+        registry.set(user, product_index())
+    assert registry.get("alice") is None
+    assert registry.stats()["users"] == 2
+
+
+def search(api, q, **params):
+    response = api.get("/api/search", params={"q": q, **params})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_search_api_finds_prefixes_and_follows_writes(api):
+    product = api.post("/api/products", json={"name": "Gruyère AOP", "category": "Fromage"}).json()
+    api.post("/api/accounts", json={"name": "Compte Gruyère", "currency": "CHF"})
+
+    body = search(api, "gruy")
+    assert [p["id"] for p in body["products"]] == [product["id"]]
+    assert [a["name"] for a in body["accounts"]] == ["Compte Gruyère"]
+    assert search(api, "gruy", type="products").keys() == {"products"}
+
+    api.put(f"/api/products/{product['id']}", json={"name": "Emmental", "category": "Fromage"})
+    assert search(api, "gruy")["products"] == []
+    assert [p["name"] for p in search(api, "emm")["products"]] == ["Emmental"]
+
+    api.delete(f"/api/products/{product['id']}")
+    assert search(api, "emm")["products"] == []
+
+
+def test_search_api_rejects_unknown_types(api):
+    assert api.get("/api/search", params={"q": "x", "type": "nope"}).status_code == 400
+
+
+def test_index_is_rebuilt_after_writes_from_another_worker(api, monkeypatch):
+    api.post("/api/products", json={"name": "Gruyère", "category": "Fromage"})
+    assert len(search(api, "gruy")["products"]) == 1
+
+    # Another worker adds a product: the data version moves past this process's index
+    async def other_worker():
+        await server.db.products.insert_one(
+            {"id": "p-other", "name": "Gruyère bio", "category": "Fromage", "user_email": "anonymous"}
+        )
+        await server.db.data_versions.update_one({"user_email": "anonymous"}, {"$inc": {"version": 1}})
+    asyncio.run(other_worker())
+    assert len(search(api, "gruy")["products"]) == 1  # checked again after SEARCH_INDEX_RECHECK
+
+    monkeypatch.setattr(server, "SEARCH_INDEX_RECHECK", 0)
+    assert len(search(api, "gruy")["products"]) == 2
+
+
+class TextSearchCollection:
+    """Stands in for a collection with a text index: records the query, returns canned rows"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def find(self, query, projection=None):
+        self.queries.append((query, projection))
+        return self
+
+    def sort(self, *args):
+        return self
+
+    def skip(self, count):
+        return self
+
+    def limit(self, count):
+        return self
+
+    async def to_list(self, length):
+        return self.rows
+
+
+def test_users_too_large_to_index_use_the_text_indexes(api, monkeypatch):
+    products = TextSearchCollection([{"id": "p1", "name": "Gruyère", "category": "Fromage", "score": 1.5}])
+    empty = TextSearchCollection([])
+
+    class TextSearchDatabase:
+        def __getitem__(self, name):
+            return products if name == "products" else empty
+
+    async def too_large(user_email):
+        return None
+    monkeypatch.setattr(server, "load_search_index", too_large)
+    monkeypatch.setattr(server, "db", TextSearchDatabase())
+
+    body = search(api, "gruyere", type="products")
+    assert body == {"products": [{"id": "p1", "name": "Gruyère", "category": "Fromage", "score": 1.5}]}
+    query, projection = products.queries[0]
+    assert query == {"user_email": "anonymous", "$text": {"$search": "gruyere"}}
+    assert projection["score"] == {"$meta": "textScore"}
+
+
+@pytest.mark.parametrize("entities, indexed", [(1, True), (0, False)])
+def test_index_size_limit(api, monkeypatch, entities, indexed):
+    api.post("/api/products", json={"name": "Gruyère", "category": "Fromage"})
+    monkeypatch.setattr(server, "SEARCH_INDEX_MAX_ENTITIES", entities)
+    index = asyncio.run(server.load_search_index("anonymous"))
+    assert (index is not None) == indexed
@@ -0,0 +1,83 @@
+import pytest
+
+
+@pytest.fixture
+def account(api):
+    return api.post("/api/accounts", json={"name": "Compte courant", "currency": "CHF", "initial_balance": 100}).json()
+
+
+def item(account, amount, **extra):
+    return {
+        "account_id": account["id"], "type": "expense", "amount": amount, "category": "Alimentation",
+        "description": "Coop", "date": "2025-03-01T10:00:00+00:00", **extra
+    }
+
+
+def balance(api, account):
+    return next(acc for acc in api.get("/api/accounts").json() if acc["id"] == account["id"])["current_balance"]
+
+
+def test_create_batch_replays_idempotency_keys(api, account):
+    earlier = api.post("/api/transactions", json=item(account, 5), headers={"Idempotency-Key": "receipt-1"}).json()
+
+    body = api.post("/api/transactions/batch", json={"items": [
+        item(account, 5, idempotency_key="receipt-1"),   # sent before, as a single create
+        item(account, 7, idempotency_key="receipt-2"),
+        item(account, 7, idempotency_key="receipt-2"),   # repeated within the batch
+        item(account, 1),
+    ]}).json()
+
+    statuses = [(result["index"], result["status"]) for result in body["results"]]
+    assert sorted(statuses) == [(0, "replayed"), (1, "created"), (2, "replayed"), (3, "created")]
+    ids = {result["index"]: result["id"] for result in body["results"]}
+    assert ids[0] == earlier["id"]
+    assert ids[2] == ids[1]
+    assert body["counts"] == {"replayed": 2, "created": 2}
+    assert len(api.get("/api/transactions").json()) == 3
+    assert balance(api, account) == pytest.approx(100 - 5 - 7 - 1)
+
+
+def test_create_batch_reports_invalid_items(api, account):
+    body = api.post("/api/transactions/batch", json={"items": [item(account, 4), {"amount": "many"}]}).json()
+    assert [result["status"] for result in sorted(body["results"], key=lambda r: r["index"])] == ["created", "invalid"]
+    assert balance(api, account) == pytest.approx(96)
+
+
+def test_update_batch_reports_not_found(api, account):
+    created = api.post("/api/transactions/batch", json={"items": [item(account, 10)]}).json()
+    txn_id = created["results"][0]["id"]
+
+    body = api.put("/api/transactions/batch", json={"items": [
+        {**item(account, 25), "id": txn_id},
+        {**item(account, 50), "id": "missing"},
+    ]}).json()
+
+    results = sorted(body["results"], key=lambda r: r["index"])
+    assert [(r["status"], r["id"]) for r in results] == [("updated", txn_id), ("not_found", "missing")]
+    assert balance(api, account) == pytest.approx(75)
+
+
+def test_delete_batch_reverses_balances_once(api, account):
+    created = api.post("/api/transactions/batch", json={"items": [item(account, 10), item(account, 20)]}).json()
+    ids = [result["id"] for result in created["results"]]
+
+    first = api.request("DELETE", "/api/transactions/batch", json={"ids": ids + ["missing"]}).json()
+    again = api.request("DELETE", "/api/transactions/batch", json={"ids": ids}).json()
+
+    assert first["counts"] == {"deleted": 2, "not_found": 1}
+    assert again["counts"] == {"not_found": 2}
+    assert balance(api, account) == pytest.approx(100)
+
+
+def test_update_batch_rejects_repeated_ids(api, account):
+    created = api.post("/api/transactions/batch", json={"items": [item(account, 10)]}).json()
+    txn_id = created["results"][0]["id"]
+
+    body = api.put("/api/transactions/batch", json={"items": [
+        {**item(account, 25), "id": txn_id},
+        {**item(account, 40), "id": txn_id},
+    ]}).json()
+
+    assert [result["status"] for result in body["results"]] == ["updated", "invalid"]
+    assert api.get(f"/api/transactions/{txn_id}").json()["amount"] == 25
+    assert balance(api, account) == pytest.approx(75)
@@ -0,0 +1,80 @@
+import base64
+
+import pytest
+
+
+@pytest.fixture
+def txn_ids(api):
+    """Seven transactions over four days; days 2 and 3 hold several each"""
+    account = api.post("/api/accounts", json={"name": "Compte courant", "currency": "CHF"}).json()
+    days = ["2025-03-01", "2025-03-02", "2025-03-02", "2025-03-02", "2025-03-03", "2025-03-03", "2025-03-04"]
+    for i, day in enumerate(days):
+        api.post("/api/transactions", json={
+            "account_id": account["id"], "type": "expense", "amount": i + 1, "category": "Divers",
+            "description": f"Achat {i}", "date": f"{day}T00:00:00+00:00"
+        })
+    # Newest first, ties on the date ordered by id
+    txns = api.get("/api/transactions").json()
+    return [t["id"] for t in sorted(txns, key=lambda t: (t["date"], t["id"]), reverse=True)]
+
+
+def page(api, **params):
+    response = api.get("/api/transactions", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_plain_list_is_the_default(api, txn_ids):
+    body = page(api)
+    assert isinstance(body, list)
+    assert len(body) == len(txn_ids)
+
+
+def test_next_cursor_walks_every_row_once_across_tied_dates(api, txn_ids):
+    seen, body = [], page(api, page_size=2)
+    assert body["prev_cursor"] is None
+    while True:
+        seen += [t["id"] for t in body["items"]]
+        if not body["next_cursor"]:
+            break
+        body = page(api, page_size=2, after=body["next_cursor"])
+    assert seen == txn_ids
+
+
+def test_prev_cursor_returns_the_previous_page(api, txn_ids):
+    first = page(api, page_size=3)
+    second = page(api, page_size=3, after=first["next_cursor"])
+    assert [t["id"] for t in second["items"]] == txn_ids[3:6]
+
+    back = page(api, page_size=3, before=second["prev_cursor"])
+    assert [t["id"] for t in back["items"]] == txn_ids[:3]
+    assert back["prev_cursor"] is None
+    assert back["next_cursor"]
+
+
+def test_last_page_has_no_next_cursor(api, txn_ids):
+    body = page(api, page_size=len(txn_ids))
+    assert len(body["items"]) == len(txn_ids)
+    assert body["next_cursor"] is None
+
+
+def test_fields_are_projected_on_pages(api, txn_ids):
+    body = page(api, page_size=2, fields="id,amount")
+    assert [set(t) for t in body["items"]] == [{"id", "amount"}] * 2
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-a-cursor",
+    base64.urlsafe_b64encode(b'{"d": "2025-03-01"}').decode(),
+    base64.urlsafe_b64encode(b'[1, 2]').decode(),
+    base64.urlsafe_b64encode(b'{"d": "yesterday", "i": "x", "t": "dt"}').decode(),
+])
+def test_invalid_cursors_are_rejected(api, txn_ids, cursor):
+    response = api.get("/api/transactions", params={"after": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_after_and_before_together_are_rejected(api, txn_ids):
+    cursor = page(api, page_size=2)["next_cursor"]
+    assert api.get("/api/transactions", params={"after": cursor, "before": cursor}).status_code == 400
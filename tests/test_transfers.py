@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+from pymongo.errors import OperationFailure
+
+import server
+from fx_rates import StaticRateProvider
+
+
+@pytest.fixture
+def accounts(api, monkeypatch):
+    monkeypatch.setattr(server, "rate_provider", StaticRateProvider({"EUR": 1.0, "CHF": 0.95, "USD": 1.10}))
+    return {
+        name: api.post("/api/accounts", json={"name": name, "currency": currency, "initial_balance": initial}).json()
+        for name, currency, initial in (("Compte courant", "CHF", 1000), ("Épargne", "CHF", 5000), ("Compte EUR", "EUR", 200))
+    }
+
+
+def transfer(api, source, target, amount):
+    return api.post("/api/accounts/transfer", params={
+        "from_account_id": source["id"], "to_account_id": target["id"], "amount": amount, "description": "Virement"
+    })
+
+
+def balances(api):
+    return {acc["name"]: acc["current_balance"] for acc in api.get("/api/accounts").json()}
+
+
+def assert_matches_history():
+    report = asyncio.run(server.rebuild_account_balances("anonymous", repair=False))
+    assert report["drifted"] == []
+
+
+def test_transfer_writes_both_legs(api, accounts):
+    body = transfer(api, accounts["Compte courant"], accounts["Épargne"], 250).json()
+    assert body["rate"] == 1.0
+    assert (body["from_balance"], body["to_balance"]) == pytest.approx((750, 5250))
+
+    legs = asyncio.run(server.db.transactions.find({"type": "transfer"}, {"_id": 0}).to_list(None))
+    by_direction = {leg["transfer_direction"]: leg for leg in legs}
+    assert len(legs) == 2 and by_direction.keys() == {"out", "in"}
+    out, incoming = by_direction["out"], by_direction["in"]
+    assert (out["account_id"], out["to_account_id"], out["amount"]) == (
+        accounts["Compte courant"]["id"], accounts["Épargne"]["id"], 250
+    )
+    assert (incoming["account_id"], incoming["to_account_id"], incoming["amount"]) == (
+        accounts["Épargne"]["id"], accounts["Compte courant"]["id"], 250
+    )
+    assert balances(api) == pytest.approx({"Compte courant": 750, "Épargne": 5250, "Compte EUR": 200})
+    assert_matches_history()
+
+
+def test_cross_currency_transfer_converts_the_incoming_leg(api, accounts):
+    body = transfer(api, accounts["Compte courant"], accounts["Compte EUR"], 95).json()
+    assert body["rate"] == pytest.approx(1 / 0.95)
+    assert body["converted_amount"] == pytest.approx(100)
+    assert (body["from_currency"], body["to_currency"]) == ("CHF", "EUR")
+    assert balances(api) == pytest.approx({"Compte courant": 905, "Épargne": 5000, "Compte EUR": 300})
+    assert_matches_history()
+
+
+def test_unknown_currency_is_rejected_before_writing(api, accounts):
+    yen = api.post("/api/accounts", json={"name": "Compte JPY", "currency": "JPY"}).json()
+    response = transfer(api, accounts["Compte courant"], yen, 10)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "No exchange rate from CHF to JPY"
+    assert api.get("/api/transactions").json() == []
+
+
+def test_unknown_account_is_not_found(api, accounts):
+    assert transfer(api, accounts["Compte courant"], {"id": "missing"}, 10).status_code == 404
+
+
+class StandaloneClient:
+    """A client for a standalone mongod: sessions exist, transactions do not"""
+
+    def __init__(self):
+        self.attempts = 0
+
+    async def start_session(self):
+        self.attempts += 1
+        raise OperationFailure("Transaction numbers are only allowed on a replica set member or mongos", code=20)
+
+
+def test_standalone_deployments_fall_back_to_plain_writes(api, accounts, monkeypatch):
+    standalone = StandaloneClient()
+    monkeypatch.setattr(server, "client", standalone)
+    monkeypatch.setattr(server, "mongo_transactions_supported", None)
+
+    transfer(api, accounts["Compte courant"], accounts["Épargne"], 100)
+    assert server.mongo_transactions_supported is False
+    transfer(api, accounts["Compte courant"], accounts["Épargne"], 100)
+    assert standalone.attempts == 1  # not probed again
+
+    assert len(api.get("/api/transactions").json()) == 4
+    assert balances(api) == pytest.approx({"Compte courant": 800, "Épargne": 5200, "Compte EUR": 200})
+    assert_matches_history()
+
+
+def test_other_transaction_errors_are_raised(monkeypatch):
+    class FailingClient:
+        async def start_session(self):
+            raise OperationFailure("not authorized", code=13)
+    monkeypatch.setattr(server, "client", FailingClient())
+    monkeypatch.setattr(server, "mongo_transactions_supported", None)
+
+    async def callback(session):
+        raise AssertionError("must not run")
+    with pytest.raises(OperationFailure):
+        asyncio.run(server.run_in_transaction(callback))
+    assert server.mongo_transactions_supported is None
+
+
+def test_transaction_callback_gets_the_session(monkeypatch):
+    class Session:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def with_transaction(self, callback):
+            return await callback(self)
+
+    session = Session()
+
+    class ReplicaSetClient:
+        async def start_session(self):
+            return session
+    monkeypatch.setattr(server, "client", ReplicaSetClient())
+    monkeypatch.setattr(server, "mongo_transactions_supported", None)
+
+    async def callback(s):
+        return s
+    assert asyncio.run(server.run_in_transaction(callback)) is session
+    assert server.mongo_transactions_supported is True
+
+
+def test_currency_rates_table(api, accounts):
+    body = api.get("/api/currency/rates", params={"base": "CHF"}).json()
+    assert body["rates"]["CHF"] == pytest.approx(1)
+    assert body["rates"]["EUR"] == pytest.approx(1 / 0.95)
+    assert api.get("/api/currency/rates", params={"base": "JPY"}).status_code == 400
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Transfer Concurrency Stress Test for FinanceApp
+Fires many transfers at a few accounts in parallel and checks that no
+balance update is lost or applied twice
+
+Checks, after all transfers completed:
+- every transfer wrote exactly one outgoing and one incoming leg
+- each account's materialized balance (account_balances) equals the totals
+  recomputed from its transaction history
+- each account's balance equals its initial balance plus the amounts the
+  transfer endpoint reported moving in and out of it
+
+Runs against a local mongod in a throwaway database, calling the handlers
+directly as the anonymous user. Transfers run in a multi-document
+transaction on a replica set and without one on a standalone mongod; both
+must pass.
+
+Usage:
+    MONGO_URL=mongodb://localhost:27017 python transfer_stress_test.py [--transfers 2000] [--concurrency 200]
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'financeapp_transfer_stress')
+# Deterministic rates: the check compares against the amounts each call reports
+os.environ.setdefault('FX_RATE_PROVIDER', 'static')
+
+from starlette.requests import Request  # noqa: E402
+
+import server  # noqa: E402
+
+USER_EMAIL = "anonymous"
+ACCOUNTS = [
+    ("Compte courant", "CHF", 5000.0),
+    ("Épargne", "CHF", 20000.0),
+    ("Compte EUR", "EUR", 3000.0),
+    ("Revolut", "EUR", 800.0),
+    ("Compte USD", "USD", 1500.0),
+]
+
+
+def log(message, level="INFO"):
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] {level}: {message}")
+
+
+def make_request():
+    return Request({"type": "http", "method": "POST", "path": "/", "headers": [], "query_string": b""})
+
+
+async def create_accounts():
+    accounts = []
+    for name, currency, initial_balance in ACCOUNTS:
+        account = await server.create_account(
+            server.AccountCreate(name=name, currency=currency, initial_balance=initial_balance), make_request()
+        )
+        accounts.append(account)
+    return accounts
+
+
+async def run_transfers(accounts, count, concurrency):
+    """Random transfers, `concurrency` at a time; returns the per-account net movement they reported"""
+    semaphore = asyncio.Semaphore(concurrency)
+    moved = defaultdict(float)
+    rng = random.Random(42)
+    pairs = [tuple(rng.sample(accounts, 2)) for _ in range(count)]
+
+    async def transfer(source, target):
+        amount = round(rng.uniform(1, 250), 2)
+        async with semaphore:
+            result = await server.transfer_between_accounts(
+                from_account_id=source.id, to_account_id=target.id, amount=amount,
+                description="Stress test", request=make_request()
+            )
+        moved[source.id] -= result["amount"]
+        moved[target.id] += result["converted_amount"]
+
+    await asyncio.gather(*(transfer(source, target) for source, target in pairs))
+    return moved
+
+
+async def check(accounts, count, moved):
+    failures = []
+    legs = await server.db.transactions.count_documents({"user_email": USER_EMAIL, "type": "transfer"})
+    outgoing = await server.db.transactions.count_documents(
+        {"user_email": USER_EMAIL, "type": "transfer", "transfer_direction": "out"}
+    )
+    if legs != 2 * count or outgoing != count:
+        failures.append(f"expected {count} outgoing of {2 * count} legs, found {outgoing} of {legs}")
+
+    recomputed = await server.compute_account_totals(USER_EMAIL, [acc.id for acc in accounts])
+    stored = {
+        row["account_id"]: row
+        async for row in server.db.account_balances.find({"user_email": USER_EMAIL}, {"_id": 0})
+    }
+    docs = [acc.model_dump() for acc in accounts]
+    await server.attach_account_balances(USER_EMAIL, docs)
+    for acc, doc in zip(accounts, docs):
+        for field in server.BALANCE_TOTAL_FIELDS:
+            expected = recomputed.get(acc.id, {}).get(field, 0)
+            actual = stored.get(acc.id, {}).get(field, 0)
+            if not math.isclose(expected, actual, abs_tol=1e-6):
+                failures.append(f"{acc.name}: materialized {field} {actual:.2f} != history {expected:.2f}")
+        expected_balance = acc.initial_balance + moved[acc.id]
+        if not math.isclose(doc["current_balance"], expected_balance, abs_tol=1e-6):
+            failures.append(f"{acc.name}: balance {doc['current_balance']:.2f} != expected {expected_balance:.2f}")
+        log(f"{acc.name:<15} {acc.currency}: {doc['current_balance']:>12.2f}")
+    return failures
+
+
+async def main(args):
+    await server.client.drop_database(server.db.name)
+    try:
+        await server.ensure_indexes()
+        accounts = await create_accounts()
+
+        log(f"Running {args.transfers} transfers, {args.concurrency} at a time")
+        start = time.perf_counter()
+        moved = await run_transfers(accounts, args.transfers, args.concurrency)
+        elapsed = time.perf_counter() - start
+        log(f"{args.transfers} transfers in {elapsed:.2f}s ({args.transfers / elapsed:.0f}/s), "
+            f"Mongo transactions: {server.mongo_transactions_supported}")
+
+        failures = await check(accounts, args.transfers, moved)
+        for failure in failures:
+            log(failure, "ERROR")
+        log("PASS: balances consistent" if not failures else f"FAIL: {len(failures)} inconsistencies")
+        return 1 if failures else 0
+    finally:
+        await server.client.drop_database(server.db.name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transfers", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    try:
+        sys.exit(asyncio.run(main(parser.parse_args())))
+    finally:
+        server.client.close()